@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+data/ 開放資料 JSON 的串流載入工具
+
+逐筆串流讀取資料陣列 (不需將整個檔案 json.load 進記憶體)，每累積一批即以 pyarrow
+整欄轉換為具型別的欄位；民國日期 (114.03.08)、時間戳記與數值字串皆以向量化運算解析。
+轉換結果以 Arrow IPC 檔保存在原始檔旁 (<檔名>.arrow)，之後以 memory map 開啟，
+來源檔未變動時幾乎不需載入時間，也不會因資料量大而耗盡記憶體。
+
+用法:
+    python data/feed_loader.py data/api_cabbage.json
+    python data/feed_loader.py data/api_earthquake.json --refresh
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = '.arrow'
+READ_CHUNK = 1024 * 1024
+BATCH_SIZE = 10000
+
+# 已知資料集的資料陣列位置、欄位定義位置與指定型別的欄位 (依檔名對應)，其他檔案以 detect_feed 判斷
+FEEDS = {
+    'api_cabbage.json': {'records': ('Data',), 'fields': None, 'types': {'MarketCode': 'string'}},
+    'api_earthquake.json': {'records': ('records', 'Earthquake'), 'fields': ('result', 'fields')},
+    'Shopee_NaNa.json': {'records': (), 'fields': None},
+}
+
+# 開放資料 fields 宣告的型別與欄位型別的對應
+DECLARED_TYPES = {
+    'String': 'string',
+    'Integer': 'int',
+    'Float': 'float',
+    'Timestamp': 'timestamp',
+    'Date': 'date',
+}
+
+ARROW_TYPES = {
+    'string': pa.string(),
+    'int': pa.int64(),
+    'float': pa.float64(),
+    'date': pa.date32(),
+    'timestamp': pa.timestamp('s'),
+    'list': pa.list_(pa.string()),
+    'json': pa.string(),
+    'bool': pa.bool_(),
+}
+
+_DATE_PATTERN = r'^\s*(?P<y>\d{2,4})\s*[./\-年]\s*(?P<m>\d{1,2})\s*[./\-月]\s*(?P<d>\d{1,2})\s*日?\s*$'
+_TIMESTAMP_PATTERN = r'^\s*\d{4}-\d{1,2}-\d{1,2}[ T]\d{1,2}:\d{2}:\d{2}\s*$'
+_NUMBER_PATTERN = r'^\s*-?[\d,]*\.?\d+\s*$'
+_INT_PATTERN = r'^\s*-?[\d,]+\s*$'
+
+# 值無法以欄位型別保存時放寬的順序，未列出的型別直接改為字串
+WIDER_TYPES = {'int': 'float'}
+
+class JsonStream:
+    """
+    以固定大小區塊讀取 JSON 檔，只解碼需要的部分
+    走訪物件時略過不需要的值，遇到目標陣列則逐一解碼元素，記憶體用量只與單一元素大小有關
+    """
+
+    def __init__(self, f):
+        self._file = f
+        self._decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self._file.read(READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """略過空白並回傳下一個字元，檔案結束時回傳空字串"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON 格式錯誤：預期 {char!r}，位置 {self.pos}")
+        self.pos += 1
+
+    def decode(self):
+        """解碼下一個完整的值；資料不足或數字可能被區塊切斷時讀取更多資料後重試"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def members(self):
+        """逐一取得物件的鍵，呼叫端需在下一次迭代前解碼或略過對應的值"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"JSON 格式錯誤：預期 ',' 或 '}}'，位置 {self.pos}")
+
+    def items(self):
+        """逐一解碼陣列元素"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"JSON 格式錯誤：預期 ',' 或 ']'，位置 {self.pos}")
+
+def iter_records(path, records_path=(), captures=None):
+    """
+    串流讀取 records_path 指向的陣列元素；captures 為 {名稱: 路徑}，
+    位於資料陣列之前的這些值 (例如 fields 欄位定義) 會在第一筆資料產生前寫入 captured
+    回傳 (captured, 元素迭代器)
+    """
+    captures = captures or {}
+    captured = {}
+
+    def walk(stream, prefix):
+        if tuple(prefix) == tuple(records_path):
+            yield from stream.items()
+            return
+        depth = len(prefix)
+        wanted = {target[depth] for target in [records_path, *captures.values()]
+                  if len(target) > depth and tuple(target[:depth]) == tuple(prefix)}
+        if stream.peek() != '{' or not wanted:
+            stream.decode()
+            return
+        for key in stream.members():
+            path_here = (*prefix, key)
+            name = next((name for name, target in captures.items() if tuple(target) == path_here), None)
+            if name:
+                captured[name] = stream.decode()
+            elif key in wanted:
+                yield from walk(stream, path_here)
+            else:
+                stream.decode()
+
+    def generate():
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from walk(JsonStream(f), ())
+
+    return captured, generate()
+
+def detect_feed(path):
+    """依檔名取得資料集設定；未知檔案若最外層為陣列則直接使用，否則尋找第一個陣列型別的欄位"""
+    name = os.path.basename(path)
+    if name in FEEDS:
+        return FEEDS[name]
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f)
+        if stream.peek() == '[':
+            return {'records': (), 'fields': None}
+        for key in stream.members():
+            if stream.peek() == '[':
+                return {'records': (key,), 'fields': None}
+            stream.decode()
+    raise ValueError(f"找不到資料陣列: {path}")
+
+def declared_schema(fields):
+    """將開放資料的 fields 宣告轉為 {欄位: 型別}；同名欄位以第一次宣告為準"""
+    schema = {}
+    for field in fields or []:
+        schema.setdefault(field['id'], DECLARED_TYPES.get(field.get('type'), 'string'))
+    return schema
+
+def flatten_record(record):
+    """將巢狀物件展開為單層欄位，沿用最內層的鍵名，鍵名重複時加上上層名稱"""
+    flat = {}
+
+    def visit(value, key, parent):
+        if isinstance(value, dict):
+            for child_key, child in value.items():
+                visit(child, child_key, key)
+            return
+        name = key if key not in flat else f"{parent}.{key}"
+        flat[name] = value
+
+    for key, value in record.items():
+        visit(value, key, None)
+    return flat
+
+def _nullify_blank(array):
+    return pc.if_else(pc.equal(pc.utf8_trim_whitespace(array), ''), pa.scalar(None, pa.string()), array)
+
+def _string_array(values):
+    return pa.array([value if value is None or isinstance(value, str) else str(value) for value in values],
+                    pa.string())
+
+def parse_numbers(values, arrow_type=pa.float64()):
+    """整欄將數值或 1,234 形式的字串轉為數值，空字串或無法解析者為 null"""
+    if all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)) for value in values):
+        return pa.array(values, pa.float64() if any(isinstance(value, float) for value in values) else arrow_type)
+    array = _nullify_blank(_string_array(values))
+    valid = pc.match_substring_regex(array, _NUMBER_PATTERN)
+    cleaned = pc.replace_substring(pc.utf8_trim_whitespace(array), ',', '')
+    cleaned = pc.if_else(valid, cleaned, pa.scalar(None, pa.string()))
+    return pc.cast(cleaned, arrow_type)
+
+def parse_roc_dates(values):
+    """整欄將民國 (114.03.08、114/3/8) 或西元日期字串轉為 date32，無法解析者為 null"""
+    parts = pc.extract_regex(_string_array(values), _DATE_PATTERN)
+    year, month, day = (pc.cast(pc.struct_field(parts, name), pa.int32()) for name in ('y', 'm', 'd'))
+    year = pc.if_else(pc.less_equal(year, 1911), pc.add(year, 1911), year)
+    text = pc.binary_join_element_wise(
+        pc.cast(year, pa.string()),
+        pc.utf8_lpad(pc.cast(month, pa.string()), 2, '0'),
+        pc.utf8_lpad(pc.cast(day, pa.string()), 2, '0'),
+        '-')
+    parsed = pc.strptime(text, format='%Y-%m-%d', unit='s', error_is_null=True)
+    # strptime 會將 02-30 這類不存在的日期進位到下個月，月份不符者視為無法解析
+    valid = pc.fill_null(pc.equal(pc.month(parsed), pc.cast(month, pa.int64())), False)
+    return pc.cast(pc.if_else(valid, parsed, pa.scalar(None, parsed.type)), pa.date32())
+
+def parse_timestamps(values):
+    """整欄將 2025-03-08 04:43:03 形式的字串轉為時間戳記"""
+    text = pc.replace_substring(_string_array(values), 'T', ' ')
+    return pc.strptime(text, format='%Y-%m-%d %H:%M:%S', unit='s', error_is_null=True)
+
+def infer_type(values):
+    """依一批樣本推斷欄位型別，供沒有 fields 宣告的資料集使用"""
+    samples = [value for value in values if value is not None and value != '']
+    if not samples:
+        return 'string'
+    if all(isinstance(value, bool) for value in samples):
+        return 'bool'
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in samples):
+        return 'int'
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in samples):
+        return 'float'
+    if all(isinstance(value, list) and all(not isinstance(item, (dict, list)) for item in value)
+           for value in samples):
+        return 'list'
+    if any(isinstance(value, (dict, list)) for value in samples):
+        return 'json'
+    array = _string_array(samples)
+    if pc.all(pc.match_substring_regex(array, _DATE_PATTERN)).as_py():
+        return 'date'
+    if pc.all(pc.match_substring_regex(array, _TIMESTAMP_PATTERN)).as_py():
+        return 'timestamp'
+    if pc.all(pc.match_substring_regex(array, _INT_PATTERN)).as_py():
+        return 'int'
+    if pc.all(pc.match_substring_regex(array, _NUMBER_PATTERN)).as_py():
+        return 'float'
+    return 'string'
+
+def convert_column(values, column_type):
+    """依欄位型別整欄轉換為 Arrow 陣列"""
+    if column_type in ('int', 'float'):
+        return parse_numbers(values, ARROW_TYPES[column_type])
+    if column_type == 'date':
+        return parse_roc_dates(values)
+    if column_type == 'timestamp':
+        return parse_timestamps(values)
+    if column_type == 'list':
+        return pa.array([[str(item) for item in value] if isinstance(value, list) else None for value in values],
+                        ARROW_TYPES['list'])
+    if column_type == 'json':
+        return pa.array([None if value is None else json.dumps(value, ensure_ascii=False) for value in values],
+                        pa.string())
+    if column_type == 'bool':
+        return pa.array([value if isinstance(value, bool) else None for value in values], pa.bool_())
+    return _string_array(values)
+
+class FeedConverter:
+    """
+    將一批批的資料轉為 RecordBatch
+    欄位與型別在第一批決定 (fields 宣告優先，其餘依樣本推斷)；之後的批次出現新欄位時加在結構最後，
+    值無法以既有型別保存時將欄位放寬 (int -> float -> string)，兩者都會記錄警告。
+    結構改變後，先前產生的批次需以 conform_batch 補齊為新的結構
+    """
+
+    def __init__(self, declared=None):
+        self.declared = declared or {}
+        self.columns = {}
+        self.schema = None
+        self.rows = 0
+
+    def _add_columns(self, rows):
+        names = []
+        for row in rows:
+            for name in row:
+                if name not in self.columns and name not in names:
+                    names.append(name)
+        for name in names:
+            values = [row.get(name) for row in rows]
+            declared = self.declared.get(name.rsplit('.', 1)[-1])
+            if declared and infer_type(values) in ('list', 'json'):
+                declared = None
+            self.columns[name] = declared or infer_type(values)
+            if self.rows:
+                logger.warning(f"欄位 {name} 在第 {self.rows} 筆之後才出現，先前的資料以 null 補齊")
+
+    def _convert(self, name, values):
+        while True:
+            column_type = self.columns[name]
+            try:
+                array = convert_column(values, column_type)
+                if array.type != ARROW_TYPES[column_type]:
+                    array = pc.cast(array, ARROW_TYPES[column_type])
+                return array
+            except (pa.ArrowInvalid, OverflowError) as e:
+                if column_type == 'string':
+                    raise
+                wider = WIDER_TYPES.get(column_type, 'string')
+                logger.warning(f"欄位 {name} 出現無法以 {column_type} 保存的值 ({e})，改為 {wider}")
+                self.columns[name] = wider
+
+    def convert(self, rows):
+        self._add_columns(rows)
+        arrays = [self._convert(name, [row.get(name) for row in rows]) for name in list(self.columns)]
+        self.schema = pa.schema([(name, ARROW_TYPES[column_type]) for name, column_type in self.columns.items()])
+        self.rows += len(rows)
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+def conform_batch(batch, schema):
+    """將先前的批次補齊為擴充後的結構：新欄位補 null，放寬的欄位轉為新型別"""
+    arrays = []
+    for field in schema:
+        index = batch.schema.get_field_index(field.name)
+        if index < 0:
+            arrays.append(pa.nulls(batch.num_rows, field.type))
+        else:
+            column = batch.column(index)
+            arrays.append(column if column.type == field.type else pc.cast(column, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def iter_batches(path, batch_size=BATCH_SIZE, feed=None):
+    """串流讀取資料集並逐批產生 RecordBatch"""
+    feed = feed or detect_feed(path)
+    captures = {'fields': feed['fields']} if feed.get('fields') else {}
+    captured, records = iter_records(path, feed['records'], captures)
+    converter = None
+    rows = []
+    for record in records:
+        if converter is None:
+            declared = declared_schema(captured.get('fields'))
+            declared.update(feed.get('types', {}))
+            converter = FeedConverter(declared)
+        rows.append(flatten_record(record) if isinstance(record, dict) else {'value': record})
+        if len(rows) >= batch_size:
+            yield converter.convert(rows)
+            rows = []
+    if rows:
+        yield (converter or FeedConverter()).convert(rows)
+
+def cache_path(path):
+    return path + CACHE_SUFFIX
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {'source_size': str(stat.st_size), 'source_mtime': str(stat.st_mtime_ns)}
+
+def _cache_is_fresh(path, cache_file):
+    if not os.path.exists(cache_file):
+        return False
+    try:
+        with pa.memory_map(cache_file, 'r') as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    signature = _source_signature(path)
+    return all(metadata.get(key.encode()) == value.encode() for key, value in signature.items())
+
+def _rewrite_cache(tmp_path, schema):
+    """結構改變時 (少見)，將已寫入的批次補齊為新的結構後重寫，回傳可繼續寫入的 writer"""
+    old_path = f"{tmp_path}.old"
+    os.replace(tmp_path, old_path)
+    writer = pa.ipc.new_file(tmp_path, schema)
+    with pa.memory_map(old_path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            writer.write_batch(conform_batch(reader.get_batch(index), schema))
+    os.remove(old_path)
+    return writer
+
+def build_cache(path, batch_size=BATCH_SIZE):
+    """串流轉換資料集並寫入 Arrow IPC 快取檔，回傳快取路徑"""
+    cache_file = cache_path(path)
+    tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+    metadata = _source_signature(path)
+    writer = None
+    schema = None
+    rows = 0
+    try:
+        for batch in iter_batches(path, batch_size):
+            if writer is None:
+                writer = pa.ipc.new_file(tmp_path, batch.schema.with_metadata(metadata))
+            elif not batch.schema.equals(schema):
+                writer.close()
+                writer = None
+                writer = _rewrite_cache(tmp_path, batch.schema.with_metadata(metadata))
+            schema = batch.schema
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        if writer is None:
+            writer = pa.ipc.new_file(tmp_path, pa.schema([]).with_metadata(metadata))
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, cache_file)
+    logger.info(f"已轉換 {rows} 筆資料: {path} -> {cache_file}")
+    return cache_file
+
+def load_feed(path, refresh=False, batch_size=BATCH_SIZE):
+    """
+    載入資料集為 pyarrow Table；快取存在且來源未變動時以 memory map 直接開啟 (不複製資料)
+    refresh 為 True 時重新轉換
+    """
+    cache_file = cache_path(path)
+    if refresh or not _cache_is_fresh(path, cache_file):
+        build_cache(path, batch_size)
+    source = pa.memory_map(cache_file, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+def load_columns(path, columns=None, refresh=False):
+    """載入資料集並回傳 {欄位: NumPy 陣列}，日期與時間戳記為 datetime64"""
+    table = load_feed(path, refresh=refresh)
+    names = columns or table.column_names
+    return {name: table.column(name).to_numpy(zero_copy_only=False) for name in names}
+
+def main():
+    parser = argparse.ArgumentParser(description='串流轉換 data/ 的開放資料 JSON 並建立 Arrow 快取')
+    parser.add_argument('paths', nargs='+', help='資料集 JSON 檔')
+    parser.add_argument('--refresh', action='store_true', help='忽略既有快取重新轉換')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='每批轉換的筆數')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        table = load_feed(path, refresh=args.refresh, batch_size=args.batch_size)
+        print(f"{path}: {table.num_rows} 筆, {table.num_columns} 欄 ({cache_path(path)})")
+        for field in table.schema:
+            print(f"  {field.name}: {field.type}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
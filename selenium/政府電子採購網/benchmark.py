@@ -0,0 +1,651 @@
+"""
+離線效能基準測試：以錄製或合成的列表頁與詳情頁作為測試資料，由本機 HTTP 伺服器提供，
+量測 extract_data、parse_detail_page、分頁流程與完整爬取流程在各種引擎與並行數下的耗時
+
+    python benchmark.py generate --pages 5 --rows 100          # 產生合成測試資料
+    python benchmark.py record --pages 3 --details 20          # 從 config.json 的查詢錄製實際頁面
+    python benchmark.py run --concurrency 1,4,8 --output result.json --baseline baseline.json
+"""
+import os
+import html
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import contextlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+from lxml import etree
+from procurement_crawler import (ProcurementCrawler, LIST_ROW_XPATH, NEXT_PAGE_XPATH,
+                                 DETAIL_PAGE_MARKER)
+from http_fetcher import HttpFetcher
+from checkpoint_manager import CrawlCheckpoint
+from pagination import TOTAL_COUNT_PATTERN
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURE_DIR = 'benchmark_fixtures'
+LIST_PATH = '/prkms/tender/common/basic/readTenderBasic'
+DETAIL_PATH = '/tps/QueryTender/query/searchTenderDetail'
+# 與 _config.json 相同的查詢參數 (含 isLogIn=N、orgId 等)，讓測試網址與實際列表頁的網址形式一致
+LIST_QUERY = (
+    ('firstSearch', 'true'), ('searchType', 'basic'), ('isBinding', 'N'), ('isLogIn', 'N'),
+    ('level_1', 'on'), ('orgName', ''), ('orgId', '4'), ('tenderName', ''), ('tenderId', ''),
+    ('tenderType', 'TENDER_DECLARATION'), ('tenderWay', 'TENDER_WAY_ALL_DECLARATION'),
+    ('dateType', 'isDate'), ('tenderStartDate', '2025/01/01'), ('tenderEndDate', '2025/03/18'),
+)
+MANIFEST_FILE = 'manifest.json'
+
+# 與上次結果相比，中位數變慢超過此比例時視為效能退化
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# ---------------------------------------------------------------------------
+# 測試資料
+# ---------------------------------------------------------------------------
+
+def list_fixture_path(fixture_dir, page):
+    return os.path.join(fixture_dir, 'list', f'page_{page:04d}.html')
+
+def detail_fixture_path(fixture_dir, index):
+    return os.path.join(fixture_dir, 'detail', f'detail_{index:04d}.html')
+
+def _write_fixture(path, html_content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+
+def _write_manifest(fixture_dir, manifest):
+    with open(os.path.join(fixture_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+def load_manifest(fixture_dir):
+    with open(os.path.join(fixture_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def fixture_fingerprint(fixture_dir):
+    """所有測試資料檔的雜湊值，用來確認兩次結果是以相同的資料量測"""
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(fixture_dir)):
+        for name in sorted(files):
+            if name == MANIFEST_FILE:
+                continue
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(name.encode('utf-8'))
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def list_query_params(page_size, page=None):
+    """列表頁的查詢參數，與 main.load_config_and_build_url 組出的網址相同順序"""
+    params = [('pageSize', str(page_size)), *LIST_QUERY]
+    if page is not None:
+        params.append(('pageIndex', str(page)))
+    return params
+
+def list_page_url(page, page_size):
+    # 與 load_config_and_build_url 相同，不對參數值編碼
+    return f"{LIST_PATH}?" + '&'.join(f"{key}={value}" for key, value in list_query_params(page_size, page))
+
+def detail_page_url(case_index):
+    return f"{DETAIL_PATH}?pkPmsMain={case_index}"
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-TW">
+<head>
+<meta charset="utf-8">
+<title>政府電子採購網</title>
+<script>{script}</script>
+<style>{style}</style>
+</head>
+<body>
+<div id="header"><ul class="menu">{menu}</ul></div>
+<div id="content">{content}</div>
+<div id="footer">{footer}</div>
+</body>
+</html>
+"""
+
+_ORG_NAMES = ('行政院', '國防部', '教育部', '經濟部', '交通部', '衛生福利部', '臺北市政府', '高雄市政府',
+              '臺灣電力股份有限公司', '國立臺灣大學')
+_TENDER_TYPES = ('公開招標', '限制性招標', '選擇性招標', '公開取得報價單或企劃書')
+_TENDER_SUBJECTS = ('辦公設備採購', '資訊系統維護案', '道路改善工程', '委託專業服務', '校舍耐震補強工程',
+                    '醫療器材採購', '清潔勞務委外', '網站建置案')
+_DETAIL_TABLES = {
+    '機關資料': ('機關代碼', '機關名稱', '單位名稱', '機關地址', '聯絡人', '聯絡電話', '傳真號碼', '電子郵件信箱'),
+    '採購資料': ('標案案號', '標案名稱', '標的分類', '財物採購性質', '採購金額級距', '辦理方式',
+                 '依據法條', '預算金額', '預算金額是否公開', '後續擴充', '是否受機關補助'),
+    '招標資料': ('招標方式', '決標方式', '公告日', '是否電子報價', '是否訂有底價', '價格是否納入評選',
+                 '是否屬特殊採購', '是否已辦理公開閱覽', '是否屬統包', '是否屬共同供應契約採購'),
+    '領投開標': ('是否提供電子領標', '截止投標', '開標時間', '開標地點', '是否須繳納押標金',
+                 '投標文字', '收受投標文件地點'),
+    '其他': ('履約地點', '履約期限', '是否刊登公報', '本案採購契約是否採用主管機關訂定之範本',
+             '疑義、異議、申訴及檢舉受理單位'),
+}
+
+def _page_chrome(rng):
+    """產生與實際網站相近的頁首選單、腳本與樣式，讓頁面大小接近真實頁面"""
+    menu = ''.join(f'<li><a href="/prkms/menu/{i}">選單項目{i}</a></li>' for i in range(120))
+    script = 'var config = {' + ','.join(f'"k{i}": {rng.randint(0, 9999)}' for i in range(300)) + '};'
+    style = ''.join(f'.c{i} {{ margin: {i % 7}px; padding: {i % 5}px; }}' for i in range(300))
+    footer = '<p>行政院公共工程委員會 版權所有</p>' * 5
+    return script, style, menu, footer
+
+def _roc_date(rng):
+    return f"{rng.randint(112, 114)}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}"
+
+def _render_list_page(rng, page, total_pages, page_size, rows, total_count):
+    row_html = []
+    for case_index, case_no, org_name, tender_name, tender_type, announce_date, deadline, budget in rows:
+        row_html.append(
+            f'<tr class="{"odd" if case_index % 2 else "even"}">'
+            f'<td>{case_index + 1}</td>'
+            f'<td>{org_name}</td>'
+            f'<td>{case_no}<br><a href="{detail_page_url(case_index)}"><span>{tender_name}</span></a></td>'
+            f'<td>{rng.randint(1, 3):02d}</td>'
+            f'<td>{tender_type}</td>'
+            f'<td>公告</td>'
+            f'<td>{announce_date}</td>'
+            f'<td>{deadline}</td>'
+            f'<td><span>{budget}</span></td>'
+            f'<td><a href="#" onclick="return false;">功能</a></td>'
+            f'</tr>')
+
+    links = [f'<a href="{html.escape(list_page_url(p, page_size))}">{p}</a>'
+             for p in range(1, total_pages + 1) if p != page]
+    if page < total_pages:
+        links.append(f'<a href="{html.escape(list_page_url(page + 1, page_size))}">下一頁</a>')
+    content = (f'<div class="summary">查詢結果共 {total_count:,} 筆資料</div>'
+               f'<table id="tpam"><thead><tr><th>項次</th><th>機關名稱</th><th>標案案號/標案名稱</th>'
+               f'<th>傳輸次數</th><th>招標方式</th><th>採購性質</th><th>公告日期</th><th>截止投標</th>'
+               f'<th>預算金額</th><th>功能選項</th></tr></thead><tbody>{"".join(row_html)}</tbody></table>'
+               f'<span id="pagelinks">{" ".join(links)}</span>')
+    script, style, menu, footer = _page_chrome(rng)
+    return _PAGE_TEMPLATE.format(script=script, style=style, menu=menu, content=content, footer=footer)
+
+def _render_detail_page(rng, case_no, org_name, tender_name, budget):
+    known = {'標案案號': case_no, '機關名稱': org_name, '標案名稱': tender_name, '預算金額': f'{budget}元'}
+    tables = []
+    for caption, labels in _DETAIL_TABLES.items():
+        rows = []
+        for label in labels:
+            value = known.get(label) or f'{label}內容 {rng.randint(1, 99999)}'
+            if rng.random() < 0.2:
+                value += f'<br>（附註 {rng.randint(1, 9)}）'
+            rows.append(f'<tr><td class="tbg_L">{label}</td><td class="tbg_R">{value}</td></tr>')
+        tables.append(f'<table class="tb_01"><caption>{caption}</caption>{"".join(rows)}</table>')
+    content = f'<div id="printRange">{"".join(tables)}</div>'
+    script, style, menu, footer = _page_chrome(rng)
+    return _PAGE_TEMPLATE.format(script=script, style=style, menu=menu, content=content, footer=footer)
+
+def generate_fixtures(fixture_dir=DEFAULT_FIXTURE_DIR, pages=5, rows_per_page=100, seed=20250318):
+    """產生結構與實際網站相同的合成列表頁與詳情頁，同一個 seed 每次產生的內容相同"""
+    rng = random.Random(seed)
+    total_count = pages * rows_per_page
+    for page in range(1, pages + 1):
+        rows = []
+        for offset in range(rows_per_page):
+            case_index = (page - 1) * rows_per_page + offset
+            org_name = rng.choice(_ORG_NAMES)
+            tender_name = f"{rng.randint(113, 114)}年度{rng.choice(_TENDER_SUBJECTS)}"
+            budget = f"{rng.randint(10, 50000) * 1000:,}"
+            case_no = f"{rng.randint(113, 114)}{case_index:05d}A"
+            rows.append((case_index, case_no, org_name, tender_name, rng.choice(_TENDER_TYPES),
+                         _roc_date(rng), _roc_date(rng), budget))
+            _write_fixture(detail_fixture_path(fixture_dir, case_index),
+                           _render_detail_page(rng, case_no, org_name, tender_name, budget))
+        _write_fixture(list_fixture_path(fixture_dir, page),
+                       _render_list_page(rng, page, pages, rows_per_page, rows, total_count))
+
+    _write_manifest(fixture_dir, {
+        'source': 'synthetic',
+        'seed': seed,
+        'page_size': rows_per_page,
+        'list_pages': pages,
+        'detail_pages': total_count,
+        'total_rows': total_count,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    logger.info(f"已產生 {pages} 個列表頁與 {total_count} 個詳情頁至 {fixture_dir}")
+
+def _rewrite_list_page(html_content, page, total_pages, page_size, first_case_index, total_count):
+    """將錄製的列表頁連結改寫為本機伺服器的路徑，並把總筆數改為實際錄製的筆數"""
+    tree = etree.HTML(html_content)
+    rows = tree.xpath(LIST_ROW_XPATH)
+    for offset, row in enumerate(rows):
+        for link in row.xpath('./td[3]/a'):
+            link.set('href', detail_page_url(first_case_index + offset))
+    for link in tree.xpath(NEXT_PAGE_XPATH):
+        if page < total_pages:
+            link.set('href', list_page_url(page + 1, page_size))
+        else:
+            link.getparent().remove(link)
+    html_content = etree.tostring(tree, method='html', encoding='unicode')
+    return TOTAL_COUNT_PATTERN.sub(f'共 {total_count:,} 筆', html_content, count=1), len(rows)
+
+def record_fixtures(config, fixture_dir=DEFAULT_FIXTURE_DIR, max_pages=3, max_details=20, use_browser=False):
+    """
+    依設定檔的查詢條件錄製實際列表頁與詳情頁，請求間隔沿用 rate_control 設定
+    use_browser 為 True 時以瀏覽器開啟頁面 (HTTP 抓取遇到驗證頁時使用)
+    """
+    from main import get_driver, load_config_and_build_url  # 錄製時才需要瀏覽器相關套件
+    from rate_controller import RateController
+
+    success, target_url = load_config_and_build_url(config)
+    if not success:
+        return False
+
+    rate_controller = RateController.from_config(config)
+    fetcher = HttpFetcher(cookie_url=target_url, rate_controller=rate_controller,
+                          verify_ssl=config.get('http', {}).get('verify_ssl', True))
+    driver = get_driver(headless=True) if use_browser else None
+    try:
+        if driver:
+            driver.get(target_url)
+            fetcher.sync_from_driver(driver)
+        crawler = ProcurementCrawler(driver, fetcher=fetcher, rate_controller=rate_controller)
+
+        list_pages, detail_links = [], []
+        url = target_url
+        while url and len(list_pages) < max_pages:
+            if not crawler.load_page(url):
+                logger.error(f"無法錄製列表頁: {url}")
+                break
+            html_content, final_url = crawler.current_page()
+            list_pages.append(html_content)
+            detail_links.extend(item['detail_link'] for item in crawler.extract_items_from_html(html_content, final_url) or []
+                                if item['detail_link'])
+            url = crawler.get_next_page_link()
+
+        detail_pages = []
+        for link in detail_links[:max_details]:
+            if crawler.load_page(link, marker=DETAIL_PAGE_MARKER):
+                detail_pages.append(crawler.current_page()[0])
+    finally:
+        fetcher.close()
+        if driver:
+            driver.quit()
+
+    if not list_pages or not detail_pages:
+        logger.error("沒有錄製到任何列表頁或詳情頁")
+        return False
+
+    page_size = len(etree.HTML(list_pages[0]).xpath(LIST_ROW_XPATH))
+    total_count = sum(len(etree.HTML(html_content).xpath(LIST_ROW_XPATH)) for html_content in list_pages)
+    case_index = 0
+    for page, html_content in enumerate(list_pages, 1):
+        rewritten, row_count = _rewrite_list_page(html_content, page, len(list_pages), page_size,
+                                                  case_index, total_count)
+        _write_fixture(list_fixture_path(fixture_dir, page), rewritten)
+        case_index += row_count
+    for index, html_content in enumerate(detail_pages):
+        _write_fixture(detail_fixture_path(fixture_dir, index), html_content)
+
+    _write_manifest(fixture_dir, {
+        'source': 'recorded',
+        'recorded_from': target_url,
+        'page_size': page_size,
+        'list_pages': len(list_pages),
+        'detail_pages': len(detail_pages),
+        'total_rows': total_count,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    logger.info(f"已錄製 {len(list_pages)} 個列表頁與 {len(detail_pages)} 個詳情頁至 {fixture_dir}")
+    return True
+
+# ---------------------------------------------------------------------------
+# 本機伺服器
+# ---------------------------------------------------------------------------
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 標頭與內容分兩次寫出，開啟 Nagle 演算法時每個回應都會等待 delayed ACK (約 40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = dict(parse_qsl(parsed.query))
+        body = self.server.resolve(parsed.path, params)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    在背景執行緒提供測試資料的本機 HTTP 伺服器，頁面預先載入記憶體以免磁碟讀取影響量測
+    latency: 每個回應前固定等待的秒數，模擬網路延遲讓並行設定的差異得以呈現
+    """
+    daemon_threads = True
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR, latency=0.05, port=0):
+        super().__init__(('127.0.0.1', port), FixtureRequestHandler)
+        self.latency = latency
+        self.manifest = load_manifest(fixture_dir)
+        self.list_pages = [self._read(list_fixture_path(fixture_dir, page))
+                           for page in range(1, self.manifest['list_pages'] + 1)]
+        self.detail_pages = [self._read(detail_fixture_path(fixture_dir, index))
+                             for index in range(self.manifest['detail_pages'])]
+        self._thread = None
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def list_url(self, page=1):
+        return self.base_url + list_page_url(page, self.manifest['page_size'])
+
+    def detail_urls(self):
+        return [self.base_url + detail_page_url(index) for index in range(len(self.detail_pages))]
+
+    def resolve(self, path, params):
+        """將請求路徑對應到測試資料，詳情頁數少於案件數時依序循環使用"""
+        try:
+            if path == LIST_PATH:
+                page = int(params.get('pageIndex', 1))
+                return self.list_pages[page - 1] if 1 <= page <= len(self.list_pages) else None
+            if path == DETAIL_PATH:
+                return self.detail_pages[int(params.get('pkPmsMain', 0)) % len(self.detail_pages)]
+        except ValueError:
+            pass
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        logger.info(f"測試資料伺服器已啟動: {self.base_url}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+# ---------------------------------------------------------------------------
+# 量測項目
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def _working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def time_case(name, func, repeat=5, warmup=1):
+    """執行 warmup 次暖身後量測 repeat 次，func 回傳本次處理的筆數"""
+    for _ in range(warmup):
+        func()
+    durations, counts = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts.append(func())
+        durations.append(time.perf_counter() - start)
+
+    median = statistics.median(durations)
+    result = {
+        'name': name,
+        'repeat': repeat,
+        'items': counts[-1],
+        'min': min(durations),
+        'median': median,
+        'mean': statistics.mean(durations),
+        'stdev': statistics.stdev(durations) if len(durations) > 1 else 0.0,
+        'items_per_second': counts[-1] / median if median else 0.0,
+    }
+    logger.info(f"{name}: 中位數 {median * 1000:.1f} ms，{result['items_per_second']:.1f} 筆/秒")
+    return result
+
+def _offline_cases(server):
+    """不經過網路的純解析量測：列表頁 extract_data 與詳情頁表格解析"""
+    crawler = ProcurementCrawler(None)
+    list_pages = [(body.decode('utf-8'), server.list_url(page)) for page, body in enumerate(server.list_pages, 1)]
+    detail_pages = [body.decode('utf-8') for body in server.detail_pages]
+
+    def extract_lxml():
+        count = 0
+        for snapshot in list_pages:
+            crawler.page_snapshot = snapshot
+            count += len(crawler.extract_data())
+        return count
+
+    def parse_tables():
+        return sum(len(crawler.parse_detail_tables(html_content)) for html_content in detail_pages)
+
+    return [('extract_data[lxml]', extract_lxml), ('parse_detail_tables[lxml]', parse_tables)]
+
+def _http_cases(server, concurrency_levels):
+    """以 HttpFetcher 經由本機伺服器抓取：列表頁、詳情頁與依總筆數直接分頁/跟隨下一頁連結"""
+    from main import crawl_list_pages  # 沿用 main 的分頁流程
+
+    page_size = server.manifest['page_size']
+    detail_urls = server.detail_urls()
+    list_urls = [server.list_url(page) for page in range(1, len(server.list_pages) + 1)]
+
+    def http_crawler(max_concurrency=1):
+        return ProcurementCrawler(None, fetcher=HttpFetcher(max_concurrency=max_concurrency))
+
+    def extract_http():
+        crawler = http_crawler()
+        count = sum(len(crawler.extract_data()) for url in list_urls if crawler.load_page(url))
+        crawler.fetcher.close()
+        return count
+
+    def detail_http():
+        crawler = http_crawler()
+        count = sum(1 for url in detail_urls if crawler.parse_detail_page(url))
+        crawler.fetcher.close()
+        return count
+
+    def pagination(direct, max_concurrency):
+        def run():
+            crawler = http_crawler(max_concurrency)
+            with tempfile.TemporaryDirectory() as folder:
+                checkpoint = CrawlCheckpoint(folder, server.list_url())
+                checkpoint.start(resume=False)
+                crawler.load_page(server.list_url())
+                items = crawl_list_pages(crawler, checkpoint, page_size=page_size if direct else None)
+                checkpoint.close()
+            crawler.fetcher.close()
+            return len(items)
+        return run
+
+    cases = [('extract_data[http]', extract_http), ('parse_detail_page[http]', detail_http),
+             ('pagination[next_link,http]', pagination(False, 1))]
+    cases.extend((f'pagination[direct,http,concurrency={level}]', pagination(True, level))
+                 for level in concurrency_levels)
+    return cases
+
+def _browser_cases(server, engines, profiles, worker_levels):
+    """需要 Chrome 的量測：瀏覽器開啟頁面後以各引擎解析，以及 run_crawl 的完整流程"""
+    from main import get_driver, run_crawl
+
+    list_urls = [server.list_url(page) for page in range(1, len(server.list_pages) + 1)]
+    detail_urls = server.detail_urls()
+    cases, drivers = [], []
+
+    for profile in profiles:
+        driver = get_driver(headless=True, profile=profile)
+        driver.set_page_load_timeout(30)
+        drivers.append(driver)
+        crawler = ProcurementCrawler(driver)
+
+        for engine in engines:
+            def extract(crawler=crawler, engine=engine):
+                return sum(len(crawler.extract_data(engine)) for url in list_urls if crawler.load_page(url))
+
+            def detail(crawler=crawler, engine=engine):
+                return sum(1 for url in detail_urls if crawler.parse_detail_page(url, engine=engine))
+
+            cases.append((f'extract_data[browser,{profile},{engine}]', extract))
+            cases.append((f'parse_detail_page[browser,{profile},{engine}]', detail))
+
+    work_dir = tempfile.mkdtemp(prefix='benchmark_')
+    for fetch_mode in ('selenium', 'http'):
+        for workers in worker_levels:
+            config = {
+                'base_url': server.base_url + LIST_PATH,
+                'query_params': dict(list_query_params(server.manifest['page_size'], 1)),
+                'data_folder': os.path.join(work_dir, f'{fetch_mode}_{workers}'),
+                'fetch_mode': fetch_mode,
+                'detail_workers': workers,
+                'resume': False,
+                'rate_control': {'min_delay': 0, 'initial_delay': 0, 'jitter': 0},
+                'http': {'verify_ssl': False},
+            }
+
+            def full_flow(config=config):
+                with _working_directory(work_dir):
+                    run_crawl(config)
+                return server.manifest['total_rows']
+
+            cases.append((f'run_crawl[{fetch_mode},workers={workers}]', full_flow))
+    return cases, drivers
+
+def run_benchmarks(fixture_dir=DEFAULT_FIXTURE_DIR, repeat=5, latency=0.05, concurrency_levels=(1, 4, 8),
+                   browser=False, engines=('lxml', 'selenium'), profiles=('default', 'lean'), worker_levels=(1, 2)):
+    """依序執行所有量測項目並回傳可序列化的結果"""
+    results = []
+    drivers = []
+    with FixtureServer(fixture_dir, latency=latency) as server:
+        try:
+            cases = _offline_cases(server) + _http_cases(server, concurrency_levels)
+            if browser:
+                browser_cases, drivers = _browser_cases(server, engines, profiles, worker_levels)
+                cases += browser_cases
+            for name, func in cases:
+                try:
+                    results.append(time_case(name, func, repeat=repeat))
+                except Exception as e:
+                    logger.error(f"量測 {name} 時發生錯誤: {e}")
+        finally:
+            for driver in drivers:
+                driver.quit()
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fixtures': dict(load_manifest(fixture_dir), fingerprint=fixture_fingerprint(fixture_dir)),
+        'latency': latency,
+        'results': results,
+    }
+
+def compare_results(current, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """以中位數比較兩次結果，回傳變慢超過 threshold 的項目名稱"""
+    if current['fixtures'].get('fingerprint') != baseline['fixtures'].get('fingerprint') \
+            or current.get('latency') != baseline.get('latency'):
+        logger.warning("兩次量測使用的測試資料或延遲設定不同，結果僅供參考")
+
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    print(f"{'項目':<48}{'基準 (ms)':>12}{'本次 (ms)':>12}{'變化':>10}")
+    for result in current['results']:
+        old = previous.get(result['name'])
+        if not old:
+            print(f"{result['name']:<48}{'-':>12}{result['median'] * 1000:>12.1f}{'新增':>10}")
+            continue
+        change = result['median'] / old['median'] - 1 if old['median'] else 0.0
+        flag = ' !' if change > threshold else ''
+        print(f"{result['name']:<48}{old['median'] * 1000:>12.1f}{result['median'] * 1000:>12.1f}"
+              f"{change:>+9.1%}{flag}")
+        if change > threshold:
+            regressions.append(result['name'])
+    return regressions
+
+def _parse_levels(text):
+    return tuple(int(level) for level in text.split(',') if level)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='政府電子採購網爬蟲離線效能基準測試')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURE_DIR, help='測試資料資料夾')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help='產生合成測試資料')
+    generate_parser.add_argument('--pages', type=int, default=5)
+    generate_parser.add_argument('--rows', type=int, default=100)
+    generate_parser.add_argument('--seed', type=int, default=20250318)
+
+    record_parser = subparsers.add_parser('record', help='依設定檔錄製實際頁面')
+    record_parser.add_argument('--config', default='config.json')
+    record_parser.add_argument('--pages', type=int, default=3)
+    record_parser.add_argument('--details', type=int, default=20)
+    record_parser.add_argument('--browser', action='store_true', help='以瀏覽器開啟頁面')
+
+    run_parser = subparsers.add_parser('run', help='執行量測')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--latency', type=float, default=0.05, help='伺服器每個回應的固定延遲 (秒)')
+    run_parser.add_argument('--concurrency', type=_parse_levels, default=(1, 4, 8), help='HTTP 並行數，例如 1,4,8')
+    run_parser.add_argument('--browser', action='store_true', help='一併量測需要 Chrome 的項目')
+    run_parser.add_argument('--workers', type=_parse_levels, default=(1, 2), help='run_crawl 的 detail_workers')
+    run_parser.add_argument('--output', help='結果輸出的 JSON 檔')
+    run_parser.add_argument('--baseline', help='與先前的結果比較')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # 量測期間只保留本模組的訊息
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    if args.command == 'generate':
+        generate_fixtures(args.fixtures, args.pages, args.rows, args.seed)
+        return 0
+
+    if args.command == 'record':
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return 0 if record_fixtures(config, args.fixtures, args.pages, args.details, args.browser) else 1
+
+    if not os.path.exists(os.path.join(args.fixtures, MANIFEST_FILE)):
+        logger.info(f"{args.fixtures} 沒有測試資料，先產生合成測試資料")
+        generate_fixtures(args.fixtures)
+
+    report = run_benchmarks(args.fixtures, repeat=args.repeat, latency=args.latency,
+                            concurrency_levels=args.concurrency, browser=args.browser, worker_levels=args.workers)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"量測結果已保存至 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            logger.warning(f"{len(regressions)} 個項目變慢超過 {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+import requests
+from history_manager import record_fingerprint, field_text
+from tender_record import as_dict
+
+logger = logging.getLogger(__name__)
+
+# 變動時需要通知的欄位
+WATCHED_FIELDS = ('tender_deadline', 'budget')
+
+def query_key(target_url):
+    """以查詢網址的雜湊值區分不同查詢條件的案件集合"""
+    return hashlib.sha1(target_url.encode('utf-8')).hexdigest()[:16]
+
+class ChangeSet:
+    """一次執行偵測到的新案件、截止日或預算變動的案件，以及已從查詢結果撤下的案件"""
+
+    def __init__(self, target_url):
+        self.target_url = target_url
+        self.detected_at = datetime.now().isoformat(timespec='seconds')
+        self.new = []
+        self.changed = []
+        self.withdrawn = []
+
+    def __bool__(self):
+        return bool(self.new or self.changed or self.withdrawn)
+
+    def to_dict(self):
+        def summary(item):
+            data = dict(as_dict(item))
+            data.pop('detail_data', None)
+            return data
+
+        return {
+            'query': self.target_url,
+            'detected_at': self.detected_at,
+            'new': [summary(item) for item in self.new],
+            'changed': [{'record': summary(item), 'changes': changes} for item, changes in self.changed],
+            'withdrawn': self.withdrawn,
+        }
+
+class ChangeDetector:
+    """
+    依歷史索引 (以 tender_case_no 為鍵) 與案件指紋判斷本次資料的變動
+    每筆資料只做一次索引查詢；撤下的案件以本查詢上次的案件集合比對，不需讀取先前的輸出檔
+    """
+
+    def __init__(self, history, target_url):
+        self.history = history
+        self.target_url = target_url
+        self.query_key = query_key(target_url)
+
+    def classify(self, item):
+        """回傳 ('new' | 'changed' | None, {欄位: [舊值, 新值]})"""
+        entry = self.history.entries.get(item.get('tender_case_no'))
+        if entry is None:
+            return 'new', {}
+        if entry.get('fingerprint') == record_fingerprint(item):
+            return None, {}
+        previous = entry.get('summary', {})
+        changes = {}
+        for field in WATCHED_FIELDS:
+            current = field_text(item, field)
+            if field in previous and previous[field] != current:
+                changes[field] = [previous[field], current]
+        return ('changed', changes) if changes else (None, {})
+
+    def detect(self, items, complete=True):
+        """
+        比對本次的資料；complete 為 True 代表已取得此查詢的全部案件，才判斷撤下的案件並更新案件集合
+        增量模式提前停止爬取列表時應傳入 False
+        """
+        change_set = ChangeSet(self.target_url)
+        current_cases = set()
+        for item in items:
+            case_no = item.get('tender_case_no')
+            if not case_no:
+                continue
+            current_cases.add(case_no)
+            status, changes = self.classify(item)
+            if status == 'new':
+                change_set.new.append(item)
+            elif status == 'changed':
+                change_set.changed.append((item, changes))
+
+        if complete:
+            previous_cases = self.history.previous_cases(self.query_key)
+            for case_no in sorted((previous_cases or set()) - current_cases):
+                entry = self.history.entries.get(case_no, {})
+                change_set.withdrawn.append(dict(entry.get('summary', {}), tender_case_no=case_no,
+                                                 last_seen=entry.get('last_seen')))
+            self.history.set_query_cases(self.query_key, current_cases)
+
+        logger.info(f"變動偵測：新案件 {len(change_set.new)} 筆、變動 {len(change_set.changed)} 筆、"
+                    f"撤下 {len(change_set.withdrawn)} 筆")
+        return change_set
+
+class Notifier:
+    """通知介面，send 收到 ChangeSet.to_dict() 的內容"""
+
+    def send(self, payload):
+        raise NotImplementedError
+
+class LogNotifier(Notifier):
+    """將變動摘要寫入日誌"""
+
+    def send(self, payload):
+        for item in payload['new']:
+            logger.info(f"[新案件] {item.get('org_name')} {item.get('tender_name')} "
+                        f"預算 {item.get('budget')} 截止 {item.get('tender_deadline')}")
+        for change in payload['changed']:
+            details = '、'.join(f"{field} {old} → {new}" for field, (old, new) in change['changes'].items())
+            logger.info(f"[變動] {change['record'].get('tender_name')}：{details}")
+        for item in payload['withdrawn']:
+            logger.info(f"[撤下] {item.get('tender_case_no')} {item.get('tender_name', '')}")
+        return True
+
+class FileNotifier(Notifier):
+    """每次變動以一行 JSON 追加寫入檔案，供其他程式讀取"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, payload):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(payload, ensure_ascii=False) + '\n')
+        logger.info(f"變動通知已寫入 {self.path}")
+        return True
+
+class WebhookNotifier(Notifier):
+    """以 HTTP POST 將變動送到 webhook (例如本機的通知服務)"""
+
+    def __init__(self, url, timeout=10, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+
+    def send(self, payload):
+        try:
+            response = requests.post(self.url, json=payload, timeout=self.timeout, headers=self.headers)
+            response.raise_for_status()
+            logger.info(f"變動通知已送出至 {self.url}")
+            return True
+        except requests.RequestException as e:
+            logger.error(f"送出變動通知失敗 ({self.url}): {e}")
+            return False
+
+# 通知類型名稱與建立方式，可以 register_notifier 加入其他通知方式
+NOTIFIER_TYPES = {
+    'log': lambda options, data_folder: LogNotifier(),
+    'file': lambda options, data_folder: FileNotifier(
+        options.get('path') or os.path.join(data_folder, 'notifications.jsonl')),
+    'webhook': lambda options, data_folder: WebhookNotifier(
+        options['url'], timeout=options.get('timeout', 10), headers=options.get('headers')),
+}
+
+def register_notifier(name, factory):
+    """factory(options, data_folder) 回傳具有 send(payload) 方法的物件"""
+    NOTIFIER_TYPES[name] = factory
+
+def create_notifiers(config):
+    """依 notifiers 設定建立通知清單，未設定時寫入日誌與 data_folder/notifications.jsonl"""
+    data_folder = config.get('data_folder', '.')
+    targets = config.get('notifiers') or [{'type': 'log'}, {'type': 'file'}]
+    notifiers = []
+    for options in targets:
+        factory = NOTIFIER_TYPES.get(options.get('type'))
+        if factory is None:
+            logger.error(f"不支援的通知類型: {options.get('type')}")
+            continue
+        notifiers.append(factory(options, data_folder))
+    return notifiers
+
+def notify_changes(change_set, notifiers, output_path=None):
+    """將變動送給所有通知方式，沒有變動時不送出"""
+    if not change_set:
+        logger.info("沒有新案件或變動，不送出通知")
+        return False
+    payload = change_set.to_dict()
+    payload['output'] = output_path
+    for notifier in notifiers:
+        try:
+            notifier.send(payload)
+        except Exception as e:
+            logger.error(f"通知 {type(notifier).__name__} 失敗: {e}")
+    return True
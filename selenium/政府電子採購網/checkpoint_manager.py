@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import logging
+import re
+import threading
+from record_sink import create_sink
+from tender_record import as_dict
+from crawl_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = 'crawl_journal.jsonl'
+CHECKPOINT_FILENAME = 'crawl_checkpoint.json'
+
+# 日誌每行以固定的鍵順序寫出，可直接以前綴判斷紀錄類型
+DETAIL_PREFIX = b'{"type": "detail"'
+INDEX_PATTERN = re.compile(rb'"index": (\d+)')
+
+def read_journal(journal_path):
+    """逐行讀取日誌，略過當機時寫到一半的最後一行"""
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"略過日誌第 {line_no} 行不完整的紀錄")
+
+def truncate_partial_line(journal_path):
+    """截去檔尾未寫完的紀錄，讓續寫的資料從新的一行開始"""
+    with open(journal_path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+def replay_journal(journal_path):
+    """由日誌重建列表資料 (不含詳情頁內容)，並回傳已完成詳情頁的索引"""
+    items = []
+    completed_details = set()
+    for entry in read_journal(journal_path):
+        if entry.get('type') == 'item':
+            items.append(entry['data'])
+        elif entry.get('type') == 'detail':
+            completed_details.add(entry['index'])
+    return items, completed_details
+
+def index_detail_offsets(journal_path):
+    """掃描日誌，記錄每筆詳情頁紀錄在檔案中的位置，不解析詳情內容"""
+    offsets = {}
+    offset = 0
+    with open(journal_path, 'rb') as f:
+        for line in f:
+            if line.startswith(DETAIL_PREFIX) and line.endswith(b'\n'):
+                match = INDEX_PATTERN.search(line, 0, 64)
+                if match:
+                    offsets[int(match.group(1))] = offset
+            offset += len(line)
+    return offsets
+
+def compact_journal(journal_path, sink):
+    """將日誌依列表順序逐筆併入詳情頁並寫入 sink，記憶體用量不隨資料量成長"""
+    detail_offsets = index_detail_offsets(journal_path)
+    item_index = 0
+    with open(journal_path, 'rb') as detail_file:
+        for entry in read_journal(journal_path):
+            if entry.get('type') != 'item':
+                continue
+            record = entry['data']
+            offset = detail_offsets.get(item_index)
+            if offset is not None:
+                detail_file.seek(offset)
+                record['detail_data'] = json.loads(detail_file.readline())['data']
+            sink.write(record)
+            item_index += 1
+
+    if not item_index:
+        logger.error(f"日誌 {journal_path} 中沒有資料可供輸出")
+        return False
+    logger.info(f"已將日誌壓實為 {sink.path} ({item_index} 筆)")
+    return True
+
+class CrawlCheckpoint:
+    """只追加寫入的爬取日誌，搭配記錄進度的檢查點檔案以支援中斷續爬"""
+
+    def __init__(self, folder, target_url):
+        self.folder = folder
+        self.target_url = target_url
+        self.journal_path = os.path.join(folder, JOURNAL_FILENAME)
+        self.state_path = os.path.join(folder, CHECKPOINT_FILENAME)
+        self.state = self._new_state()
+        self.item_count = 0
+        self.completed_details = set()
+        self._lock = threading.Lock()
+        self._journal = None
+
+    def _new_state(self):
+        return {
+            'target_url': self.target_url,
+            'last_page': 0,
+            'next_page_url': None,
+            'list_done': False,
+            'last_detail_index': -1,
+        }
+
+    def start(self, resume=True):
+        """開啟日誌；可續爬時回傳 (True, 已爬取的資料)，否則清空舊日誌重新開始"""
+        os.makedirs(self.folder, exist_ok=True)
+        items = []
+        resumed = False
+
+        if resume and os.path.exists(self.state_path) and os.path.exists(self.journal_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('target_url') == self.target_url:
+                    truncate_partial_line(self.journal_path)
+                    items, self.completed_details = replay_journal(self.journal_path)
+                    self.state = state
+                    self.item_count = len(items)
+                    resumed = True
+                    logger.info(f"從檢查點續爬：已完成 {state['last_page']} 頁列表、"
+                                f"{len(self.completed_details)} 筆詳情頁")
+                else:
+                    logger.info("檢查點的目標 URL 與本次不同，重新開始爬取")
+            except (OSError, json.JSONDecodeError, KeyError) as e:
+                logger.error(f"讀取檢查點失敗，重新開始爬取: {e}")
+
+        self._journal = open(self.journal_path, 'a' if resumed else 'w', encoding='utf-8')
+        if not resumed:
+            self.state = self._new_state()
+            self.completed_details = set()
+            self.item_count = 0
+            self._write_state()
+        return resumed, items
+
+    def _append(self, entry):
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def _sync(self):
+        """日誌寫入磁碟後才更新檢查點，當機時最多遺失最後一行未寫完的紀錄"""
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _write_state(self):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def record_page(self, page_number, items, next_page_url):
+        """寫入一頁列表資料並記錄下一頁的網址"""
+        with self._lock:
+            for item in items:
+                self._append({'type': 'item', 'page': page_number, 'data': as_dict(item)})
+            self._sync()
+            self.item_count += len(items)
+            self.state['last_page'] = page_number
+            self.state['next_page_url'] = next_page_url
+            self.state['list_done'] = not next_page_url
+            self._write_state()
+
+    def mark_list_done(self):
+        with self._lock:
+            self.state['list_done'] = True
+            self.state['next_page_url'] = None
+            self._write_state()
+
+    def record_detail(self, index, detail_data):
+        """寫入一筆詳情頁結果，index 為該案件在日誌中的順序"""
+        with self._lock:
+            self._append({'type': 'detail', 'index': index, 'data': detail_data})
+            self._sync()
+            self.completed_details.add(index)
+            last = self.state['last_detail_index']
+            while last + 1 in self.completed_details:
+                last += 1
+            self.state['last_detail_index'] = last
+            self._write_state()
+
+    def is_detail_done(self, index):
+        return index in self.completed_details
+
+    def close(self):
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+
+    def finish(self, sink):
+        """壓實日誌寫入 sink 並刪除日誌與檢查點"""
+        self.close()
+        with metrics.timer('save_data'), sink:
+            success = compact_journal(self.journal_path, sink)
+        # 沒有任何資料時同樣清除檢查點，避免下次執行誤判為續爬
+        if success or self.item_count == 0:
+            os.remove(self.journal_path)
+            os.remove(self.state_path)
+        return success
+
+if __name__ == "__main__":
+    # 手動壓實中斷執行留下的日誌：python checkpoint_manager.py <journal> <output> [json|jsonl|parquet]
+    if len(sys.argv) not in (3, 4):
+        print("用法: python checkpoint_manager.py <journal.jsonl> <output> [json|jsonl|parquet]")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    output_format = sys.argv[3] if len(sys.argv) == 4 else 'json'
+    with create_sink(output_format, sys.argv[2]) as output_sink:
+        success = compact_journal(sys.argv[1], output_sink)
+    sys.exit(0 if success else 1)
@@ -1,8 +1,17 @@
 import os
+import time
 import pickle
 import logging
+import threading
+from contextlib import contextmanager
 from urllib.parse import urlparse
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 logger = logging.getLogger(__name__)
 
 def get_cookie_filename(url):
@@ -16,35 +25,170 @@ def get_cookie_filename(url):
 
     return os.path.join(cookie_dir, f"{domain}_cookies.pkl")
 
+@contextmanager
+def _file_lock(filename, exclusive=True):
+    """以旁邊的 .lock 檔跨行程鎖定 cookie 檔，讀取用共享鎖、寫入用獨占鎖"""
+    folder = os.path.dirname(filename)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(f"{filename}.lock", 'a+b') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _cookie_key(cookie):
+    return cookie.get('domain', ''), cookie.get('path', '/'), cookie['name']
+
+def _is_expired(cookie, now):
+    expiry = cookie.get('expiry')
+    return expiry is not None and expiry <= now
+
+class CookieStore:
+    """
+    以 (domain, path, name) 為鍵的 Cookie 儲存，同名 Cookie 只保留最新一筆並剔除已過期的項目
+    記憶體中保留一份副本；檔案讀寫以檔案鎖保護，寫入時重新讀取檔案，只以本行程變更過的 Cookie 覆蓋，
+    避免載入後未曾變動的舊值蓋掉其他 worker 較新的值，再以 os.replace 覆寫
+    檔案格式維持 Cookie 字典的 pickle 清單，與舊版相容
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.cookies = {}
+        self._dirty = set()  # 本行程從瀏覽器取得且與已知值不同的 Cookie 鍵
+        self._lock = threading.Lock()
+
+    def _read_file(self):
+        if not os.path.exists(self.filename):
+            return []
+        with open(self.filename, 'rb') as f:
+            return pickle.load(f)
+
+    def _merge(self, cookies):
+        now = time.time()
+        for cookie in cookies:
+            self.cookies[_cookie_key(cookie)] = cookie
+        for key in [key for key, cookie in self.cookies.items() if _is_expired(cookie, now)]:
+            del self.cookies[key]
+            self._dirty.discard(key)
+
+    def _local_changes(self):
+        return [self.cookies[key] for key in self._dirty if key in self.cookies]
+
+    def load(self):
+        """從檔案重新載入 (尚未保存的本行程變更仍優先)，回傳有效 Cookie 數量"""
+        with self._lock, _file_lock(self.filename, exclusive=False):
+            changes = self._local_changes()
+            self._merge(self._read_file())
+            self._merge(changes)
+            return len(self.cookies)
+
+    def update(self, cookies):
+        """合併新的 Cookie 至記憶體，只有值與已知不同的 Cookie 會標記為本行程的變更"""
+        with self._lock:
+            changed = [cookie for cookie in cookies if self.cookies.get(_cookie_key(cookie)) != cookie]
+            self._dirty.update(_cookie_key(cookie) for cookie in changed)
+            self._merge(changed)
+
+    def save(self):
+        """重新讀取檔案，只以本行程變更過的 Cookie 覆蓋後寫回"""
+        with self._lock, _file_lock(self.filename):
+            changes = self._local_changes()
+            self.cookies = {}
+            self._merge(self._read_file())
+            self._merge(changes)
+            tmp_path = f"{self.filename}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(list(self.cookies.values()), f)
+            os.replace(tmp_path, self.filename)
+            self._dirty.clear()
+            return len(self.cookies)
+
+    def values(self):
+        with self._lock:
+            now = time.time()
+            return [cookie for cookie in self.cookies.values() if not _is_expired(cookie, now)]
+
+    def inject(self, driver, url):
+        """
+        透過 DevTools 的 Network.setCookies 在開啟任何頁面前寫入 Cookie，不需先造訪目標網域
+        DevTools 不可用時回傳 False，由呼叫端在頁面開啟後改用 add_cookie
+        """
+        cdp_cookies = []
+        for cookie in self.values():
+            cdp_cookie = {
+                'name': cookie['name'],
+                'value': cookie['value'],
+                'path': cookie.get('path', '/'),
+                'secure': cookie.get('secure', False),
+                'httpOnly': cookie.get('httpOnly', False),
+            }
+            if cookie.get('domain'):
+                cdp_cookie['domain'] = cookie['domain']
+            else:
+                cdp_cookie['url'] = url
+            if cookie.get('expiry') is not None:
+                cdp_cookie['expires'] = cookie['expiry']
+            if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+                cdp_cookie['sameSite'] = cookie['sameSite']
+            cdp_cookies.append(cdp_cookie)
+
+        try:
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cdp_cookies})
+            return True
+        except Exception as e:
+            logger.warning(f"無法透過 DevTools 寫入 Cookie: {e}")
+            return False
+
+    def add_to_driver(self, driver):
+        """以 WebDriver add_cookie 寫入，瀏覽器必須已在 Cookie 所屬網域的頁面上"""
+        for cookie in self.values():
+            try:
+                driver.add_cookie(cookie)
+            except Exception as cookie_error:
+                logger.warning(f"新增 Cookie 失敗: {cookie_error}")
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_cookie_store(filename):
+    """同一行程內相同檔案共用一個 CookieStore，讓多個 worker 共用記憶體中的副本"""
+    key = os.path.abspath(filename)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = CookieStore(filename)
+        return _stores[key]
+
 def save_cookies(driver, filename=None):
-    """儲存 Cookie 到檔案，如果未提供檔名則自動生成"""
+    """儲存瀏覽器目前的 Cookie，與檔案中既有的 Cookie 依 (domain, path, name) 合併"""
     try:
         if not filename:
             current_url = driver.current_url
             filename = get_cookie_filename(current_url)
 
-        cookies = driver.get_cookies()
-        
-        # 檢查檔案是否存在，如果存在則讀取現有 Cookie
-        if os.path.exists(filename):
-            with open(filename, "rb") as f:
-                existing_cookies = pickle.load(f)
-            # 合併現有 Cookie 和新的 Cookie，以避免覆蓋
-            # 注意：這裡簡單地將新的 Cookie 加入到現有的 Cookie 列表中 
-            # 您可能需要更複雜的邏輯來處理重複的 Cookie
-            cookies = existing_cookies + cookies  
-
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, "wb") as f:
-            pickle.dump(cookies, f)
-        logger.info(f"Cookie 已儲存至 {filename}")
+        store = get_cookie_store(filename)
+        store.update(driver.get_cookies())
+        count = store.save()
+        logger.info(f"Cookie 已儲存至 {filename} (共 {count} 筆)")
         return True, filename
     except Exception as e:
         logger.error(f"儲存 Cookie 失敗: {e}")
         return False, None
 
 def load_cookies(driver, url, filename=None):
-    """從檔案載入 Cookie"""
+    """
+    從檔案載入 Cookie 並在開啟頁面前透過 DevTools 寫入瀏覽器，不會額外造訪目標網址
+    DevTools 不可用時才先開啟目標網址再逐筆 add_cookie (舊版行為)
+    """
     try:
         if not filename:
             filename = get_cookie_filename(url)
@@ -53,20 +197,39 @@ def load_cookies(driver, url, filename=None):
             logger.warning(f"Cookie 檔案 {filename} 不存在，將在訪問後建立")
             return False, filename
 
-        # 先訪問目標域名，再設置 Cookie
-        driver.get(url)
-
-        with open(filename, "rb") as f:
-            cookies = pickle.load(f)
+        store = get_cookie_store(filename)
+        if not store.load():
+            logger.warning(f"Cookie 檔案 {filename} 中沒有有效的 Cookie")
+            return False, filename
 
-        for cookie in cookies:
-            try:
-                driver.add_cookie(cookie)
-            except Exception as cookie_error:
-                logger.warning(f"新增 Cookie 失敗: {cookie_error}")
+        if not store.inject(driver, url):
+            driver.get(url)
+            store.add_to_driver(driver)
 
         logger.info(f"Cookie 已從 {filename} 載入")
         return True, filename
     except Exception as e:
         logger.error(f"載入 Cookie 失敗: {e}")
         return False, filename
+
+def load_cookies_to_session(session, url, filename=None):
+    """將 Cookie 檔案載入 requests Session，供 HTTP 抓取模式沿用"""
+    try:
+        if not filename:
+            filename = get_cookie_filename(url)
+
+        if not os.path.exists(filename):
+            logger.warning(f"Cookie 檔案 {filename} 不存在，HTTP session 將不帶 Cookie")
+            return False
+
+        store = get_cookie_store(filename)
+        store.load()
+        for cookie in store.values():
+            session.cookies.set(cookie['name'], cookie['value'],
+                                domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+        logger.info(f"Cookie 已從 {filename} 載入至 HTTP session")
+        return True
+    except Exception as e:
+        logger.error(f"載入 Cookie 至 HTTP session 失敗: {e}")
+        return False
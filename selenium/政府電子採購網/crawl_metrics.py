@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'procurement_crawler'
+
+# 各階段耗時的直方圖區間 (秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_HELP = {
+    'phase_seconds': '各階段耗時 (秒)',
+    'pages_total': '已處理的頁面數',
+    'rows_total': '已擷取的列表資料筆數',
+    'retries_total': '重試次數',
+    'failures_total': '依例外類型統計的失敗次數',
+    'page_cache_total': '頁面快取查詢與寫入次數',
+}
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_key, extra=None):
+    pairs = list(label_key) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label_value(value)}"' for key, value in pairs) + '}'
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def merge(self, data):
+        """加總 to_dict 格式的直方圖 (例如其他行程的結果)"""
+        self.count += data['count']
+        self.sum += data['sum']
+        self.max = max(self.max, data['max'])
+        for i, bound in enumerate(self.buckets):
+            self.counts[i] += data['buckets'].get(str(bound), 0)
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0,
+            'max': round(self.max, 6),
+            'buckets': dict(zip((str(bound) for bound in self.buckets), self.counts)),
+        }
+
+class CrawlMetrics:
+    """收集爬蟲各階段耗時與計數，執行結束時輸出 JSON 摘要與 Prometheus textfile"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.counters = {}
+            self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, phase):
+        """量測區塊耗時並記錄到 phase_seconds{phase=...}"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('phase_seconds', time.perf_counter() - start, phase=phase)
+
+    def record_failure(self, error, phase):
+        self.inc('failures_total', phase=phase, type=type(error).__name__)
+
+    def merge(self, summary):
+        """將其他行程 summary() 的計數與直方圖加總到目前的指標，供分片爬取彙整"""
+        with self._lock:
+            for name, series in summary.get('counters', {}).items():
+                target = self.counters.setdefault(name, {})
+                for entry in series:
+                    key = _label_key(entry['labels'])
+                    target[key] = target.get(key, 0) + entry['value']
+            for name, series in summary.get('histograms', {}).items():
+                target = self.histograms.setdefault(name, {})
+                for entry in series:
+                    key = _label_key(entry['labels'])
+                    target.setdefault(key, Histogram()).merge(entry)
+
+    def _counter_total(self, name, **labels):
+        wanted = set(labels.items())
+        return sum(value for key, value in self.counters.get(name, {}).items() if wanted <= set(key))
+
+    def summary(self):
+        """回傳可序列化的執行摘要"""
+        with self._lock:
+            elapsed = max(time.time() - self.started_at, 1e-9)
+            pages = self._counter_total('pages_total')
+            rows = self._counter_total('rows_total')
+            return {
+                'started_at': self.started_at,
+                'elapsed_seconds': round(elapsed, 3),
+                'pages_per_second': round(pages / elapsed, 4),
+                'rows_per_second': round(rows / elapsed, 4),
+                'counters': {
+                    name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                    for name, series in self.counters.items()
+                },
+                'histograms': {
+                    name: [{'labels': dict(key), **histogram.to_dict()} for key, histogram in series.items()]
+                    for name, series in self.histograms.items()
+                },
+            }
+
+    def to_prometheus(self):
+        """輸出 Prometheus text exposition 格式"""
+        summary = self.summary()
+        lines = []
+        with self._lock:
+            for name, series in self.counters.items():
+                metric = f"{METRIC_PREFIX}_{name}"
+                lines.append(f"# HELP {metric} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value}")
+
+            for name, series in self.histograms.items():
+                metric = f"{METRIC_PREFIX}_{name}"
+                lines.append(f"# HELP {metric} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+                for key, histogram in series.items():
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{metric}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{metric}_bucket{_format_labels(key, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {histogram.count}")
+
+        for name in ('elapsed_seconds', 'pages_per_second', 'rows_per_second'):
+            metric = f"{METRIC_PREFIX}_last_run_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {summary[name]}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}_last_run_timestamp_seconds {time.time():.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self, json_path=None, prometheus_path=None):
+        """寫出 JSON 摘要與 Prometheus textfile (以暫存檔替換，避免 node exporter 讀到寫一半的檔案)"""
+        try:
+            if json_path:
+                _atomic_write(json_path, json.dumps(self.summary(), ensure_ascii=False, indent=2))
+                logger.info(f"執行指標已保存至 {json_path}")
+            if prometheus_path:
+                _atomic_write(prometheus_path, self.to_prometheus())
+                logger.info(f"Prometheus 指標已保存至 {prometheus_path}")
+            return True
+        except Exception as e:
+            logger.error(f"輸出執行指標時發生錯誤: {e}")
+            return False
+
+def _atomic_write(path, content):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+# 全程共用的指標收集器
+metrics = CrawlMetrics()
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import logging
+from collections import Counter
+from tender_record import (parse_roc_date, parse_roc_dates, parse_roc_datetimes, has_time, parse_budget,
+                           parse_budgets, records_to_columns, columns_to_arrow, _arrow_compute)
+
+logger = logging.getLogger(__name__)
+
+# 欄位型別與對應的整欄轉換函式
+COLUMN_TYPES = ('string', 'number', 'date', 'datetime', 'bool')
+
+TRUE_VALUES = {'是', 'Y', 'y', 'true', 'True'}
+FALSE_VALUES = {'否', 'N', 'n', 'false', 'False'}
+
+# 常見的詳情頁欄位，預先宣告穩定的欄位名稱與型別；其餘欄位由 learn_schema 依出現頻率決定
+DECLARED_COLUMNS = (
+    {'name': 'agency_code', 'caption': '機關資料', 'label': '機關代碼', 'type': 'string'},
+    {'name': 'agency_name', 'caption': '機關資料', 'label': '機關名稱', 'type': 'string'},
+    {'name': 'agency_unit', 'caption': '機關資料', 'label': '單位名稱', 'type': 'string'},
+    {'name': 'agency_address', 'caption': '機關資料', 'label': '機關地址', 'type': 'string'},
+    {'name': 'procurement_category', 'caption': '採購資料', 'label': '標的分類', 'type': 'string'},
+    {'name': 'amount_range', 'caption': '採購資料', 'label': '採購金額級距', 'type': 'string'},
+    {'name': 'budget_amount', 'caption': '採購資料', 'label': '預算金額', 'type': 'number'},
+    {'name': 'budget_public', 'caption': '採購資料', 'label': '預算金額是否公開', 'type': 'bool'},
+    {'name': 'tender_method', 'caption': '招標資料', 'label': '招標方式', 'type': 'string'},
+    {'name': 'award_method', 'caption': '招標資料', 'label': '決標方式', 'type': 'string'},
+    {'name': 'announce_date', 'caption': '招標資料', 'label': '公告日', 'type': 'date'},
+    {'name': 'has_reserve_price', 'caption': '招標資料', 'label': '是否訂有底價', 'type': 'bool'},
+    {'name': 'bid_deadline', 'caption': '領投開標', 'label': '截止投標', 'type': 'datetime'},
+    {'name': 'opening_time', 'caption': '領投開標', 'label': '開標時間', 'type': 'datetime'},
+    {'name': 'performance_location', 'caption': '其他', 'label': '履約地點', 'type': 'string'},
+)
+
+def _parse_bool(value):
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    return None
+
+def _parse_number(value):
+    return parse_budget(value.split('\n')[0]) if isinstance(value, str) else parse_budget(value)
+
+def _parse_numbers(values):
+    """數值欄位只取第一行 (第二行常為說明文字) 後整欄轉換"""
+    arrow = _arrow_compute()
+    if arrow is None or any(value is not None and not isinstance(value, str) for value in values):
+        return [_parse_number(value) for value in values]
+    pa, pc = arrow
+    first_lines = pc.replace_substring_regex(pa.array(values, pa.string()), r'\n[\s\S]*', '')
+    return parse_budgets(first_lines.to_pylist())
+
+def _parse_bools(values):
+    arrow = _arrow_compute()
+    if arrow is None or any(value is not None and not isinstance(value, str) for value in values):
+        return [_parse_bool(value) for value in values]
+    pa, pc = arrow
+    texts = pa.array(values, pa.string())
+    null = pa.scalar(None, pa.bool_())
+    is_true = pc.is_in(texts, value_set=pa.array(sorted(TRUE_VALUES)))
+    is_false = pc.is_in(texts, value_set=pa.array(sorted(FALSE_VALUES)))
+    return pc.if_else(is_true, True, pc.if_else(is_false, False, null)).to_pylist()
+
+def _parse_strings(values):
+    return [value or None for value in values]
+
+# 整欄轉換函式：輸入一個欄位的原始字串清單 (缺少的欄位為 None)，回傳相同長度的值清單
+CONVERTERS = {
+    'string': _parse_strings,
+    'number': _parse_numbers,
+    'date': parse_roc_dates,
+    'datetime': parse_roc_datetimes,
+    'bool': _parse_bools,
+}
+
+def infer_type(values):
+    """依樣本值推斷欄位型別：全部可解析為日期 (都帶時間者為 datetime)、是/否或數值時採用該型別，否則為字串"""
+    samples = [value for value in values if value]
+    if not samples:
+        return 'string'
+    if all(_parse_bool(value) is not None for value in samples):
+        return 'bool'
+    if all(parse_roc_date(value) is not None and len(value) <= 20 for value in samples):
+        return 'datetime' if all(has_time(value) for value in samples) else 'date'
+    if all(_parse_number(value) is not None for value in samples):
+        return 'number'
+    return 'string'
+
+class DetailSchema:
+    """
+    將 {表格名稱: {欄位: 值}} 的詳情頁資料攤平為固定欄位
+    每個欄位由 (caption, label) 對應到欄位名稱與型別；不在結構中的欄位放入 extra 對照表
+    """
+
+    def __init__(self, columns=DECLARED_COLUMNS):
+        self.columns = [dict(column) for column in columns]
+        self._index = {(column['caption'], column['label']): column for column in self.columns}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['columns'])
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'columns': self.columns}, f, ensure_ascii=False, indent=2)
+
+    @property
+    def names(self):
+        return [column['name'] for column in self.columns]
+
+    def flatten(self, details):
+        """
+        將多筆 detail_data 一次攤平為欄位：先依欄位收集原始字串，再整欄套用型別轉換
+        回傳 {欄位名稱: [值...], 'extra': [JSON 字串或 None...]}
+        """
+        raw = {column['name']: [] for column in self.columns}
+        extra = []
+        for detail in details:
+            values = {}
+            rare = {}
+            for caption, fields in (detail or {}).items():
+                for label, value in fields.items():
+                    column = self._index.get((caption, label))
+                    if column:
+                        values[column['name']] = value
+                    else:
+                        rare.setdefault(caption, {})[label] = value
+            for name, column_values in raw.items():
+                column_values.append(values.get(name))
+            extra.append(json.dumps(rare, ensure_ascii=False) if rare else None)
+
+        columns = {column['name']: CONVERTERS[column['type']](raw[column['name']]) for column in self.columns}
+        columns['extra'] = extra
+        return columns
+
+    def arrow_schema(self):
+        import pyarrow as pa
+        arrow_types = {'string': pa.string(), 'number': pa.float64(), 'date': pa.date32(),
+                       'datetime': pa.timestamp('s'), 'bool': pa.bool_()}
+        fields = [(column['name'], arrow_types[column['type']]) for column in self.columns]
+        return pa.schema(fields + [('extra', pa.string())])
+
+    def to_arrow(self, details):
+        """將多筆 detail_data 轉為具型別的 pyarrow Table (需要安裝 pyarrow)"""
+        import pyarrow as pa
+        return pa.Table.from_pydict(self.flatten(details), schema=self.arrow_schema())
+
+def learn_schema(details, min_frequency=0.3, declared=DECLARED_COLUMNS):
+    """
+    從多筆 detail_data 學習欄位結構：出現比例達 min_frequency 的 (caption, label) 成為欄位並推斷型別
+    宣告過的欄位沿用原本的名稱與型別，新欄位命名為「caption.label」
+    """
+    counts = Counter()
+    samples = {}
+    total = 0
+    for detail in details:
+        total += 1
+        for caption, fields in (detail or {}).items():
+            for label, value in fields.items():
+                counts[(caption, label)] += 1
+                field_samples = samples.setdefault((caption, label), [])
+                if len(field_samples) < 200:
+                    field_samples.append(value)
+
+    declared_keys = {(column['caption'], column['label']) for column in declared}
+    columns = [dict(column) for column in declared]
+    threshold = max(1, min_frequency * total)
+    for (caption, label), count in counts.most_common():
+        if count < threshold or (caption, label) in declared_keys:
+            continue
+        columns.append({'name': f"{caption}.{label}", 'caption': caption, 'label': label,
+                        'type': infer_type(samples[(caption, label)])})
+
+    column_keys = {(column['caption'], column['label']) for column in columns}
+    rare_count = sum(1 for key in counts if key not in column_keys)
+    logger.info(f"從 {total} 筆詳情頁學習到 {len(columns)} 個欄位 (另有 {rare_count} 個少見欄位放入 extra)")
+    return DetailSchema(columns)
+
+def read_output(path):
+    """讀取 JSON 陣列、JSON Lines 或 Parquet 輸出檔，回傳 dict 清單"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        items = pq.read_table(path).to_pylist()
+        for item in items:
+            if isinstance(item.get('detail_data'), str):
+                item['detail_data'] = json.loads(item['detail_data'])
+        return items
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def flatten_items(items, schema):
+    """將列表欄位與攤平後的詳情欄位合併為單一 pyarrow Table，詳情欄位加上 detail_ 前綴"""
+    table = columns_to_arrow(records_to_columns(items)).drop(['detail_data'])
+    detail_table = schema.to_arrow([item.get('detail_data') for item in items])
+    for name, column in zip(detail_table.column_names, detail_table.columns):
+        table = table.append_column(f"detail_{name}", column)
+    return table
+
+def flatten_output(path, schema_path=None, output_path=None, min_frequency=0.3):
+    """
+    將輸出檔攤平為 Parquet 欄式檔案；schema_path 存在時沿用該結構，否則學習後寫入 schema_path
+    回傳輸出的 Parquet 路徑
+    """
+    import pyarrow.parquet as pq
+    items = read_output(path)
+    if schema_path and os.path.exists(schema_path):
+        schema = DetailSchema.load(schema_path)
+    else:
+        schema = learn_schema((item.get('detail_data') for item in items), min_frequency)
+        if schema_path:
+            schema.save(schema_path)
+            logger.info(f"詳情頁欄位結構已保存至 {schema_path}")
+
+    output_path = output_path or os.path.splitext(path)[0] + '_flat.parquet'
+    pq.write_table(flatten_items(items, schema), output_path)
+    logger.info(f"已將 {len(items)} 筆資料攤平為 {output_path}")
+    return output_path
+
+def to_dataframe(path, schema_path=None):
+    """讀取輸出檔並回傳攤平後的 pandas DataFrame (需要安裝 pandas 與 pyarrow)"""
+    items = read_output(path)
+    schema = DetailSchema.load(schema_path) if schema_path else learn_schema(item.get('detail_data') for item in items)
+    return flatten_items(items, schema).to_pandas()
+
+if __name__ == "__main__":
+    # python detail_schema.py <輸出檔> [schema.json] [output.parquet]
+    if len(sys.argv) not in (2, 3, 4):
+        print("用法: python detail_schema.py <procurement_data.json|.jsonl|.parquet> [schema.json] [output.parquet]")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    flatten_output(sys.argv[1], *sys.argv[2:])
@@ -0,0 +1,112 @@
+import logging
+import threading
+from retry_scheduler import RetryQueue
+
+logger = logging.getLogger(__name__)
+
+class DetailWorkerPool:
+    """
+    以多個獨立 WebDriver 並行爬取詳情頁，結果依原順序寫回 all_items
+    請求間隔由各 crawler 共用的 RateController 控制，失敗的項目交由 RetryQueue 延後重試
+    """
+
+    def __init__(self, driver_factory, crawler_factory, num_workers=2,
+                 save_callback=None, save_every=10, result_callback=None,
+                 store_results=True):
+        """
+        driver_factory: 無參數函式，回傳一個新的 WebDriver
+        crawler_factory: 接收 driver 並回傳 ProcurementCrawler 的函式
+        save_callback: 每完成 save_every 筆時呼叫 save_callback(all_items, completed)
+        result_callback: 每取得一筆詳情頁時呼叫 result_callback(index, detail_data)
+        store_results: 為 False 時不把 detail_data 寫回 all_items，交由 result_callback 串流輸出
+        """
+        self.driver_factory = driver_factory
+        self.crawler_factory = crawler_factory
+        self.num_workers = num_workers
+        self.save_callback = save_callback
+        self.save_every = save_every
+        self.result_callback = result_callback
+        self.store_results = store_results
+        self._lock = threading.Lock()
+        self._completed = 0
+
+    def run(self, all_items, skip=None, retry_queue=None):
+        """
+        爬取所有具 detail_link 的項目，skip(index) 為真者略過，回傳成功取得詳情的筆數
+        retry_queue: 共用的 RetryQueue，未提供時每個項目最多嘗試 3 次 (不使用斷路器)
+        """
+        work_queue = retry_queue or RetryQueue(max_attempts=3, base_delay=3)
+        for index, item in enumerate(all_items):
+            if item.get('detail_link') and not (skip and skip(index)):
+                work_queue.put(index)
+
+        total = work_queue.pending()
+        logger.info(f"啟動 {self.num_workers} 個 WebDriver 處理 {total} 筆詳情頁")
+        self._completed = 0
+        succeeded = []
+
+        threads = [
+            threading.Thread(target=self._worker, args=(worker_id, work_queue, all_items, total, succeeded),
+                             name=f"detail-worker-{worker_id}", daemon=True)
+            for worker_id in range(1, self.num_workers + 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if work_queue.pending():
+            logger.error(f"所有 WebDriver 已停止，仍有 {work_queue.pending()} 筆詳情頁未處理")
+        return len(succeeded)
+
+    def _worker(self, worker_id, work_queue, all_items, total, succeeded):
+        try:
+            driver = self.driver_factory()
+        except Exception as e:
+            logger.error(f"Worker {worker_id} 無法啟動 WebDriver: {e}")
+            return
+
+        crawler = None
+        try:
+            crawler = self.crawler_factory(driver)
+            while True:
+                task = work_queue.get()
+                if task is None:
+                    break
+
+                index, attempt = task
+                item = all_items[index]
+                detail_link = item['detail_link']
+                detail_page_data, error = None, None
+                try:
+                    logger.info(f"[Worker {worker_id}] 正在處理第 {index + 1}/{len(all_items)} 條記錄的詳情頁"
+                                + (f" (第 {attempt} 次嘗試)" if attempt > 1 else ""))
+                    # 失敗時不在此重試，交由 RetryQueue 延後重排，其他項目可以繼續處理
+                    detail_page_data = crawler.parse_detail_page(detail_link)
+                    if detail_page_data:
+                        with self._lock:
+                            if self.store_results:
+                                item['detail_data'] = detail_page_data
+                            succeeded.append(index)
+                            if self.result_callback:
+                                self.result_callback(index, detail_page_data)
+                        logger.info(f"成功獲取詳情頁資料: {item.get('tender_name', 'Unknown')}")
+                except Exception as e:
+                    error = str(e)
+                    logger.error(f"處理詳情頁時發生錯誤 ({detail_link}): {e}")
+                finally:
+                    work_queue.done(task, bool(detail_page_data), error)
+                    if detail_page_data or attempt >= work_queue.max_attempts:
+                        self._mark_done(all_items, total)
+        finally:
+            if crawler is not None and getattr(crawler, 'session_policy', None):
+                crawler.session_policy.log_summary()
+            driver.quit()
+            logger.info(f"Worker {worker_id} 的 WebDriver 已關閉")
+
+    def _mark_done(self, all_items, total):
+        with self._lock:
+            self._completed += 1
+            if self.save_callback and self._completed % self.save_every == 0:
+                logger.info(f"詳情頁進度 {self._completed}/{total}")
+                self.save_callback(all_items, self._completed)
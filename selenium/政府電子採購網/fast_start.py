@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import random
+import shutil
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 無法取得 fake_useragent 資料時使用的 User-Agent
+FALLBACK_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36',
+]
+
+class UserAgentPool:
+    """
+    保存在本機的 User-Agent 清單，避免每次執行都建立 UserAgent() 載入或下載資料集
+    清單超過 max_age 秒才以 fake_useragent 重新產生
+    """
+
+    def __init__(self, path, max_age=7 * 86400, size=50):
+        self.path = path
+        self.max_age = max_age
+        self.size = size
+        self.agents = []
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if time.time() - data['created_at'] <= self.max_age and data['agents']:
+                self.agents = data['agents']
+                return True
+        except (OSError, ValueError, KeyError):
+            pass
+        return False
+
+    def refresh(self):
+        """以 fake_useragent 產生新的清單並寫入檔案，失敗時使用內建清單"""
+        try:
+            from fake_useragent import UserAgent
+            try:
+                # 只取桌面版 Chrome，與實際啟動的瀏覽器一致
+                ua = UserAgent(browsers=['Chrome'], platforms=['desktop'])
+            except TypeError:
+                ua = UserAgent()
+            agents = {ua.random for _ in range(self.size * 3)}
+            self.agents = sorted(agents)[:self.size]
+        except Exception as e:
+            logger.warning(f"無法取得 User-Agent 資料集，使用內建清單: {e}")
+            self.agents = list(FALLBACK_USER_AGENTS)
+            return False
+
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'agents': self.agents}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        logger.info(f"已更新 User-Agent 清單 ({len(self.agents)} 筆): {self.path}")
+        return True
+
+    def random(self):
+        if not self.agents and not self.load():
+            self.refresh()
+        return random.choice(self.agents)
+
+class FastStart:
+    """
+    縮短瀏覽器啟動時間：使用本機的 User-Agent 清單、重複使用已修補的 chromedriver，
+    並讓主要的瀏覽器使用固定的設定檔目錄 (保留快取，不需每次建立新設定檔)
+    """
+
+    DRIVER_NAME = 'chromedriver.exe' if os.name == 'nt' else 'chromedriver'
+
+    def __init__(self, folder, persistent_profile=True, user_agent_max_age=7 * 86400):
+        self.folder = folder
+        self.persistent_profile = persistent_profile
+        self.user_agents = UserAgentPool(os.path.join(folder, 'user_agents.json'), max_age=user_agent_max_age)
+        self.driver_path = os.path.join(folder, 'driver', self.DRIVER_NAME)
+        self.profile_dir = os.path.join(folder, 'profile')
+
+    @classmethod
+    def from_config(cls, config):
+        """依設定建立，fast_start.enabled 不為 true 時回傳 None"""
+        fast_config = config.get('fast_start', {})
+        if not fast_config.get('enabled', False):
+            return None
+        folder = fast_config.get('folder') or os.path.join(config.get('data_folder', '.'), 'fast_start')
+        return cls(folder,
+                   persistent_profile=fast_config.get('persistent_profile', True),
+                   user_agent_max_age=fast_config.get('user_agent_max_age_days', 7) * 86400)
+
+    def user_agent(self):
+        return self.user_agents.random()
+
+    def driver_options(self, main_driver=True):
+        """
+        回傳 get_driver 的額外參數；只有主要瀏覽器使用固定設定檔，
+        並行的 worker 共用同一個目錄會被 Chrome 鎖定
+        """
+        options = {'user_agent': self.user_agent()}
+        if os.path.exists(self.driver_path):
+            options['driver_executable_path'] = self.driver_path
+        if main_driver and self.persistent_profile:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            options['user_data_dir'] = self.profile_dir
+        return options
+
+    def remember_driver(self, driver):
+        """將 undetected_chromedriver 本次修補的 chromedriver 複製到快取目錄，下次啟動直接使用"""
+        if os.path.exists(self.driver_path):
+            return
+        patcher = getattr(driver, 'patcher', None)
+        source = getattr(patcher, 'executable_path', None)
+        if not source or not os.path.exists(source):
+            return
+        try:
+            os.makedirs(os.path.dirname(self.driver_path), exist_ok=True)
+            tmp_path = f"{self.driver_path}.{os.getpid()}.tmp"
+            shutil.copy2(source, tmp_path)
+            os.replace(tmp_path, self.driver_path)
+            logger.info(f"已保存修補後的 chromedriver: {self.driver_path}")
+        except OSError as e:
+            logger.warning(f"保存 chromedriver 失敗: {e}")
+
+    def invalidate_driver(self):
+        """Chrome 更新後快取的 chromedriver 版本不符時刪除，下次啟動重新下載並修補"""
+        try:
+            os.remove(self.driver_path)
+            logger.info("已刪除快取的 chromedriver")
+        except FileNotFoundError:
+            pass
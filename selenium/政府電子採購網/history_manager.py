@@ -0,0 +1,196 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from tender_record import TenderRecord
+from checkpoint_manager import truncate_partial_line
+
+logger = logging.getLogger(__name__)
+
+# 列表頁欄位中，任一變動即視為案件內容已更新
+FINGERPRINT_FIELDS = (
+    'tender_case_no',
+    'org_name',
+    'tender_name',
+    'tender_type',
+    'announce_date',
+    'tender_deadline',
+    'budget',
+)
+
+# 保存在索引中的欄位，供變動通知列出變動前後的值與已撤下案件的名稱
+SUMMARY_FIELDS = (
+    'tender_name',
+    'org_name',
+    'tender_deadline',
+    'budget',
+)
+
+HISTORY_VERSION = 2
+
+# 索引檔之後的變動以 JSON Lines 追加在 <history_file>.journal
+JOURNAL_SUFFIX = '.journal'
+# 日誌行數超過索引筆數 (至少此行數) 時才重寫整個索引檔並清空日誌
+COMPACT_MIN_LINES = 1000
+
+def field_text(item, field):
+    """取得欄位在網站上的原始字串；TenderRecord 以網站格式還原，與 dict 的值相同"""
+    if isinstance(item, TenderRecord):
+        return item.raw_value(field)
+    return str(item.get(field, ''))
+
+def record_fingerprint(item):
+    """以列表頁欄位計算案件指紋"""
+    payload = '\x1f'.join(field_text(item, field) for field in FINGERPRINT_FIELDS)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class CrawlHistory:
+    """
+    以 tender_case_no 為鍵的持久化案件索引，用於增量爬取與變動通知
+    queries 記錄每個查詢條件上次完整爬取到的案件編號，用來找出已撤下的案件
+    save 只將新增或變動的案件追加至日誌，寫入成本與變動筆數成正比；日誌累積到一定長度才重寫索引檔
+    """
+
+    NEW = 'new'
+    CHANGED = 'changed'
+    UNCHANGED = 'unchanged'
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.entries = {}
+        self.queries = {}
+        self._dirty_cases = set()
+        self._dirty_queries = set()
+        self._journal_lines = 0
+
+    def load(self):
+        """載入歷史索引並重播其後的日誌，兩者都不存在時從空索引開始"""
+        loaded = False
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == HISTORY_VERSION:
+                    self.entries = data['entries']
+                    self.queries = data.get('queries', {})
+                else:
+                    # 舊版格式整個檔案即為案件索引
+                    self.entries = data
+                loaded = True
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"讀取歷史檔案失敗，將重新建立索引: {e}")
+                self.entries = {}
+        self._replay_journal()
+        if not loaded and not self._journal_lines:
+            logger.info(f"歷史檔案 {self.path} 不存在，將建立新的索引")
+            return False
+        logger.info(f"已載入 {len(self.entries)} 筆歷史案件: {self.path} (日誌 {self._journal_lines} 筆變動)")
+        return True
+
+    def _replay_journal(self):
+        self._journal_lines = 0
+        if not os.path.exists(self.journal_path):
+            return
+        truncate_partial_line(self.journal_path)
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'case' in change:
+                    self.entries[change['case']] = change['entry']
+                elif 'query' in change:
+                    self.queries[change['query']] = change['cases']
+                self._journal_lines += 1
+
+    def save(self):
+        """將本次新增或變動的案件與查詢案件集合追加至日誌並 fsync；日誌過長時改為重寫整個索引"""
+        try:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            pending = len(self._dirty_cases) + len(self._dirty_queries)
+            if self._journal_lines + pending > max(COMPACT_MIN_LINES, len(self.entries)):
+                self.compact()
+                return True
+            if pending:
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    for case_no in sorted(self._dirty_cases):
+                        change = {'case': case_no, 'entry': self.entries[case_no]}
+                        f.write(json.dumps(change, ensure_ascii=False) + '\n')
+                    for key in sorted(self._dirty_queries):
+                        change = {'query': key, 'cases': self.queries[key]}
+                        f.write(json.dumps(change, ensure_ascii=False) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_lines += pending
+                self._dirty_cases.clear()
+                self._dirty_queries.clear()
+            logger.info(f"歷史索引已保存 (變動 {pending} 筆，共 {len(self.entries)} 筆): {self.journal_path}")
+            return True
+        except Exception as e:
+            logger.error(f"保存歷史索引時發生錯誤: {e}")
+            return False
+
+    def compact(self):
+        """以暫存檔加上 os.replace 重寫整個索引後清空日誌；中途中斷時重播日誌的結果相同"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': HISTORY_VERSION, 'entries': self.entries, 'queries': self.queries},
+                      f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_lines = 0
+        self._dirty_cases.clear()
+        self._dirty_queries.clear()
+        logger.info(f"歷史索引已重寫 ({len(self.entries)} 筆): {self.path}")
+
+    def classify(self, item):
+        """判斷案件為新案件、已變動或未變動 (未變動且已取得詳情頁)"""
+        entry = self.entries.get(item.get('tender_case_no'))
+        if entry is None:
+            return self.NEW
+        if entry.get('fingerprint') != record_fingerprint(item) or not entry.get('detail_fetched'):
+            return self.CHANGED
+        return self.UNCHANGED
+
+    def update(self, item, detail_fetched=None):
+        """
+        記錄案件目前的指紋；僅在詳情頁已取得或無詳情連結時標記為完成
+        detail_fetched: 詳情頁是否已取得，未提供時依 item 是否含 detail_data 判斷
+        """
+        case_no = item.get('tender_case_no')
+        if not case_no:
+            return
+        now = datetime.now().isoformat(timespec='seconds')
+        entry = self.entries.setdefault(case_no, {'first_seen': now})
+        if detail_fetched is None:
+            detail_fetched = bool(item.get('detail_data'))
+        values = {
+            'fingerprint': record_fingerprint(item),
+            'summary': {field: field_text(item, field) for field in SUMMARY_FIELDS},
+            'detail_fetched': detail_fetched or not item.get('detail_link'),
+        }
+        # 未變動的案件只在日期改變時記錄 last_seen，頻繁的增量執行不需重寫所有已知案件
+        if any(entry.get(key) != value for key, value in values.items()) \
+                or entry.get('last_seen', '')[:10] != now[:10]:
+            self._dirty_cases.add(case_no)
+        entry.update(values)
+        entry['last_seen'] = now
+
+    def previous_cases(self, query_key):
+        """回傳此查詢條件上次完整爬取到的案件編號，沒有紀錄時回傳 None"""
+        cases = self.queries.get(query_key)
+        return set(cases) if cases is not None else None
+
+    def set_query_cases(self, query_key, case_nos):
+        cases = sorted(set(case_nos))
+        if self.queries.get(query_key) != cases:
+            self.queries[query_key] = cases
+            self._dirty_queries.add(query_key)
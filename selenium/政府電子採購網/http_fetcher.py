@@ -0,0 +1,125 @@
+import time
+import logging
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from cookie_manager import load_cookies_to_session
+from crawl_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 反爬驗證頁或登入頁常見的特徵字串
+CHALLENGE_MARKERS = (
+    'captcha',
+    'recaptcha',
+    'cf-challenge',
+    '圖形驗證',
+    '請完成驗證',
+)
+
+def is_login_url(url):
+    """
+    判斷網址是否為登入頁：只檢查主機與路徑，
+    查詢參數 (例如列表網址的 isLogIn=N) 不代表被導向登入頁
+    """
+    parsed = urlsplit(url or '')
+    return 'login' in parsed.netloc.lower() or 'login' in parsed.path.lower()
+
+def is_challenge_page(html_content, url='', expected_marker=None):
+    """判斷回應是否為驗證頁或登入頁，而非預期的資料頁"""
+    if not html_content:
+        return True
+    lowered = html_content.lower()
+    # 已包含預期的頁面標記即為資料頁，不論網址為何
+    if expected_marker and expected_marker.lower() in lowered:
+        return False
+    if is_login_url(url):
+        return True
+    if any(marker in lowered for marker in CHALLENGE_MARKERS):
+        return True
+    # 找不到預期的頁面標記時視同驗證頁，交由瀏覽器處理
+    return bool(expected_marker)
+
+class HttpFetcher:
+    """以共用、保持連線的 requests Session 直接抓取伺服器端渲染的頁面"""
+
+    def __init__(self, user_agent=None, cookie_url=None, cookie_file=None,
+                 pool_size=10, timeout=30, max_concurrency=4, verify_ssl=True, rate_controller=None):
+        """rate_controller: 共用的 RateController，每次請求前等待並回報回應時間"""
+        # 只在實際以 HTTP 抓取時才載入 requests，重播與只判斷驗證頁的呼叫端不需付出匯入成本
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.rate_controller = rate_controller
+        self.max_concurrency = max_concurrency
+        self.verify_ssl = verify_ssl
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8',
+            'Connection': 'keep-alive',
+        })
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+
+        if cookie_url:
+            load_cookies_to_session(self.session, cookie_url, cookie_file)
+
+    def sync_from_driver(self, driver):
+        """沿用瀏覽器目前的 User-Agent 與 cookie，讓兩者共用同一個 session"""
+        try:
+            self.session.headers['User-Agent'] = driver.execute_script("return navigator.userAgent")
+            for cookie in driver.get_cookies():
+                self.session.cookies.set(cookie['name'], cookie['value'],
+                                         domain=cookie.get('domain'), path=cookie.get('path', '/'))
+            logger.info("已同步 WebDriver 的 User-Agent 與 cookie 至 HTTP session")
+        except Exception as e:
+            logger.warning(f"同步 WebDriver session 失敗: {e}")
+
+    def fetch(self, url, expected_marker=None):
+        """
+        抓取單一頁面，回傳 (是否成功, HTML, 最終 URL)
+        提供 expected_marker 時驗證頁或登入頁也視為失敗；每個請求只向 RateController 回報一次結果
+        """
+        import requests
+        if self.rate_controller:
+            self.rate_controller.wait()
+        request_start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout, verify=self.verify_ssl)
+            elapsed = time.perf_counter() - request_start
+            metrics.observe('phase_seconds', elapsed, phase='http_fetch')
+            if response.status_code != 200:
+                if self.rate_controller:
+                    self.rate_controller.record(elapsed, success=False)
+                metrics.inc('failures_total', phase='http_fetch', type=f'HTTP{response.status_code}')
+                logger.warning(f"HTTP 請求狀態碼異常 {response.status_code}: {url}")
+                return False, None, response.url
+            if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+                response.encoding = response.apparent_encoding
+            html_content = response.text
+            success = not (expected_marker and is_challenge_page(html_content, response.url, expected_marker))
+            if self.rate_controller:
+                self.rate_controller.record(elapsed, success)
+            if not success:
+                metrics.inc('failures_total', phase='http_fetch', type='challenge')
+            return success, html_content, response.url
+        except requests.RequestException as e:
+            metrics.record_failure(e, 'http_fetch')
+            if self.rate_controller:
+                self.rate_controller.record(time.perf_counter() - request_start, success=False)
+            logger.error(f"HTTP 請求失敗: {e}")
+            return False, None, url
+
+    def fetch_many(self, urls, max_concurrency=None, expected_marker=None):
+        """以有上限的並行數抓取多個頁面，結果順序與 urls 相同"""
+        workers = max(1, max_concurrency or self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda url: self.fetch(url, expected_marker), urls))
+
+    def close(self):
+        self.session.close()
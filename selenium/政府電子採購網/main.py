@@ -21,20 +21,23 @@ LICENSE file in the root directory of this source tree.
 
 import os
 import time
+PROCESS_STARTED = time.perf_counter()  # 計算啟動耗時的起點
+
 import random
 import logging
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-import undetected_chromedriver as uc
-from fake_useragent import UserAgent
 from datetime import datetime
 import json
+# 只匯入重播、dead-letter 與一般爬取都會用到的模組；Selenium、HTTP、SQLite、分片與通知等
+# 只在部分流程使用的模組在使用它們的函式中才載入 (與 get_driver 相同)，不需要的流程不付出匯入成本
 from procurement_crawler import ProcurementCrawler  # 引入 ProcurementCrawler 類別
-from cookie_manager import load_cookies, save_cookies # 引入 Cookie 管理器
-from error_handler import retry_on_exception, handle_browser_error, handle_selenium_error
+from site_spec import SiteSpec
+from checkpoint_manager import CrawlCheckpoint
+from record_sink import create_sink
+from crawl_metrics import metrics
+from page_cache import PageCache
+
+# 匯入模組所花的時間，記錄為 startup_seconds{stage="imports"}
+IMPORT_SECONDS = time.perf_counter() - PROCESS_STARTED
 
 # 確保 logs 目錄存在
 os.makedirs('logs', exist_ok=True)
@@ -47,8 +50,39 @@ logging.basicConfig(level=logging.INFO,
                               logging.StreamHandler()])
 logger = logging.getLogger(__name__)
 
-def get_driver(use_proxy=False, user_agent=None, headless=True):
-    """配置並獲取 Chrome WebDriver"""
+# lean 設定檔阻擋的資源類型與追蹤服務，只保留讀取表格文字所需的 HTML
+# Chrome 的 content settings 不支援以偏好設定停用樣式表與字型，改由 Network.setBlockedURLs 在網路層阻擋；
+# 每個副檔名同時比對帶查詢字串的網址 (例如 style.css?v=3)
+LEAN_BLOCKED_EXTENSIONS = (
+    'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'ico', 'bmp',
+    'css', 'woff', 'woff2', 'ttf', 'otf', 'eot',
+    'mp4', 'webm', 'mp3',
+)
+LEAN_BLOCKED_URLS = [pattern for extension in LEAN_BLOCKED_EXTENSIONS
+                     for pattern in (f'*.{extension}', f'*.{extension}?*')] + [
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*facebook.com/tr*', '*hotjar.com*',
+]
+LEAN_CONTENT_SETTINGS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.managed_default_content_settings.notifications': 2,
+}
+
+def get_driver(use_proxy=False, user_agent=None, headless=True, profile='default',
+               driver_executable_path=None, user_data_dir=None):
+    """
+    配置並獲取 Chrome WebDriver
+    profile: 'default' 載入完整頁面；'lean' 阻擋圖片、樣式、字型與追蹤腳本，
+             並在 DOM 就緒後即返回 (page_load_strategy='eager')
+    driver_executable_path: 已修補的 chromedriver，提供時不重新下載與修補
+    user_data_dir: 固定的 Chrome 設定檔目錄，未提供時每次建立暫存設定檔
+    """
+    # undetected_chromedriver 與 Selenium 的瀏覽器模組載入較慢，只在需要瀏覽器時才匯入
+    import undetected_chromedriver as uc
+    from selenium import webdriver
+
     options = webdriver.ChromeOptions()
 
     # 基本設定
@@ -65,6 +99,7 @@ def get_driver(use_proxy=False, user_agent=None, headless=True):
     if user_agent:
         options.add_argument(f'--user-agent={user_agent}')
     else:
+        from fake_useragent import UserAgent
         ua = UserAgent()
         options.add_argument(f'--user-agent={ua.random}')
 
@@ -78,43 +113,63 @@ def get_driver(use_proxy=False, user_agent=None, headless=True):
     # options.add_experimental_option("excludeSwitches", ["enable-automation"])
     # options.add_experimental_option('useAutomationExtension', False)
 
+    if profile == 'lean':
+        options.page_load_strategy = 'eager'
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option('prefs', LEAN_CONTENT_SETTINGS)
+
     try:
-        driver = uc.Chrome(options=options)
+        with metrics.timer('driver_startup'):
+            chrome_kwargs = {}
+            if driver_executable_path:
+                chrome_kwargs['driver_executable_path'] = driver_executable_path
+            if user_data_dir:
+                chrome_kwargs['user_data_dir'] = user_data_dir
+            driver = uc.Chrome(options=options, **chrome_kwargs)
         # 執行 JavaScript 隱藏 WebDriver
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        logger.info("WebDriver 已成功啟動")
+        if profile == 'lean':
+            # 透過 DevTools 在網路層直接阻擋不需要的資源
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+        driver.crawler_profile = profile
+        logger.info(f"WebDriver 已成功啟動 (profile={profile})")
         return driver
     except Exception as e:
         logger.error(f"WebDriver 啟動失敗: {e}")
         raise
 
-def wait_for_element(driver, locator, by=By.XPATH, timeout=20, condition="presence", retries=3):
-    """等待元素出現/可點擊/可見，增加重試機制"""
-    for attempt in range(retries):
-        try:
-            wait = WebDriverWait(driver, timeout)
-            if condition == "clickable":
-                element = wait.until(EC.element_to_be_clickable((by, locator)))
-            elif condition == "visible":
-                element = wait.until(EC.visibility_of_element_located((by, locator)))
-            else:  # 預設為 presence
-                element = wait.until(EC.presence_of_element_located((by, locator)))
-            return element
-        except TimeoutException:
-            logger.warning(f"等待元素 {locator} 超時 (嘗試 {attempt + 1}/{retries})")
-            if attempt == retries - 1:
-                return None
-            # 重試前重新整理頁面
-            try:
-                driver.refresh()
-                random_sleep(2, 4)
-            except Exception as e:
-                logger.error(f"重新整理頁面時發生錯誤: {e}")
-            finally:
-                pass  # 可以在這裡添加任何需要的清理代碼
-        except Exception as e:
-            logger.error(f"等待元素時發生錯誤: {e}")
-            return None
+def start_driver(config, fast_start=None, main_driver=True):
+    """
+    依設定啟動瀏覽器；啟用 fast_start 時使用本機 User-Agent 清單、已修補的 chromedriver 與固定設定檔
+    快取的 chromedriver 無法啟動 (通常是 Chrome 已更新) 時刪除快取並重新修補
+    """
+    profile = config.get('browser_profile', 'default')
+    if not fast_start:
+        return get_driver(headless=True, profile=profile)
+
+    options = fast_start.driver_options(main_driver)
+    try:
+        driver = get_driver(headless=True, profile=profile, **options)
+    except Exception:
+        if 'driver_executable_path' not in options:
+            raise
+        logger.warning("快取的 chromedriver 無法啟動，重新下載並修補")
+        fast_start.invalidate_driver()
+        options.pop('driver_executable_path')
+        driver = get_driver(headless=True, profile=profile, **options)
+    fast_start.remember_driver(driver)
+    return driver
+
+def wait_for_element(driver, locator, by=None, timeout=10, condition="presence"):
+    """等待元素出現/可點擊/可見，逾時不重新整理頁面，回傳元素或 None；by 預設為 By.XPATH"""
+    from page_readiness import wait_for_locator
+
+    try:
+        return wait_for_locator(driver, locator, by=by, timeout=timeout, condition=condition)
+    except Exception as e:
+        logger.error(f"等待元素時發生錯誤: {e}")
+        return None
 
 def random_sleep(min_sec=1, max_sec=3):
     """隨機等待一段時間，模擬人類行為"""
@@ -138,6 +193,7 @@ def handle_login(driver, cookie_file):
         #     login_button.click()
 
         # 登入後保存 Cookie
+        from cookie_manager import save_cookies
         random_sleep(3, 5)
         success, new_cookie_file = save_cookies(driver, cookie_file)
         
@@ -152,12 +208,25 @@ def handle_login(driver, cookie_file):
         logger.error(f"登入過程發生錯誤: {e}")
         return False, cookie_file
 
-def load_config_and_build_url():
+def load_config(config_file='config.json'):
+    """讀取設定檔，回傳 (是否成功, 設定內容)"""
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            return True, json.load(f)
+    except FileNotFoundError:
+        logger.error(f"找不到 {config_file} 設定檔")
+        return False, None
+    except json.JSONDecodeError:
+        logger.error(f"{config_file} 格式錯誤")
+        return False, None
+
+def load_config_and_build_url(config=None):
     """從設定檔讀取配置並組合目標 URL"""
     try:
         # 從 config.json 讀取配置
-        with open('config.json', 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        if config is None:
+            with open('config.json', 'r', encoding='utf-8') as f:
+                config = json.load(f)
 
         base_url = config['base_url']
         query_params = config['query_params']
@@ -209,8 +278,10 @@ def save_data(data, filename='procurement_data.json', timestamp=True):
         if timestamp:
             base, ext = os.path.splitext(filename)
             filename = f"{base}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
-            
-        with open(filename, 'w', encoding='utf-8') as f:
+
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with metrics.timer('save_data'), open(filename, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         logger.info(f"數據已成功保存至: {filename}")
         return True
@@ -218,102 +289,550 @@ def save_data(data, filename='procurement_data.json', timestamp=True):
         logger.error(f"保存數據時發生錯誤: {e}")
         return False
 
-def main():
+def create_fetcher(config, driver, target_url, cookie_file, rate_controller=None):
+    """依設定建立 HTTP 抓取器，fetch_mode 不是 http 時回傳 None"""
+    if config.get('fetch_mode', 'selenium') != 'http':
+        return None
+
+    from http_fetcher import HttpFetcher
+    http_config = config.get('http', {})
+    fetcher = HttpFetcher(cookie_url=target_url,
+                          cookie_file=cookie_file,
+                          pool_size=http_config.get('pool_size', 10),
+                          timeout=http_config.get('timeout', 30),
+                          max_concurrency=http_config.get('max_concurrency', 4),
+                          verify_ssl=http_config.get('verify_ssl', True),
+                          rate_controller=rate_controller)
+    fetcher.sync_from_driver(driver)
+    logger.info("已啟用 HTTP 抓取模式，遇到驗證頁時改用 Selenium")
+    return fetcher
+
+def select_changed_items(history, items):
+    """依歷史索引篩選出需要爬取詳情頁的新案件與已變動案件"""
+    from history_manager import CrawlHistory
+
+    changed = []
+    for item in items:
+        status = history.classify(item)
+        if status != CrawlHistory.UNCHANGED:
+            changed.append(item)
+            logger.debug(f"{status}: {item.get('tender_case_no')}")
+    return changed
+
+def crawl_list_pages(crawler, checkpoint, history=None, start_url=None, start_page=0,
+                     stop_after_known_pages=1, page_size=None, store=None):
+    """
+    爬取列表頁，每頁完成後寫入日誌並記錄下一頁網址；提供 store 時每頁的所有資料列同時寫入資料庫
+    start_url 為續爬時的起始頁；為 None 時從瀏覽器目前所在的第一頁開始
+    page_size 有值時依第一頁的總筆數直接產生所有頁面網址，無法解析時改用下一頁連結逐頁爬取
+    回傳本次新爬取的資料 (增量模式下僅包含新案件與已變動案件)
+    """
+    all_items = []
+    page_count = start_page
+    known_pages = 0
+
+    def keep_page(page_items):
+        """回傳本頁需保留的資料，以及是否已連續多頁皆為已知案件"""
+        nonlocal known_pages
+        if store:
+            store.upsert_items(page_items)
+        if not history:
+            return page_items, False
+        kept_items = select_changed_items(history, page_items)
+        known_pages = 0 if kept_items or not page_items else known_pages + 1
+        if known_pages >= stop_after_known_pages:
+            logger.info(f"已連續 {known_pages} 頁皆為已知案件，停止爬取列表")
+            return kept_items, True
+        return kept_items, False
+
+    if start_url:
+        logger.info(f"從第 {page_count + 1} 頁續爬列表")
+        if not crawler.load_page(start_url):
+            logger.error("無法獲取續爬起始頁")
+            return all_items
+
+    page_items = crawl_data(crawler)
+    page_count += 1
+    kept_items, stop = keep_page(page_items)
+    all_items.extend(kept_items)
+
+    page_urls = None
+    if page_size and not start_url and not stop:
+        page_urls = crawler.build_page_urls(page_size)
+
+    if page_urls is not None:
+        # 直接分頁：依頁碼產生的網址批次抓取，HTTP 模式下同一批次並行抓取
+        checkpoint.record_page(page_count, kept_items, page_urls[0] if page_urls else None)
+        batch_size = crawler.fetcher.max_concurrency if crawler.fetcher else 1
+        for batch_start in range(0, len(page_urls), batch_size):
+            if stop:
+                break
+            batch = page_urls[batch_start:batch_start + batch_size]
+            logger.info(f"正在訪問第 {page_count + 1}-{page_count + len(batch)} 頁")
+            for offset, page_items in enumerate(crawler.extract_pages(batch)):
+                if page_items is None:
+                    logger.error(f"無法獲取第 {page_count + 1} 頁")
+                    stop = True
+                    break
+                page_count += 1
+                logger.info(f"第 {page_count} 頁成功爬取 {len(page_items)} 條資料")
+                kept_items, stop = keep_page(page_items)
+                all_items.extend(kept_items)
+                next_index = batch_start + offset + 1
+                next_page_url = page_urls[next_index] if next_index < len(page_urls) and not stop else None
+                checkpoint.record_page(page_count, kept_items, next_page_url)
+                if stop:
+                    break
+    else:
+        # 逐頁跟隨「下一頁」連結
+        next_page_link = None if stop else crawler.get_next_page_link()
+        checkpoint.record_page(page_count, kept_items, next_page_link)
+        while next_page_link:
+            logger.info(f"正在訪問第 {page_count + 1} 頁")
+            if not crawler.load_page(next_page_link):
+                logger.error("無法獲取下一頁")
+                break
+
+            page_items = crawl_data(crawler)
+            page_count += 1
+            kept_items, stop = keep_page(page_items)
+            all_items.extend(kept_items)
+
+            next_page_link = None if stop else crawler.get_next_page_link()
+            checkpoint.record_page(page_count, kept_items, next_page_link)
+
+    logger.info(f"共爬取 {len(all_items)} 條列表資料，來自 {page_count} 頁")
+    return all_items
+
+def create_retry_queue(config, all_items, target_url=None):
+    """建立詳情頁的重試佇列，重試次數用盡的案件寫入 dead-letter 檔供之後單獨重新執行"""
+    from retry_scheduler import RetryQueue, DeadLetterFile
+
+    dead_letters = DeadLetterFile.from_config(config)
+
+    def on_exhausted(index, attempts, error):
+        dead_letters.append(all_items[index], attempts, error, target_url)
+
+    return RetryQueue.from_config(config, on_exhausted=on_exhausted)
+
+def crawl_details(crawler, all_items, checkpoint, store=None, retry_queue=None):
+    """
+    以單一 WebDriver 逐筆爬取詳情頁，結果直接寫入日誌 (與資料庫) 而不保留在記憶體中
+    失敗的詳情頁由 retry_queue 延後重試，先處理其他案件；未提供時每筆只嘗試一次
+    """
+    if retry_queue is None:
+        from retry_scheduler import RetryQueue
+        retry_queue = RetryQueue(max_attempts=1)
+    for index, item in enumerate(all_items):
+        if item.get('detail_link') and not checkpoint.is_detail_done(index):
+            retry_queue.put(index)
+
+    while True:
+        task = retry_queue.get()
+        if task is None:
+            break
+        index, attempt = task
+        item = all_items[index]
+        detail_link = item.get('detail_link')
+        detail_page_data, error = None, None
+        try:
+            logger.info(f"正在處理第 {index + 1}/{len(all_items)} 條記錄的詳情頁"
+                        + (f" (第 {attempt} 次嘗試)" if attempt > 1 else ""))
+            detail_page_data = crawler.parse_detail_page(detail_link)
+            if detail_page_data:
+                checkpoint.record_detail(index, detail_page_data)
+                if store:
+                    store.upsert_detail(item.get('tender_case_no'), detail_page_data)
+                logger.info(f"成功獲取詳情頁資料: {item.get('tender_name', 'Unknown')}")
+
+        except Exception as e:
+            error = str(e)
+            logger.error(f"處理詳情頁時發生錯誤 ({detail_link}): {e}")
+        finally:
+            retry_queue.done(task, bool(detail_page_data), error)
+
+def crawl_details_with_pool(config, all_items, fetcher, num_workers, checkpoint, rate_controller, page_cache=None,
+                            target_url=None, cookie_file=None, store=None, retry_queue=None):
+    """
+    以多個獨立 WebDriver 並行爬取詳情頁，所有 worker 共用同一個 RateController
+    提供 cookie_file 時每個 worker 啟動後先寫入同一份 Cookie，再開始開啟頁面
+    """
+    from driver_pool import DetailWorkerPool
+    from fast_start import FastStart
+    from session_policy import SessionPolicy
+    from cookie_manager import load_cookies
+
+    def driver_factory():
+        worker_driver = start_driver(config, FastStart.from_config(config), main_driver=False)
+        worker_driver.set_page_load_timeout(30)
+        if cookie_file:
+            load_cookies(worker_driver, target_url, cookie_file)
+        return worker_driver
+
+    def record_result(index, detail_page_data):
+        checkpoint.record_detail(index, detail_page_data)
+        if store:
+            store.upsert_detail(all_items[index].get('tender_case_no'), detail_page_data)
+
+    pool = DetailWorkerPool(
+        driver_factory=driver_factory,
+        crawler_factory=lambda worker_driver: ProcurementCrawler(
+            worker_driver, fetcher=fetcher, session_policy=SessionPolicy.from_config(config),
+            rate_controller=rate_controller, page_cache=page_cache,
+            record_type=config.get('record_type', 'dict'), site_spec=SiteSpec.from_config(config)),
+        num_workers=num_workers,
+        result_callback=record_result,
+        store_results=False)
+    succeeded = pool.run(all_items, skip=checkpoint.is_detail_done, retry_queue=retry_queue)
+    logger.info(f"並行爬取完成，成功取得 {succeeded} 筆詳情頁")
+
+def create_store(config):
+    """sqlite_store.enabled 為 true 時才載入 sqlite_store 並開啟資料庫，否則回傳 None"""
+    if not config.get('sqlite_store', {}).get('enabled', False):
+        return None
+    from sqlite_store import TenderStore
+    return TenderStore.from_config(config)
+
+def flatten_details(config, output_path):
+    """依 flatten_details 設定將輸出檔的詳情頁資料攤平為固定欄位的 Parquet 檔"""
+    flatten_config = config.get('flatten_details', {})
+    if not flatten_config.get('enabled', False):
+        return None
+    schema_file = flatten_config.get('schema_file') or os.path.join(config.get('data_folder', '.'), 'detail_schema.json')
+    try:
+        from detail_schema import flatten_output
+        return flatten_output(output_path, schema_file, min_frequency=flatten_config.get('min_frequency', 0.3))
+    except ImportError:
+        logger.error("攤平詳情頁資料需要安裝 pyarrow：pip install pyarrow")
+    except Exception as e:
+        logger.error(f"攤平詳情頁資料時發生錯誤: {e}")
+    return None
+
+def update_history(config, history, target_url, all_items, detail_fetched, complete, output_path=None):
+    """
+    更新歷史索引前比對新案件、變動與撤下的案件並送出通知，再寫入本次的案件
+    detail_fetched(index) 表示該案件是否已取得詳情頁；complete 為 False (例如增量模式提前停止) 時不判斷撤下
+    """
+    if config.get('notify_new_cases', False) and output_path:
+        from change_detector import ChangeDetector, create_notifiers, notify_changes
+        detector = ChangeDetector(history, target_url)
+        change_set = detector.detect(all_items, complete=complete)
+        notify_changes(change_set, create_notifiers(config), output_path)
+
+    for index, item in enumerate(all_items):
+        history.update(item, detail_fetched=detail_fetched(index))
+    history.save()
+
+def export_metrics(config, data_folder):
+    """輸出本次執行的各階段耗時與計數：JSON 摘要供比對，Prometheus textfile 供 node exporter 收集"""
+    metrics_config = config.get('metrics', {})
+    json_path = os.path.join(data_folder, 'metrics', f"crawl_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    prometheus_path = metrics_config.get('prometheus_textfile') or os.path.join(data_folder, 'crawl_metrics.prom')
+    summary = metrics.summary()
+    logger.info(f"本次執行 {summary['elapsed_seconds']:.1f} 秒，每秒 {summary['pages_per_second']:.2f} 頁、"
+                f"{summary['rows_per_second']:.2f} 筆")
+    metrics.export(json_path, prometheus_path)
+
+def open_target(driver, target_url, rate_controller):
+    """寫入 Cookie 後開啟目標網址，驗證頁面並在需要時登入，回傳 Cookie 檔案路徑"""
+    from selenium.common.exceptions import WebDriverException
+    from http_fetcher import is_login_url
+    from cookie_manager import load_cookies
+
+    cookie_loaded, cookie_file = load_cookies(driver, target_url)
+    logger.info(f"正在訪問 {target_url}")
+    rate_controller.wait()
+    driver.get(target_url)
+
+    # 驗證頁面載入狀態
+    if not driver.current_url or "error" in driver.current_url.lower() or "404" in driver.current_url:
+        raise WebDriverException("頁面載入失敗或無效")
+
+    # 處理登入邏輯
+    if not cookie_loaded or is_login_url(driver.current_url):
+        login_success, cookie_file = handle_login(driver, cookie_file)
+        if not login_success:
+            raise Exception("登入失敗")
+    return cookie_file
+
+def record_startup(driver_seconds, first_page_seconds):
+    """記錄啟動耗時：模組匯入、瀏覽器啟動，以及從開始執行到第一頁載入完成"""
+    metrics.observe('startup_seconds', IMPORT_SECONDS, stage='imports')
+    metrics.observe('startup_seconds', driver_seconds, stage='driver')
+    metrics.observe('startup_seconds', first_page_seconds, stage='first_page')
+    logger.info(f"啟動耗時：匯入模組 {IMPORT_SECONDS:.2f} 秒、啟動瀏覽器 {driver_seconds:.2f} 秒、"
+                f"載入第一頁 {first_page_seconds:.2f} 秒")
+
+def run_crawl(config):
+    """依設定執行一次完整爬取 (列表頁與詳情頁)，回傳輸出檔路徑，失敗時回傳 None"""
+    from selenium.common.exceptions import WebDriverException
+    from fast_start import FastStart
+    from rate_controller import RateController
+    from session_policy import SessionPolicy
+    from page_readiness import readiness_stats
+    from cookie_manager import save_cookies
+    from error_handler import handle_browser_error, handle_selenium_error
+
     driver = None
+    fetcher = None
+    checkpoint = None
+    store = None
+    output_path = None
+    data_folder = config.get('data_folder', '.')
+    metrics.reset()
+    run_started = time.perf_counter()
     try:
-        # 讀取設定並組合 URL
-        success, target_url = load_config_and_build_url()
+        success, target_url = load_config_and_build_url(config)
         if not success:
             logger.error("無法取得目標 URL，程式終止")
-            return
+            return None
 
-        driver = get_driver(headless=True)
+        driver = start_driver(config, FastStart.from_config(config))
         driver.set_page_load_timeout(30)
-        
-        # 載入 Cookie 並訪問目標網站
-        cookie_loaded, cookie_file = load_cookies(driver, target_url)
-        logger.info(f"正在訪問 {target_url}")
-        driver.get(target_url)
-        random_sleep(3, 5)
+        driver_seconds = time.perf_counter() - run_started
 
-        # 驗證頁面載入狀態
-        if not driver.current_url or "error" in driver.current_url.lower() or "404" in driver.current_url:
-            raise WebDriverException("頁面載入失敗或無效")
+        # 所有請求共用的速率控制器
+        rate_controller = RateController.from_config(config)
 
-        # 處理登入邏輯
-        if not cookie_loaded or "login" in driver.current_url.lower():
-            login_success, cookie_file = handle_login(driver, cookie_file)
-            if not login_success:
-                raise Exception("登入失敗")
+        # 在開啟第一個頁面前寫入 Cookie，再訪問目標網站並處理登入
+        cookie_file = open_target(driver, target_url, rate_controller)
+        record_startup(driver_seconds, time.perf_counter() - run_started)
 
         # 初始化爬蟲並開始爬取
-        crawler = ProcurementCrawler(driver)
-        all_items = []
-        page_count = 0
-
-        # 爬取第一頁
-        all_items = crawl_data(crawler)
-        page_count += 1
-
-        # 爬取後續頁面
-        while True:
-            next_page_link = crawler.get_next_page_link()
-            if not next_page_link:
-                break
-
-            logger.info(f"正在訪問第 {page_count + 1} 頁")
-            if not crawler.get_page_with_selenium(next_page_link, driver):
-                logger.error("無法獲取下一頁")
-                break
-
-            random_sleep(2, 3)
-            all_items = crawl_data(crawler, all_items)
-            page_count += 1
-
-            if page_count % 5 == 0:  # 每爬取5頁保存一次
-                save_data(all_items, filename=f'procurement_data_partial_{page_count}.json')
-
-        logger.info(f"共爬取 {len(all_items)} 條列表資料，來自 {page_count} 頁")
-
-        # 爬取詳情頁
-        for i, item in enumerate(all_items, 1):
-            detail_link = item.get('detail_link')
-            if not detail_link:
-                continue
-
-            try:
-                logger.info(f"正在處理第 {i}/{len(all_items)} 條記錄的詳情頁")
-                detail_page_data = crawler.parse_detail_page(detail_link)
-                if detail_page_data:
-                    item['detail_data'] = detail_page_data
-                    logger.info(f"成功獲取詳情頁資料: {item.get('tender_name', 'Unknown')}")
-                
-                delay = random_sleep(5, 8)
-                logger.debug(f"等待 {delay:.2f} 秒後繼續...")
-                
-                if i % 10 == 0:  # 每處理10條詳情頁保存一次
-                    save_data(all_items, filename=f'procurement_data_with_details_partial_{i}.json')
-                    
-            except Exception as e:
-                logger.error(f"處理詳情頁時發生錯誤 ({detail_link}): {e}")
-                continue
-
-        # 最終保存完整數據
-        if save_data(all_items):
+        fetcher = create_fetcher(config, driver, target_url, cookie_file, rate_controller)
+        page_cache = PageCache.from_config(config)
+        record_type = config.get('record_type', 'dict')
+        crawler = ProcurementCrawler(driver, fetcher=fetcher, session_policy=SessionPolicy.from_config(config),
+                                     rate_controller=rate_controller, page_cache=page_cache, record_type=record_type,
+                                     site_spec=SiteSpec.from_config(config))
+
+        # 增量模式：只爬取新案件與已變動案件的詳情頁；變動通知同樣以歷史索引比對
+        incremental = config.get('incremental', False)
+        notify = config.get('notify_new_cases', False)
+        history = None
+        if incremental or notify:
+            from history_manager import CrawlHistory
+            history = CrawlHistory(os.path.join(data_folder, config.get('history_file', 'procurement_history.json')))
+            history.load()
+
+        # 列表資料與詳情頁同時寫入 SQLite 資料庫 (sqlite_store.enabled 為 true 時)
+        store = create_store(config)
+
+        # 開啟日誌，若上次執行中斷則從檢查點續爬
+        checkpoint = CrawlCheckpoint(data_folder, target_url)
+        resumed, all_items = checkpoint.start(resume=config.get('resume', True))
+        if record_type == 'typed':
+            from tender_record import build_records
+            all_items = build_records(all_items)
+
+        if not checkpoint.state['list_done']:
+            all_items.extend(crawl_list_pages(
+                crawler, checkpoint, history if incremental else None,
+                start_url=checkpoint.state['next_page_url'] if resumed else None,
+                start_page=checkpoint.state['last_page'],
+                stop_after_known_pages=config.get('incremental_stop_pages', 1),
+                page_size=int(config['query_params'].get('pageSize', 0)) if config.get('direct_paging', True) else None,
+                store=store))
+            checkpoint.mark_list_done()
+        if incremental:
+            logger.info(f"增量模式：{len(all_items)} 筆新案件或已變動案件需要爬取詳情頁")
+
+        # 爬取詳情頁，失敗的詳情頁延後重試，重試用盡者寫入 dead-letter 檔
+        detail_workers = config.get('detail_workers', 1)
+        retry_queue = create_retry_queue(config, all_items, target_url)
+        if detail_workers > 1:
+            crawl_details_with_pool(config, all_items, fetcher, detail_workers, checkpoint, rate_controller,
+                                    page_cache, target_url, cookie_file, store, retry_queue)
+        else:
+            crawl_details(crawler, all_items, checkpoint, store, retry_queue)
+        if retry_queue.exhausted:
+            logger.warning(f"{retry_queue.exhausted} 筆詳情頁重試用盡，可設定 replay_dead_letters 重新執行")
+        # 保存爬取期間更新的 Cookie，供下次執行沿用
+        save_cookies(driver, cookie_file)
+        crawler.session_policy.log_summary()
+        readiness_stats.log_summary()
+        if page_cache:
+            page_cache.log_summary()
+
+        # 壓實日誌，逐筆串流寫入最終輸出
+        output_file = os.path.join(data_folder, f"procurement_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        output_sink = create_sink(config.get('output_format', 'json'), output_file, record_type,
+                                  columns=crawler.site.record_columns())
+        if checkpoint.finish(output_sink):
+            output_path = output_sink.path
             logger.info("爬蟲任務完成")
+            flatten_details(config, output_path)
         else:
             logger.error("數據保存失敗")
 
+        # 分片只讀取主執行的歷史索引，由主執行合併後統一通知並更新
+        if history and not config.get('history_readonly'):
+            update_history(config, history, target_url, all_items, checkpoint.is_detail_done,
+                           complete=not incremental, output_path=output_path)
+
     except WebDriverException as e:
+        metrics.record_failure(e, 'run')
         handle_selenium_error(e)
         raise
     except Exception as e:
+        metrics.record_failure(e, 'run')
+        handle_browser_error(driver, e)
+        raise
+    finally:
+        if checkpoint:
+            checkpoint.close()
+        if store:
+            store.close()
+        if fetcher:
+            fetcher.close()
+        if driver:
+            driver.quit()
+            logger.info("WebDriver 已關閉")
+        export_metrics(config, data_folder)
+
+    return output_path
+
+def run_replay(config):
+    """
+    只從頁面快取重新執行列表與詳情頁解析，不開啟瀏覽器也不連線，用於解析邏輯修改後重新產生輸出
+    快取中沒有的頁面會被略過，回傳輸出檔路徑，失敗時回傳 None
+    """
+    success, target_url = load_config_and_build_url(config)
+    if not success:
+        return None
+    cache_config = dict(config.get('page_cache', {}), enabled=True)
+    page_cache = PageCache.from_config(dict(config, page_cache=cache_config))
+    crawler = ProcurementCrawler(None, page_cache=page_cache, replay=True,
+                                 record_type=config.get('record_type', 'dict'), site_spec=SiteSpec.from_config(config))
+    if not crawler.load_page(target_url):
+        logger.error("快取中沒有第一頁列表，無法重播")
+        return None
+
+    data_folder = config.get('data_folder', '.')
+    # 重播使用獨立的日誌，不影響一般爬取的檢查點
+    checkpoint = CrawlCheckpoint(os.path.join(data_folder, 'replay'), target_url)
+    checkpoint.start(resume=False)
+    store = create_store(config)
+    try:
+        page_size = int(config['query_params'].get('pageSize', 0)) if config.get('direct_paging', True) else None
+        all_items = crawl_list_pages(crawler, checkpoint, page_size=page_size, store=store)
+        checkpoint.mark_list_done()
+        crawl_details(crawler, all_items, checkpoint, store)
+        page_cache.log_summary()
+
+        output_file = os.path.join(data_folder, f"procurement_data_replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        output_sink = create_sink(config.get('output_format', 'json'), output_file, config.get('record_type', 'dict'),
+                                  columns=crawler.site.record_columns())
+        if checkpoint.finish(output_sink):
+            logger.info("重播完成")
+            return output_sink.path
+        logger.error("數據保存失敗")
+        return None
+    finally:
+        checkpoint.close()
+        if store:
+            store.close()
+
+def run_dead_letters(config):
+    """
+    只重新爬取 dead-letter 檔中的詳情頁，輸出為獨立的資料檔 (並寫入 SQLite 資料庫)
+    再次失敗的案件會寫回 dead-letter 檔，回傳輸出檔路徑，沒有項目或失敗時回傳 None
+    """
+    from retry_scheduler import DeadLetterFile
+    from fast_start import FastStart
+    from rate_controller import RateController
+    from session_policy import SessionPolicy
+    from cookie_manager import save_cookies
+    from error_handler import handle_browser_error
+
+    dead_letters = DeadLetterFile.from_config(config)
+    entries = dead_letters.drain()
+    if not entries:
+        logger.info(f"沒有需要重新執行的項目: {dead_letters.path}")
+        return None
+    logger.info(f"重新執行 {len(entries)} 筆重試用盡的詳情頁")
+
+    driver = None
+    fetcher = None
+    checkpoint = None
+    store = None
+    output_path = None
+    data_folder = config.get('data_folder', '.')
+    metrics.reset()
+    try:
+        success, target_url = load_config_and_build_url(config)
+        if not success:
+            logger.error("無法取得目標 URL，程式終止")
+            return None
+
+        driver = start_driver(config, FastStart.from_config(config))
+        driver.set_page_load_timeout(30)
+        rate_controller = RateController.from_config(config)
+        cookie_file = open_target(driver, target_url, rate_controller)
+        fetcher = create_fetcher(config, driver, target_url, cookie_file, rate_controller)
+        record_type = config.get('record_type', 'dict')
+        crawler = ProcurementCrawler(driver, fetcher=fetcher, session_policy=SessionPolicy.from_config(config),
+                                     rate_controller=rate_controller, page_cache=PageCache.from_config(config),
+                                     record_type=record_type, site_spec=SiteSpec.from_config(config))
+        store = create_store(config)
+
+        all_items = [entry['record'] for entry in entries]
+        checkpoint = CrawlCheckpoint(os.path.join(data_folder, 'dead_letters'), dead_letters.path)
+        checkpoint.start(resume=False)
+        # dead-letter 檔中的紀錄已轉為 dict (不論 record_type)，直接作為一頁列表寫入獨立的日誌
+        checkpoint.record_page(1, all_items, None)
+        checkpoint.mark_list_done()
+        if store:
+            store.upsert_items(all_items)
+        crawl_details(crawler, all_items, checkpoint, store, create_retry_queue(config, all_items, target_url))
+        save_cookies(driver, cookie_file)
+
+        output_file = os.path.join(data_folder, f"procurement_data_retry_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        output_sink = create_sink(config.get('output_format', 'json'), output_file, record_type,
+                                  columns=crawler.site.record_columns())
+        if checkpoint.finish(output_sink):
+            output_path = output_sink.path
+            dead_letters.finish_drain()
+            logger.info("dead-letter 重新執行完成")
+        else:
+            logger.error("數據保存失敗")
+    except Exception as e:
+        metrics.record_failure(e, 'run')
         handle_browser_error(driver, e)
         raise
     finally:
+        if checkpoint:
+            checkpoint.close()
+        if store:
+            store.close()
+        if fetcher:
+            fetcher.close()
         if driver:
             driver.quit()
             logger.info("WebDriver 已關閉")
+        export_metrics(config, data_folder)
+
+    return output_path
+
+def main():
+    # 讀取設定
+    success, config = load_config()
+    if not success:
+        logger.error("無法讀取設定檔，程式終止")
+        return
+
+    # replay 為 true 時只從頁面快取重新解析，不連線
+    if config.get('replay'):
+        run_replay(config)
+    # replay_dead_letters 為 true 時只重新爬取上次重試用盡的詳情頁
+    elif config.get('replay_dead_letters'):
+        run_dead_letters(config)
+    # 設定 shard_days 時將日期區間與機關拆成多個分片，各自在獨立行程中爬取
+    elif config.get('shard_days'):
+        from shard_planner import run_sharded_crawl
+        run_sharded_crawl(config)
+    else:
+        run_crawl(config)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,153 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from crawl_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = '.html.gz'
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url):
+    """統一網址寫法作為快取鍵：小寫 scheme 與主機、移除預設埠號與 fragment、查詢參數依名稱排序"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, parsed.path or '/', parsed.params, query, ''))
+
+def cache_key(url):
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+class PageCache:
+    """
+    以正規化網址的雜湊值為檔名、gzip 壓縮保存頁面 HTML 的磁碟快取
+    每個檔案第一行為 JSON 標頭 (原始網址、最終網址、抓取時間)，其後為 HTML
+    超過 ttl 秒的頁面視為過期；總大小超過 max_bytes 時依最近使用時間 (檔案 mtime) 淘汰
+    """
+
+    def __init__(self, folder, ttl=86400, max_bytes=500 * 1024 * 1024):
+        self.folder = folder
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0, 'evictions': 0}
+        os.makedirs(folder, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    @classmethod
+    def from_config(cls, config):
+        """依設定建立快取，page_cache.enabled 不為 true 時回傳 None"""
+        cache_config = config.get('page_cache', {})
+        if not cache_config.get('enabled', False):
+            return None
+        folder = cache_config.get('folder') or os.path.join(config.get('data_folder', '.'), 'page_cache')
+        return cls(folder,
+                   ttl=cache_config.get('ttl_hours', 24) * 3600,
+                   max_bytes=cache_config.get('max_mb', 500) * 1024 * 1024)
+
+    def _path(self, url):
+        key = cache_key(url)
+        return os.path.join(self.folder, key[:2], key + CACHE_SUFFIX)
+
+    def _entries(self):
+        """列出所有快取檔案的 (路徑, mtime, 大小)"""
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                if not name.endswith(CACHE_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _count(self, result):
+        with self._lock:
+            self.stats[result] += 1
+        metrics.inc('page_cache_total', result=result)
+
+    def get(self, url, allow_expired=False):
+        """回傳 (HTML, 最終網址)；沒有快取或已過期時回傳 None，allow_expired 為 True 時忽略 TTL"""
+        path = self._path(url)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if not allow_expired and time.time() - header['fetched_at'] > self.ttl:
+                    self._count('expired')
+                    return None
+                html_content = f.read()
+            os.utime(path)  # 更新最近使用時間供 LRU 淘汰
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            logger.warning(f"快取檔案損毀，將重新抓取 ({url}): {e}")
+            self._count('misses')
+            return None
+        self._count('hits')
+        return html_content, header.get('final_url') or url
+
+    def put(self, url, html_content, final_url=None):
+        """寫入一個頁面，以暫存檔加上 os.replace 避免其他行程讀到寫一半的檔案"""
+        if not html_content:
+            return False
+        path = self._path(url)
+        header = {'url': normalize_url(url), 'final_url': final_url or url, 'fetched_at': time.time()}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                f.write(json.dumps(header, ensure_ascii=False) + '\n')
+                f.write(html_content)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"寫入快取失敗 ({url}): {e}")
+            return False
+
+        self._count('stores')
+        with self._lock:
+            self.total_bytes += size - previous_size
+            over_limit = self.total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+        return True
+
+    def evict(self):
+        """淘汰最久未使用的頁面，直到總大小降至上限的 90%"""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            total = sum(size for _, _, size in entries)
+            target = self.max_bytes * 0.9
+            evicted = 0
+            for path, _, size in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+            self.total_bytes = total
+            self.stats['evictions'] += evicted
+        if evicted:
+            logger.info(f"頁面快取超過 {self.max_bytes / 1024 / 1024:.1f} MB，已淘汰 {evicted} 個最久未使用的頁面")
+        return evicted
+
+    def log_summary(self):
+        with self._lock:
+            stats = dict(self.stats)
+        logger.info(f"頁面快取：命中 {stats['hits']}、未命中 {stats['misses']}、過期 {stats['expired']}、"
+                    f"寫入 {stats['stores']}、淘汰 {stats['evictions']}，"
+                    f"目前 {self.total_bytes / 1024 / 1024:.1f} MB")
@@ -0,0 +1,133 @@
+import time
+import logging
+import threading
+from crawl_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_FREQUENCY = 0.2
+
+# 各頁面類型的就緒條件：target 出現即就緒；文件載入完成且 empty 存在時代表頁面本身沒有資料
+PAGE_CONDITIONS = {
+    'list': {
+        'target': '//table[@id="tpam"]/tbody/tr',
+        'empty': '//table[@id="tpam"]',
+        'timeout': 10,
+    },
+    'detail': {
+        'target': '//div[@id="printRange"]/table',
+        'empty': None,
+        'timeout': 15,
+    },
+    'document': {
+        'target': '//body',
+        'empty': None,
+        'timeout': 20,
+    },
+}
+
+class ReadinessStats:
+    """記錄每種頁面實際等待的時間，供調整逾時設定參考"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = {}
+
+    def record(self, page_type, waited, ready):
+        with self._lock:
+            stats = self.records.setdefault(page_type, {'count': 0, 'timeouts': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += waited
+            stats['max'] = max(stats['max'], waited)
+            if not ready:
+                stats['timeouts'] += 1
+
+    def log_summary(self):
+        with self._lock:
+            for page_type, stats in self.records.items():
+                logger.info(f"等待 {page_type} 頁面就緒 {stats['count']} 次，平均 {stats['total'] / stats['count']:.2f} 秒，"
+                            f"最長 {stats['max']:.2f} 秒，逾時 {stats['timeouts']} 次")
+
+readiness_stats = ReadinessStats()
+
+def _ready_condition(target, empty):
+    """回傳 WebDriverWait 用的判斷函式：目標元素出現，或文件已完成載入且確定沒有資料"""
+    from selenium.webdriver.common.by import By
+
+    def condition(driver):
+        if driver.find_elements(By.XPATH, target):
+            return 'ready'
+        if empty and driver.find_elements(By.XPATH, empty) \
+                and driver.execute_script("return document.readyState") == 'complete':
+            return 'empty'
+        return False
+    return condition
+
+def wait_until_ready(driver, page_type, timeout=None, poll_frequency=DEFAULT_POLL_FREQUENCY, max_extensions=1,
+                     conditions=None):
+    """
+    等待指定類型的頁面就緒，逾時時不重新整理頁面
+    若逾時當下文件仍在載入，最多再延長 max_extensions 次等待
+    conditions 可傳入站台規則的就緒條件 (SiteSpec.page_conditions)，預設為 PAGE_CONDITIONS
+    回傳 (狀態, 實際等待秒數)，狀態為 'ready'、'empty' 或 None (逾時)
+    """
+    # 只在實際等待時才載入 Selenium，重播與 HTTP 模式不需付出匯入成本
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    spec = (conditions or PAGE_CONDITIONS)[page_type]
+    timeout = timeout or spec['timeout']
+    condition = _ready_condition(spec['target'], spec['empty'])
+    start = time.perf_counter()
+    status = None
+
+    for _ in range(max_extensions + 1):
+        try:
+            status = WebDriverWait(driver, timeout, poll_frequency).until(condition)
+            break
+        except TimeoutException:
+            try:
+                still_loading = driver.execute_script("return document.readyState") == 'loading'
+            except Exception:
+                still_loading = False
+            if not still_loading:
+                break
+            logger.info(f"{page_type} 頁面仍在載入，延長等待 {timeout} 秒")
+
+    waited = time.perf_counter() - start
+    readiness_stats.record(page_type, waited, status is not None)
+    metrics.observe('phase_seconds', waited, phase=f'wait_{page_type}')
+    if status is None:
+        logger.warning(f"等待 {page_type} 頁面就緒逾時 ({waited:.2f} 秒)")
+    else:
+        logger.debug(f"{page_type} 頁面就緒 ({status})，等待 {waited:.2f} 秒")
+    return status, waited
+
+def wait_for_locator(driver, locator, by=None, timeout=10, condition="presence",
+                     poll_frequency=DEFAULT_POLL_FREQUENCY):
+    """等待單一元素出現/可點擊/可見並記錄等待時間，逾時回傳 None；by 預設為 By.XPATH"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
+    by = by or By.XPATH
+
+    if condition == "clickable":
+        expected = EC.element_to_be_clickable((by, locator))
+    elif condition == "visible":
+        expected = EC.visibility_of_element_located((by, locator))
+    else:  # 預設為 presence
+        expected = EC.presence_of_element_located((by, locator))
+
+    start = time.perf_counter()
+    try:
+        element = WebDriverWait(driver, timeout, poll_frequency).until(expected)
+    except TimeoutException:
+        element = None
+    waited = time.perf_counter() - start
+    readiness_stats.record(f"element:{condition}", waited, element is not None)
+    metrics.observe('phase_seconds', waited, phase='wait_element')
+    if element is None:
+        logger.warning(f"等待元素 {locator} 逾時 ({waited:.2f} 秒)")
+    return element
@@ -0,0 +1,37 @@
+import re
+import math
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+# 列表頁上方的筆數說明，例如「共 1,234 筆資料」
+TOTAL_COUNT_PATTERN = re.compile(r'共\s*有?\s*([\d,]+)\s*筆')
+
+def parse_total_count(text):
+    """從頁面文字解析查詢結果總筆數，找不到時回傳 None"""
+    match = TOTAL_COUNT_PATTERN.search(text or '')
+    if not match:
+        return None
+    return int(match.group(1).replace(',', ''))
+
+def find_page_param(current_url, next_page_url, next_page_number=2):
+    """
+    比較目前頁與下一頁的網址，找出代表頁碼的查詢參數名稱
+    只考慮兩者值不同 (或只出現在下一頁) 且值為 next_page_number 的參數，
+    找不到或有多個候選時回傳 None，由呼叫端改用下一頁連結逐頁爬取
+    """
+    current = dict(parse_qsl(urlparse(current_url or '').query, keep_blank_values=True))
+    candidates = [key for key, value in parse_qsl(urlparse(next_page_url).query, keep_blank_values=True)
+                  if value == str(next_page_number) and current.get(key) != value]
+    return candidates[0] if len(set(candidates)) == 1 else None
+
+def build_page_urls(next_page_url, page_param, first_page, last_page):
+    """以下一頁網址為樣板，產生 first_page 到 last_page 每一頁的網址"""
+    parsed = urlparse(next_page_url)
+    params = parse_qsl(parsed.query, keep_blank_values=True)
+    urls = []
+    for page in range(first_page, last_page + 1):
+        query = urlencode([(key, str(page) if key == page_param else value) for key, value in params])
+        urls.append(urlunparse(parsed._replace(query=query)))
+    return urls
+
+def count_pages(total_count, page_size):
+    return max(1, math.ceil(total_count / page_size))
@@ -1,15 +1,72 @@
+import time
 import logging
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from lxml import etree
+from site_spec import SiteSpec
+from http_fetcher import is_challenge_page
+from session_policy import SessionPolicy
+from page_readiness import wait_until_ready
+from crawl_metrics import metrics
+from tender_record import build_records
+from pagination import parse_total_count, find_page_param, build_page_urls, count_pages
 
 logger = logging.getLogger(__name__)
 
+# 預設站台 (政府電子採購網) 的規則，保留模組常數供其他工具使用
+_DEFAULT_SITE = SiteSpec.default()
+LIST_ROW_XPATH = _DEFAULT_SITE.list_rows_xpath
+DETAIL_TABLE_XPATH = _DEFAULT_SITE.detail_tables_xpath
+NEXT_PAGE_XPATH = _DEFAULT_SITE.next_page.xpath
+
+# 由 Performance API 取得本頁傳輸位元組數與載入時間
+PAGE_METRICS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    transfer_bytes: (nav ? nav.transferSize : 0) + resources.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+    resource_count: resources.length,
+    dom_ready_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null
+};
+"""
+
+# HTTP 模式下用來確認頁面類型的標記
+LIST_PAGE_MARKER = _DEFAULT_SITE.list_marker
+DETAIL_PAGE_MARKER = _DEFAULT_SITE.detail_marker
+
 class ProcurementCrawler:
-    def __init__(self, driver):
+    def __init__(self, driver, extract_engine='lxml', detail_engine='lxml', fetcher=None,
+                 session_policy=None, rate_controller=None, page_cache=None, replay=False, record_type='dict',
+                 site_spec=None):
+        """
+        extract_engine: 'lxml' 一次取得 page_source 後以 lxml 解析；
+                        'selenium' 逐列呼叫 find_elements (舊版行為，亦作為備援)
+        detail_engine: 詳情頁表格的解析方式，選項同上
+        fetcher: HttpFetcher，提供時優先以 HTTP 抓取頁面，遇到驗證頁才改用 driver
+        session_policy: SessionPolicy，決定何時清除 cookie，預設只在發生錯誤時清除
+        rate_controller: 共用的 RateController，每次開啟頁面前等待並回報回應狀況
+        page_cache: PageCache，開啟頁面前先查詢快取，取得有效頁面後寫入快取
+        replay: 為 True 時只從快取讀取頁面 (忽略 TTL)，不使用網路與瀏覽器
+        record_type: 'dict' 輸出原始字串的 dict；'typed' 輸出預算為數值、日期為 date 的 TenderRecord
+        site_spec: SiteSpec，列表列、欄位、下一頁與詳情頁表格的擷取規則，預設為政府電子採購網
+        """
         self.driver = driver
-        self.driver.delete_all_cookies()  # 初始化時清除所有 cookie
+        self.extract_engine = extract_engine
+        self.detail_engine = detail_engine
+        self.fetcher = fetcher
+        self.last_detail_parse_time = None
+        self.last_page_metrics = None
+        # 以 HTTP 取得的目前頁面 (html, url)；為 None 時代表頁面在瀏覽器中
+        self.page_snapshot = None
+        self.session_policy = session_policy or SessionPolicy()
+        self.rate_controller = rate_controller
+        self.page_cache = page_cache
+        self.replay = replay
+        self.record_type = record_type
+        self.site = site_spec or _DEFAULT_SITE
+        # 最近一次以瀏覽器開啟的網址，頁面解析成功後以此為鍵寫入快取
+        self.last_requested_url = None
+        self.last_load_seconds = None
+        if self.driver and self.session_policy.mode == 'always':
+            self.driver.delete_all_cookies()  # 舊版行為：初始化時清除所有 cookie
 
     def clear_cookies(self):
         """清除瀏覽器所有 cookie"""
@@ -41,171 +98,436 @@ class ProcurementCrawler:
             logger.error(f"XPath 提取元素失敗: {e}")
             return []
 
-    def extract_data(self):
+    def cached_page(self, url, marker=None):
+        """從頁面快取取得 (HTML, 最終網址)，沒有快取或內容不是預期的頁面時回傳 None"""
+        if not self.page_cache:
+            return None
+        marker = marker or self.site.list_marker
+        cached = self.page_cache.get(url, allow_expired=self.replay)
+        if cached and not is_challenge_page(cached[0], cached[1], marker):
+            return cached
+        return None
+
+    def store_page(self, url, html_content, final_url=None):
+        if self.page_cache and url and not self.replay:
+            self.page_cache.put(url, html_content, final_url)
+
+    def load_page(self, url, marker=None):
+        """優先使用快取，其次以 HTTP 抓取頁面，遇到驗證頁或登入頁時改用 Selenium 開啟"""
+        marker = marker or self.site.list_marker
+        cached = self.cached_page(url, marker)
+        if cached:
+            self.page_snapshot = cached
+            return True
+        if self.replay:
+            logger.warning(f"重播模式下快取中沒有此頁面: {url}")
+            return False
+
+        if self.fetcher:
+            # fetch 已驗證頁面標記並回報 RateController，這裡不再重複記錄
+            success, html_content, final_url = self.fetcher.fetch(url, marker)
+            if success:
+                self.page_snapshot = (html_content, final_url)
+                self.store_page(url, html_content, final_url)
+                return True
+            logger.warning(f"HTTP 抓取遇到驗證頁或失敗，改用 Selenium: {url}")
+        return self._load_with_browser(url)
+
+    def _load_with_browser(self, url):
+        if not self.driver:
+            logger.error("沒有可用的 WebDriver 可供備援")
+            return False
+        return self.get_page_with_selenium(url, self.driver)
+
+    def extract_data(self, engine=None):
+        """擷取列表頁資料，lxml 引擎失敗時自動退回 Selenium 逐列擷取"""
+        with metrics.timer('extract_data'):
+            items = self._extract_data(engine)
+        metrics.inc('pages_total', kind='list')
+        metrics.inc('rows_total', len(items))
+        return items
+
+    def _extract_data(self, engine=None):
+        if self.page_snapshot:
+            html_content, base_url = self.page_snapshot
+            return self.extract_items_from_html(html_content, base_url) or []
+
+        engine = engine or self.extract_engine
+        if engine == 'lxml':
+            items = self._extract_data_lxml()
+            if items is not None:
+                return items
+            logger.warning("lxml 擷取失敗，改用 Selenium 逐列擷取")
+        return self._extract_data_selenium()
+
+    def extract_items_from_html(self, html_content, base_url=None):
+        """從列表頁 HTML 擷取所有資料列，解析失敗時回傳 None"""
+        tree = self.parse_with_xpath(html_content)
+        if tree is None:
+            return None
+
+        items = []
+        for row in self.site.list_rows(tree):
+            try:
+                item = self.site.extract_row(row, base_url)
+                items.append(item)
+                logger.debug(item)
+            except Exception as e:
+                logger.error(f"處理行數據時出錯: {e}")
+                continue
+        return self._to_records(items)
+
+    def _to_records(self, items):
+        """依 record_type 將一整頁的 dict 轉為 TenderRecord"""
+        if self.record_type == 'typed':
+            return build_records(items)
+        return items
+
+    def _extract_data_lxml(self):
+        """等待表格出現後取得一次 page_source，以 lxml 解析全部資料列"""
+        status, _ = wait_until_ready(self.driver, 'list', conditions=self.site.page_conditions)
+        if status != 'ready':
+            return []
+
+        try:
+            html_content, current_url = self.driver.page_source, self.driver.current_url
+            items = self.extract_items_from_html(html_content, current_url)
+        except Exception as e:
+            logger.error(f"lxml 擷取列表資料失敗: {e}")
+            return None
+        if not items:
+            # DOM 中已有資料列卻解析不到，交由 Selenium 備援
+            return None
+        self.store_page(self.last_requested_url or current_url, html_content, current_url)
+        return items
+
+    def _extract_data_selenium(self):
+        # Selenium 只在以瀏覽器讀取元素時才載入，重播與 HTTP 模式不需付出匯入成本
+        from selenium.webdriver.common.by import By
+
         items = []
         try:
             # 等待表格加載
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, '//table[@id="tpam"]/tbody/tr'))
-            )
+            status, _ = wait_until_ready(self.driver, 'list', conditions=self.site.page_conditions)
+            if status != 'ready':
+                return items
 
-            rows = self.driver.find_elements(By.XPATH, '//table[@id="tpam"]/tbody/tr')
+            rows = self.driver.find_elements(By.XPATH, self.site.list_rows_xpath)
 
             for row in rows:
                 try:
-                    tender_case_no = row.find_elements(By.XPATH, './td[3]')[0].text.strip() if row.find_elements(By.XPATH, './td[3]') else ''
-                    org_name = row.find_elements(By.XPATH, './td[2]')[0].text.strip() if row.find_elements(By.XPATH, './td[2]') else ''
-
-                    tender_name_elem = row.find_elements(By.XPATH, './td[3]/a/span')
-                    tender_name = tender_name_elem[0].text.strip() if tender_name_elem else ''
-
-                    tender_type = row.find_elements(By.XPATH, './td[5]')[0].text.strip() if row.find_elements(By.XPATH, './td[5]') else ''
-                    announce_date = row.find_elements(By.XPATH, './td[7]')[0].text.strip() if row.find_elements(By.XPATH, './td[7]') else ''
-                    tender_deadline = row.find_elements(By.XPATH, './td[8]')[0].text.strip() if row.find_elements(By.XPATH, './td[8]') else ''
-
-                    budget_elem = row.find_elements(By.XPATH, './td[9]/span')
-                    budget = budget_elem[0].text.strip() if budget_elem else ''
-
-                    detail_link_elem = row.find_elements(By.XPATH, './td[3]/a')
-                    detail_link = detail_link_elem[0].get_attribute('href') if detail_link_elem else ''
-
-                    item = {
-                        'tender_case_no': tender_case_no,
-                        'org_name': org_name,
-                        'tender_name': tender_name,
-                        'tender_type': tender_type,
-                        'announce_date': announce_date,
-                        'tender_deadline': tender_deadline,
-                        'budget': budget,
-                        'detail_link': detail_link
-                    }
+                    item = {}
+                    for field in self.site.fields:
+                        elements = row.find_elements(By.XPATH, field.xpath)
+                        if not elements:
+                            item[field.name] = ''
+                        elif field.attr:
+                            # Selenium 的 href 屬性已是絕對網址
+                            item[field.name] = elements[0].get_attribute(field.attr)
+                        else:
+                            item[field.name] = elements[0].text.strip()
                     items.append(item)
-                    print(item)
+                    logger.debug(f"列表資料: {item}")
                 except Exception as e:
-                    print(f"處理行數據時出錯: {str(e)}")
+                    logger.error(f"處理行數據時出錯: {e}")
                     continue
         except Exception as e:
-            print(f"提取數據時出錯: {str(e)}")
+            logger.error(f"提取數據時出錯: {e}")
 
-        return items
+        return self._to_records(items)
 
     def get_next_page_link(self):
         try:
-            next_page_elements = self.driver.find_elements(By.XPATH, '//span[@id="pagelinks"]/a[contains(text(), "下一頁")]')
+            if self.page_snapshot:
+                html_content, base_url = self.page_snapshot
+                tree = self.parse_with_xpath(html_content)
+                return self.site.extract_next_page(tree, base_url) if tree is not None else None
+
+            if not self.site.next_page:
+                return None
+            from selenium.webdriver.common.by import By
+            next_page_elements = self.driver.find_elements(By.XPATH, self.site.next_page.xpath)
             if next_page_elements:
-                return next_page_elements[0].get_attribute('href')
+                return next_page_elements[0].get_attribute(self.site.next_page.attr or 'href')
             else:
                 return None
         except Exception as e:
-            print(f"獲取下一頁鏈接時出錯: {str(e)}")
+            logger.error(f"獲取下一頁鏈接時出錯: {e}")
             return None
 
-    def parse_detail_page(self, url, max_retries=3):
-        print(f"正在請求 URL: {url}")
-        all_data = {}
-        retry_count = 0
+    def current_page(self):
+        """回傳目前頁面的 (HTML, URL)，HTTP 抓取的頁面優先於瀏覽器頁面"""
+        if self.page_snapshot:
+            return self.page_snapshot
+        return self.driver.page_source, self.driver.current_url
 
-        while retry_count < max_retries:
-            try:
-                # 每次重試前清除 cookie
-                self.clear_cookies()
-                
-                # 使用 Selenium 訪問詳情頁面
-                if not self.get_page_with_selenium(url, self.driver):
-                    print(f"無法獲取詳情頁面，重試次數：{retry_count + 1}")
-                    retry_count += 1
-                    continue
+    def get_total_count(self):
+        """讀取目前列表頁顯示的查詢結果總筆數，無法解析時回傳 None"""
+        try:
+            tree = self.parse_with_xpath(self.current_page()[0])
+            text = self.site.total_count_text(tree) if tree is not None else None
+            return parse_total_count(text) if text else None
+        except Exception as e:
+            logger.error(f"解析總筆數時出錯: {e}")
+            return None
 
-                # 增加明確的等待時間
-                try:
-                    print("等待頁面主要內容載入...")
-                    WebDriverWait(self.driver, 20).until(
-                        EC.presence_of_element_located((By.XPATH, '//div[@id="printRange"]'))
-                    )
-                    # 額外等待確保動態內容完全載入
-                    WebDriverWait(self.driver, 10).until(
-                        lambda d: len(d.find_elements(By.XPATH, '//div[@id="printRange"]/table')) > 0
-                    )
-                except Exception as wait_error:
-                    print(f"等待頁面載入超時: {str(wait_error)}")
-                    retry_count += 1
-                    continue
+    def build_page_urls(self, page_size):
+        """
+        依總筆數與每頁筆數直接產生第 2 頁之後所有列表頁的網址
+        無法取得總筆數或頁碼參數時回傳 None，由呼叫端改用下一頁連結逐頁爬取
+        """
+        total_count = self.get_total_count()
+        if total_count is None:
+            logger.warning("無法解析查詢結果總筆數")
+            return None
 
-                print("頁面 DOM 獲取成功")
+        total_pages = count_pages(total_count, page_size)
+        if total_pages == 1:
+            return []
 
-                # 使用 JavaScript 確保頁面完全加載
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                
-                # 提取表格並處理
-                tables = self.driver.find_elements(By.XPATH, '//div[@id="printRange"]/table')
-                if not tables:
-                    print("未找到任何表格，可能是頁面結構異常")
-                    retry_count += 1
-                    continue
+        next_page_link = self.get_next_page_link()
+        page_param = find_page_param(self.current_page()[1], next_page_link) if next_page_link else None
+        if not page_param:
+            logger.warning("無法從第一頁與下一頁的網址確定頁碼參數")
+            return None
+
+        logger.info(f"查詢結果共 {total_count} 筆，{total_pages} 頁")
+        return build_page_urls(next_page_link, page_param, 2, total_pages)
+
+    def extract_pages(self, urls):
+        """
+        抓取並解析多個列表頁，HTTP 模式下以有上限的並行數同時抓取
+        回傳與 urls 順序相同的資料清單，無法取得的頁面為 None
+        """
+        cached = {url: self.cached_page(url) for url in urls}
+        missing = [url for url in urls if not cached[url]]
+        if self.fetcher and missing and not self.replay:
+            fetched = dict(zip(missing, self.fetcher.fetch_many(missing, expected_marker=self.site.list_marker)))
+        else:
+            fetched = {}
 
-                print(f"找到 {len(tables)} 個表格")
+        pages = []
+        for url in urls:
+            page = cached[url]
+            if not page and url in fetched:
+                success, html_content, final_url = fetched[url]
+                if success:
+                    page = (html_content, final_url)
+                    self.store_page(url, html_content, final_url)
+
+            if page:
+                self.page_snapshot = page
+                with metrics.timer('extract_data'):
+                    items = self.extract_items_from_html(*page) or []
+                metrics.inc('pages_total', kind='list')
+                metrics.inc('rows_total', len(items))
+                pages.append(items)
+            elif url in fetched:
+                # 已以 HTTP 抓取過但遇到驗證頁或失敗，直接改用 Selenium，不再重複以 HTTP 抓取
+                logger.warning(f"HTTP 抓取遇到驗證頁或失敗，改用 Selenium: {url}")
+                pages.append(self.extract_data() if self._load_with_browser(url) else None)
+            elif self.load_page(url):
+                pages.append(self.extract_data())
+            else:
+                pages.append(None)
+        return pages
+
+    def parse_detail_tables(self, html_content):
+        """以一次 lxml 解析將詳情頁所有表格轉為 {表格名稱: {欄位: 值}}"""
+        tree = self.parse_with_xpath(html_content)
+        if tree is None:
+            return {}
+        return self.site.extract_detail_tables(tree)
+
+    def _parse_detail_tables_selenium(self):
+        """逐一透過 find_elements 讀取詳情頁表格 (舊版行為)"""
+        from selenium.webdriver.common.by import By
+
+        all_data = {}
+        tables = self.driver.find_elements(By.XPATH, self.site.detail_tables_xpath)
+        logger.debug(f"找到 {len(tables)} 個表格")
 
-                for i, table in enumerate(tables):
+        for i, table in enumerate(tables):
+            try:
+                logger.debug(f"處理第 {i+1} 個表格")
+                captions = table.find_elements(By.XPATH, './caption')
+                table_name = captions[0].text.strip() if captions else f'unnamed_table_{i}'
+
+                table_data = {}
+                rows = table.find_elements(By.XPATH, './/tr')
+
+                for row in rows:
                     try:
-                        print(f"處理第 {i+1} 個表格")
-                        captions = table.find_elements(By.XPATH, './caption')
-                        table_name = captions[0].text.strip() if captions else f'unnamed_table_{i}'
-                        
-                        table_data = {}
-                        rows = table.find_elements(By.XPATH, './/tr')
-                        
-                        for row in rows:
-                            try:
-                                cols = row.find_elements(By.XPATH, './/td')
-                                if len(cols) >= 2:
-                                    label = cols[0].text.strip()
-                                    value = cols[1].text.strip()
-                                    if label:
-                                        table_data[label] = value
-                            except Exception as row_error:
-                                print(f"處理表格行時發生錯誤: {str(row_error)}")
-                                continue
-                        
-                        if table_data:
-                            all_data[table_name] = table_data
-                    except Exception as table_error:
-                        print(f"處理表格時發生錯誤: {str(table_error)}")
+                        cols = row.find_elements(By.XPATH, './/td')
+                        if len(cols) >= 2:
+                            label = cols[0].text.strip()
+                            value = cols[1].text.strip()
+                            if label:
+                                table_data[label] = value
+                    except Exception as row_error:
+                        logger.error(f"處理表格行時發生錯誤: {row_error}")
                         continue
 
-                if all_data:
-                    print(f"成功解析頁面，包含 {len(all_data)} 個表格")
-                    return all_data
-                
-                retry_count += 1
-                
-            except Exception as e:
-                print(f"解析詳情頁面時發生錯誤: {str(e)}")
-                retry_count += 1
-                if retry_count < max_retries:
-                    print(f"將在 3 秒後重試... ({retry_count + 1}/{max_retries})")
-                    import time
-                    time.sleep(3)
+                if table_data:
+                    all_data[table_name] = table_data
+            except Exception as table_error:
+                logger.error(f"處理表格時發生錯誤: {table_error}")
                 continue
+        return all_data
 
-        print(f"達到最大重試次數 ({max_retries})，返回已收集的數據")
+    def parse_detail_page(self, url, engine=None):
+        """
+        爬取並解析詳情頁，每次呼叫只嘗試一次；失敗的頁面由 RetryQueue 依退避時間重排
+        engine: 'lxml' 一次解析 page_source；'selenium' 逐一讀取表格元素
+        """
+        with metrics.timer('parse_detail_page'):
+            all_data = self._parse_detail_page(url, engine)
+        metrics.inc('pages_total', kind='detail', result='success' if all_data else 'failure')
         return all_data
 
-    def get_page_with_selenium(self, url, driver):
+    def _parse_detail_page(self, url, engine):
+        engine = engine or self.detail_engine
+        logger.debug(f"正在請求 URL: {url}")
+        all_data = {}
+
+        cached = self.cached_page(url, self.site.detail_marker)
+        if cached:
+            all_data = self.parse_detail_tables(cached[0])
+            if all_data or self.replay:
+                return all_data
+        elif self.replay:
+            logger.warning(f"重播模式下快取中沒有此詳情頁: {url}")
+            return all_data
+
+        if self.fetcher:
+            all_data = self._parse_detail_page_http(url)
+            if all_data:
+                return all_data
+            if not self.driver:
+                return all_data
+
         try:
-            # 清除現有的 cookie
+            all_data = self._parse_detail_page_selenium(url, engine)
+        except Exception as e:
+            metrics.record_failure(e, 'detail')
+            self._clear_cookies_after_failure()
+            raise
+        if not all_data:
+            self._clear_cookies_after_failure()
+        return all_data
+
+    def _clear_cookies_after_failure(self):
+        # 失敗後依 session 策略清除 cookie，下一次嘗試 (由 RetryQueue 排程) 使用新的 session
+        if self.session_policy.should_clear_on_error():
             self.clear_cookies()
-            
+
+    def _parse_detail_page_selenium(self, url, engine):
+        # 使用 Selenium 訪問詳情頁面，等待詳情表格後才回報這次請求的結果
+        if not self.get_page_with_selenium(url, self.driver, record_result=False):
+            logger.warning(f"無法獲取詳情頁面: {url}")
+            return {}
+
+        # 等待詳情表格出現
+        status, waited = wait_until_ready(self.driver, 'detail', conditions=self.site.page_conditions)
+        self._record_page_load(self.last_load_seconds, success=status == 'ready')
+        if status != 'ready':
+            logger.warning(f"等待詳情頁載入超時 ({waited:.2f} 秒): {url}")
+            return {}
+
+        logger.debug(f"頁面 DOM 獲取成功，等待 {waited:.2f} 秒")
+
+        # 提取表格並處理
+        parse_start = time.perf_counter()
+        html_content = self.driver.page_source if engine == 'lxml' or self.page_cache else None
+        if engine == 'lxml':
+            all_data = self.parse_detail_tables(html_content)
+        else:
+            all_data = self._parse_detail_tables_selenium()
+        self.last_detail_parse_time = time.perf_counter() - parse_start
+        logger.info(f"詳情頁解析耗時 {self.last_detail_parse_time * 1000:.1f} ms "
+                    f"(engine={engine}, 表格數={len(all_data)})")
+
+        if all_data:
+            logger.debug(f"成功解析頁面，包含 {len(all_data)} 個表格")
+            self.store_page(url, html_content, self.driver.current_url)
+        return all_data
+
+    def _parse_detail_page_http(self, url):
+        """以 HTTP 抓取詳情頁並解析，遇到驗證頁時回傳空字典交由 Selenium 處理"""
+        success, html_content, final_url = self.fetcher.fetch(url, self.site.detail_marker)
+        if not success:
+            logger.warning(f"HTTP 抓取詳情頁遇到驗證頁或失敗，改用 Selenium: {url}")
+            return {}
+
+        parse_start = time.perf_counter()
+        all_data = self.parse_detail_tables(html_content)
+        self.last_detail_parse_time = time.perf_counter() - parse_start
+        logger.info(f"詳情頁解析耗時 {self.last_detail_parse_time * 1000:.1f} ms "
+                    f"(engine=http, 表格數={len(all_data)})")
+        if all_data:
+            self.store_page(url, html_content, final_url)
+        return all_data
+
+    def _record_request(self, latency=None, success=True):
+        """將請求結果回報給 RateController 以調整後續的請求間隔"""
+        if self.rate_controller:
+            self.rate_controller.record(latency, success)
+
+    def _record_page_load(self, elapsed, success=True):
+        """每次以瀏覽器開啟頁面只回報一次結果：RateController 與 session 策略的頁面延遲統計"""
+        self._record_request(elapsed, success)
+        if success:
+            self.session_policy.record_page(elapsed)
+
+    def log_page_metrics(self, driver, elapsed):
+        """記錄本頁的傳輸量與載入時間，依 WebDriver 設定檔分別比較"""
+        profile = getattr(driver, 'crawler_profile', 'default')
+        try:
+            page_stats = driver.execute_script(PAGE_METRICS_SCRIPT) or {}
+        except Exception as e:
+            logger.debug(f"取得頁面效能資料失敗: {e}")
+            page_stats = {}
+        self.last_page_metrics = dict(page_stats, profile=profile, load_seconds=elapsed)
+        logger.info(f"頁面載入 {elapsed:.2f} 秒 (DOM 就緒 {page_stats.get('dom_ready_ms') or 0:.0f} ms)，"
+                    f"傳輸 {(page_stats.get('transfer_bytes') or 0) / 1024:.1f} KB，"
+                    f"資源 {page_stats.get('resource_count', 0)} 個 (profile={profile})")
+        return self.last_page_metrics
+
+    def get_page_with_selenium(self, url, driver, record_result=True):
+        """
+        開啟頁面並等待 document 就緒；record_result 為 False 時由呼叫端在確認頁面內容後
+        以 _record_page_load(self.last_load_seconds, ...) 回報，載入失敗則一律在此回報
+        """
+        from selenium.common.exceptions import TimeoutException
+
+        self.page_snapshot = None
+        self.last_requested_url = url
+        try:
+            # 依 session 策略決定是否先清除 cookie
+            if self.session_policy.should_clear_before_request():
+                self.clear_cookies()
+
+            if self.rate_controller:
+                self.rate_controller.wait()
+            load_start = time.perf_counter()
             driver.get(url)
-            # 增加頁面加載等待時間
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # 印出當前的 cookie 以便偵錯
-            cookies = driver.get_cookies()
-            logger.info(f"目前的 cookies: {cookies}")
-            
+            if not wait_until_ready(driver, 'document')[0]:
+                raise TimeoutException(f"頁面未載入: {url}")
+            elapsed = time.perf_counter() - load_start
+            metrics.observe('phase_seconds', elapsed, phase='navigation')
+            self.last_load_seconds = elapsed
+            if record_result:
+                self._record_page_load(elapsed)
+            self.log_page_metrics(driver, elapsed)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"目前的 cookie 數量: {len(driver.get_cookies())}")
+
             return True
         except Exception as e:
             logger.error(f"請求失敗: {str(e)}")
+            metrics.record_failure(e, 'navigation')
+            self._record_request(success=False)
+            if self.session_policy.should_clear_on_error():
+                self.clear_cookies()
             return False
@@ -0,0 +1,68 @@
+import time
+import random
+import logging
+import threading
+from crawl_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class RateController:
+    """
+    依回應狀況自動調整請求間隔的 AIMD 控制器，所有抓取流程與 worker 共用同一個實例
+    回應正常且快速時逐步縮短間隔 (加法)；逾時、錯誤頁或回應變慢時倍增間隔 (乘法)
+    """
+
+    def __init__(self, min_delay=1.0, max_delay=30.0, initial_delay=3.0, decrease_step=0.25,
+                 backoff_factor=2.0, slow_threshold=5.0, jitter=0.2, clock=time.monotonic, sleep=time.sleep):
+        """
+        min_delay / max_delay: 請求間隔的下限與上限 (秒)
+        decrease_step: 每次正常回應縮短的秒數
+        backoff_factor: 每次失敗時間隔乘上的倍數
+        slow_threshold: 回應時間超過此秒數時視為伺服器吃緊
+        jitter: 間隔的隨機浮動比例，避免請求時間過於規律
+        clock / sleep: 單調時鐘與等待函式，測試時可替換
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.decrease_step = decrease_step
+        self.backoff_factor = backoff_factor
+        self.slow_threshold = slow_threshold
+        self.jitter = jitter
+        self.clock = clock
+        self.sleep = sleep
+        self.delay = min(max(initial_delay, min_delay), max_delay)
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(**config.get('rate_control', {}))
+
+    def wait(self):
+        """預約下一個可用的請求時段並等待到該時間點，回傳等待秒數"""
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next_time)
+            spread = self.delay * self.jitter
+            self._next_time = slot + random.uniform(self.delay - spread, self.delay + spread)
+        wait_time = slot - now
+        if wait_time > 0:
+            self.sleep(wait_time)
+        metrics.observe('phase_seconds', max(wait_time, 0.0), phase='sleep')
+        return wait_time
+
+    def record(self, latency=None, success=True):
+        """回報一次請求結果，latency 為回應秒數，success 為 False 代表逾時、錯誤或驗證頁"""
+        with self._lock:
+            previous = self.delay
+            if not success:
+                self.delay = min(self.max_delay, self.delay * self.backoff_factor)
+            elif latency is not None and latency > self.slow_threshold:
+                self.delay = min(self.max_delay, self.delay * (1 + self.backoff_factor) / 2)
+            else:
+                self.delay = max(self.min_delay, self.delay - self.decrease_step)
+            current = self.delay
+
+        if current > previous:
+            logger.info(f"請求間隔調升為 {current:.2f} 秒 (回應{'失敗' if not success else '變慢'})")
+        return current
@@ -0,0 +1,178 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 招標資料的欄位順序，供需要固定結構的輸出格式使用
+TENDER_COLUMNS = (
+    'tender_case_no',
+    'org_name',
+    'tender_name',
+    'tender_type',
+    'announce_date',
+    'tender_deadline',
+    'budget',
+    'detail_link',
+    'detail_data',
+)
+
+class RecordSink:
+    """逐筆寫出資料的輸出介面，寫入後不需在記憶體中保留資料"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        logger.info(f"已輸出 {self.count} 筆資料至 {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class JsonArraySink(RecordSink):
+    """逐筆寫出 JSON 陣列，輸出格式與 json.dump(data, indent=2) 相同"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        text = json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        self._file.write(('[\n  ' if self.count == 0 else ',\n  ') + text)
+        self.count += 1
+
+    def close(self):
+        self._file.write('\n]' if self.count else '[]')
+        self._file.close()
+        super().close()
+
+class JsonLinesSink(RecordSink):
+    """JSON Lines 格式，每行一筆資料"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+class ParquetSink(RecordSink):
+    """
+    批次寫入 Parquet，每 batch_size 筆寫成一個 row group；巢狀欄位以 JSON 字串保存
+    Parquet 的結構固定，columns 以外的欄位無法寫入，第一次遇到時會記錄警告
+    """
+
+    def __init__(self, path, columns=None, batch_size=1000, typed=False):
+        """typed: 為 True 時日期存為 date32、預算存為數值，欄位固定為 TenderRecord.FIELDS"""
+        super().__init__(path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("輸出 Parquet 需要安裝 pyarrow：pip install pyarrow")
+        self._pa = pa
+        self._pq = pq
+        self.batch_size = batch_size
+        self.typed = typed
+        self.schema = pa.schema([(column, pa.string()) for column in columns]) if columns and not typed else None
+        self._writer = None
+        self._batch = []
+        self._dropped = set()
+        if typed and columns:
+            from tender_record import TenderRecord
+            self._warn_dropped(set(columns) - set(TenderRecord.FIELDS))
+
+    def _warn_dropped(self, fields):
+        fields = fields - self._dropped
+        if fields:
+            self._dropped |= fields
+            logger.warning(f"Parquet 輸出沒有欄位 {', '.join(sorted(fields))}，這些欄位不會寫入 {self.path}")
+
+    @staticmethod
+    def _flatten_value(value):
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def write(self, record):
+        if self.typed:
+            self._batch.append(record)
+        else:
+            self._batch.append({key: self._flatten_value(value) for key, value in record.items()})
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        if self.typed:
+            from tender_record import records_to_columns, columns_to_arrow
+            table = columns_to_arrow(records_to_columns(self._batch))
+            if self.schema is None:
+                self.schema = table.schema
+            table = table.cast(self.schema)
+            if self._writer is None:
+                self._writer = self._pq.ParquetWriter(self.path, self.schema)
+            self._writer.write_table(table)
+            self._batch = []
+            return
+        if self.schema is None:
+            self.schema = self._pa.Table.from_pylist(self._batch).schema
+        else:
+            self._warn_dropped({key for record in self._batch for key in record} - set(self.schema.names))
+        table = self._pa.Table.from_pylist(self._batch, schema=self.schema)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, self.schema)
+        self._writer.write_table(table)
+        self._batch = []
+
+    def close(self):
+        self._flush()
+        if self._writer:
+            self._writer.close()
+        super().close()
+
+SINK_EXTENSIONS = {
+    'json': '.json',
+    'jsonl': '.jsonl',
+    'parquet': '.parquet',
+    'sqlite': '.sqlite',
+}
+
+def create_sink(output_format, path, record_type='dict', columns=None):
+    """
+    依輸出格式建立對應的 sink，path 的副檔名會依格式調整
+    record_type 為 'typed' 時 Parquet 以日期與數值型別保存公告日、截止日與預算
+    columns 為 Parquet 的欄位順序 (通常取自 SiteSpec.record_columns)，未指定時使用 TENDER_COLUMNS
+    """
+    if output_format not in SINK_EXTENSIONS:
+        raise ValueError(f"不支援的輸出格式: {output_format}")
+    path = os.path.splitext(path)[0] + SINK_EXTENSIONS[output_format]
+    if output_format == 'jsonl':
+        return JsonLinesSink(path)
+    if output_format == 'sqlite':
+        from sqlite_store import SqliteSink  # sqlite_store 依賴本模組，延後載入
+        return SqliteSink(path)
+    if output_format == 'parquet':
+        return ParquetSink(path, columns=columns or TENDER_COLUMNS, typed=record_type == 'typed')
+    return JsonArraySink(path)
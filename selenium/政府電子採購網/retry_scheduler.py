@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import heapq
+import random
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from crawl_metrics import metrics
+from tender_record import as_dict
+
+logger = logging.getLogger(__name__)
+
+def backoff_delay(attempt, base_delay=5.0, max_delay=300.0, jitter=0.5):
+    """第 attempt 次重試前的等待秒數：指數成長並加上 ±jitter 比例的隨機浮動"""
+    delay = min(max_delay, base_delay * (2 ** max(attempt - 1, 0)))
+    spread = delay * jitter
+    return max(0.0, random.uniform(delay - spread, delay + spread))
+
+class CircuitBreaker:
+    """
+    觀察最近 window 次請求，失敗比例達 failure_ratio 時斷路 (open)，暫停所有請求 cooldown 秒
+    冷卻後進入半開 (half_open) 只放行一個試探請求，成功才恢復，失敗則再次斷路
+    clock 為回傳秒數的單調時鐘，測試時可替換
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window=20, failure_ratio=0.5, min_calls=10, cooldown=60.0, clock=time.monotonic):
+        self.window = window
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self._results = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """回傳 0 表示可以送出請求，否則為還需等待的秒數"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.cooldown - self.clock()
+                if remaining > 0:
+                    return remaining
+                self.state = self.HALF_OPEN
+                self._probing = False
+                logger.info("斷路器冷卻結束，放行一個試探請求")
+            if self._probing:
+                return 1.0
+            self._probing = True
+            return 0.0
+
+    def release_probe(self):
+        """取得試探名額卻沒有送出請求時歸還，避免斷路器一直停在半開"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+
+    def record(self, success):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                if success:
+                    self.state = self.CLOSED
+                    self._results.clear()
+                    logger.info("試探請求成功，斷路器恢復")
+                else:
+                    self._open()
+                return
+            self._results.append(success)
+            failures = self._results.count(False)
+            if self.state == self.CLOSED and len(self._results) >= self.min_calls \
+                    and failures / len(self._results) >= self.failure_ratio:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+        metrics.inc('circuit_breaker_open_total')
+        logger.warning(f"最近 {len(self._results)} 次請求失敗比例過高，斷路器暫停所有請求 {self.cooldown:.0f} 秒")
+
+class DeadLetterFile:
+    """重試次數用盡的項目以 JSON Lines 追加寫入，之後可單獨重新執行"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        retry_config = config.get('retry', {})
+        path = retry_config.get('dead_letter_file') or \
+            os.path.join(config.get('data_folder', '.'), 'dead_letters.jsonl')
+        return cls(path)
+
+    def append(self, item, attempts, error=None, target_url=None):
+        record = dict(as_dict(item))
+        record.pop('detail_data', None)
+        entry = {
+            'record': record,
+            'attempts': attempts,
+            'error': error,
+            'target_url': target_url,
+            'failed_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        with self._lock:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        metrics.inc('dead_letters_total')
+        logger.error(f"重試 {attempts} 次仍失敗，已寫入 {self.path}: {record.get('detail_link')}")
+
+    def drain(self):
+        """
+        取出所有項目準備重新執行：檔案先改名為 .replaying，執行中失敗的項目會寫回原檔案
+        上次重新執行中斷時留下的 .replaying 檔一併取出
+        """
+        replaying_path = f"{self.path}.replaying"
+        with self._lock:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as src, open(replaying_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+        if not os.path.exists(replaying_path):
+            return []
+
+        entries = []
+        seen = set()
+        with open(replaying_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                link = entry['record'].get('detail_link')
+                if link and link not in seen:
+                    seen.add(link)
+                    entries.append(entry)
+        return entries
+
+    def finish_drain(self):
+        try:
+            os.remove(f"{self.path}.replaying")
+        except FileNotFoundError:
+            pass
+
+class RetryQueue:
+    """
+    可供多個 worker 共用的工作佇列：失敗的項目依指數退避時間延後重排，不阻塞其他項目
+    斷路器斷開時 get 會等待冷卻；重試次數用盡時呼叫 on_exhausted(key, attempts, error)
+    clock / sleep 預設為 time.monotonic / time.sleep，測試時可替換
+    """
+
+    def __init__(self, max_attempts=4, base_delay=5.0, max_delay=300.0, jitter=0.5,
+                 breaker=None, on_exhausted=None, clock=time.monotonic, sleep=time.sleep):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.breaker = breaker
+        self.on_exhausted = on_exhausted
+        self.clock = clock
+        self.sleep = sleep
+        self._fresh = deque()
+        self._deferred = []
+        self._sequence = 0
+        self._in_flight = 0
+        self.exhausted = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config, on_exhausted=None):
+        retry_config = config.get('retry', {})
+        breaker = CircuitBreaker(window=retry_config.get('breaker_window', 20),
+                                 failure_ratio=retry_config.get('breaker_failure_ratio', 0.5),
+                                 min_calls=retry_config.get('breaker_min_calls', 10),
+                                 cooldown=retry_config.get('breaker_cooldown', 60))
+        return cls(max_attempts=retry_config.get('max_attempts', 4),
+                   base_delay=retry_config.get('base_delay', 5),
+                   max_delay=retry_config.get('max_delay', 300),
+                   jitter=retry_config.get('jitter', 0.5),
+                   breaker=breaker, on_exhausted=on_exhausted)
+
+    def put(self, key):
+        with self._condition:
+            self._fresh.append((key, 1))
+            self._condition.notify()
+
+    def pending(self):
+        with self._condition:
+            return len(self._fresh) + len(self._deferred)
+
+    def get(self):
+        """
+        取出下一個 (key, attempt)：已到期的重試優先，其次為新項目
+        沒有可執行的項目時等待；佇列清空且沒有執行中的項目時回傳 None
+        """
+        while True:
+            wait_breaker = self.breaker.allow() if self.breaker else 0.0
+            if wait_breaker > 0:
+                self.sleep(min(wait_breaker, 5.0))
+                continue
+            with self._condition:
+                now = self.clock()
+                if self._deferred and self._deferred[0][0] <= now:
+                    _, _, task = heapq.heappop(self._deferred)
+                elif self._fresh:
+                    task = self._fresh.popleft()
+                else:
+                    if self.breaker:
+                        self.breaker.release_probe()
+                    if self._deferred:
+                        self._condition.wait(self._deferred[0][0] - now)
+                    elif self._in_flight:
+                        self._condition.wait()
+                    else:
+                        return None
+                    continue
+                self._in_flight += 1
+                return task
+
+    def done(self, task, success, error=None):
+        """回報一個項目的結果，失敗時排入延後佇列或交給 on_exhausted"""
+        key, attempt = task
+        if self.breaker:
+            self.breaker.record(success)
+        exhausted = False
+        with self._condition:
+            self._in_flight -= 1
+            if not success:
+                if attempt < self.max_attempts:
+                    delay = backoff_delay(attempt, self.base_delay, self.max_delay, self.jitter)
+                    self._sequence += 1
+                    heapq.heappush(self._deferred, (self.clock() + delay, self._sequence, (key, attempt + 1)))
+                    metrics.inc('retries_total', phase='detail')
+                    logger.warning(f"第 {attempt} 次嘗試失敗，{delay:.1f} 秒後重試 ({key}): {error or '沒有資料'}")
+                else:
+                    self.exhausted += 1
+                    exhausted = True
+            self._condition.notify_all()
+        if exhausted and self.on_exhausted:
+            self.on_exhausted(key, attempt, error)
@@ -1,4 +1,4 @@
 # 網頁元素等待設定
-ELEMENT_WAIT_TIMEOUT = 60  # 增加等待時間至 60 秒
-ELEMENT_POLL_FREQUENCY = 0.5  # 每 0.5 秒檢查一次
+ELEMENT_WAIT_TIMEOUT = 10  # 單一條件的等待上限，逾時不重新整理頁面
+ELEMENT_POLL_FREQUENCY = 0.2  # 每 0.2 秒檢查一次
 MAX_RETRIES = 3  # 最大重試次數
@@ -1,23 +1,35 @@
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import logging
 from .settings import ELEMENT_WAIT_TIMEOUT, ELEMENT_POLL_FREQUENCY, MAX_RETRIES
 
+try:
+    # 爬蟲目錄在 sys.path 上時 (例如由 main.py 執行)，等待時間由 page_readiness 統一記錄
+    from page_readiness import wait_for_locator
+except ImportError:
+    wait_for_locator = None
+
+def _wait_presence(driver, xpath, timeout):
+    """等待元素出現，逾時回傳 None"""
+    if wait_for_locator:
+        return wait_for_locator(driver, xpath, timeout=timeout, poll_frequency=ELEMENT_POLL_FREQUENCY)
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    try:
+        return WebDriverWait(driver, timeout, ELEMENT_POLL_FREQUENCY).until(
+            EC.presence_of_element_located(("xpath", xpath))
+        )
+    except TimeoutException:
+        return None
+
 def wait_for_element(driver, xpath, timeout=ELEMENT_WAIT_TIMEOUT, retries=MAX_RETRIES):
     """
-    等待元素出現，如果超時則重試
+    等待元素出現，逾時則繼續等待 (不重新整理頁面)，最多 retries 次後拋出 TimeoutException
     """
     for attempt in range(retries):
-        try:
-            element = WebDriverWait(driver, timeout, ELEMENT_POLL_FREQUENCY).until(
-                EC.presence_of_element_located(("xpath", xpath))
-            )
+        element = _wait_presence(driver, xpath, timeout)
+        if element is not None:
             return element
-        except TimeoutException:
-            if attempt < retries - 1:
-                logging.warning(f"等待元素 {xpath} 超時，正在進行第 {attempt + 1} 次重試")
-                continue
-            else:
-                logging.error(f"等待元素 {xpath} 已超過最大重試次數")
-                raise
+        if attempt < retries - 1:
+            logging.warning(f"等待元素 {xpath} 超時，正在進行第 {attempt + 1} 次重試")
+    logging.error(f"等待元素 {xpath} 已超過最大重試次數")
+    raise TimeoutException(f"等待元素 {xpath} 逾時")
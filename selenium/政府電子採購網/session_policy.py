@@ -0,0 +1,60 @@
+import logging
+import statistics
+
+logger = logging.getLogger(__name__)
+
+class SessionPolicy:
+    """
+    決定何時清除瀏覽器 cookie 的策略
+    keep: 全程沿用同一個 session
+    rotate: 每 rotate_every 頁清除一次 cookie，開啟新的 session
+    clear_on_error: 只在請求失敗或重試時清除
+    always: 每次請求前都清除 (舊版行為)
+    """
+
+    MODES = ('keep', 'rotate', 'clear_on_error', 'always')
+
+    def __init__(self, mode='clear_on_error', rotate_every=50):
+        if mode not in self.MODES:
+            raise ValueError(f"不支援的 session 策略: {mode}")
+        self.mode = mode
+        self.rotate_every = max(1, rotate_every)
+        self.page_count = 0
+        self.latencies = []
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('session_policy', 'clear_on_error'), config.get('session_rotate_every', 50))
+
+    def should_clear_before_request(self):
+        """每次請求前呼叫，回傳是否需要先清除 cookie"""
+        if self.mode == 'always':
+            return True
+        return self.mode == 'rotate' and self.page_count > 0 and self.page_count % self.rotate_every == 0
+
+    def should_clear_on_error(self):
+        return self.mode in ('clear_on_error', 'rotate')
+
+    def record_page(self, latency):
+        self.page_count += 1
+        self.latencies.append(latency)
+
+    def summary(self):
+        """回傳本策略的頁面延遲統計 (秒)"""
+        if not self.latencies:
+            return {'policy': self.mode, 'pages': 0}
+        ordered = sorted(self.latencies)
+        return {
+            'policy': self.mode,
+            'pages': len(ordered),
+            'mean': statistics.mean(ordered),
+            'p50': ordered[len(ordered) // 2],
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        }
+
+    def log_summary(self):
+        stats = self.summary()
+        if not stats['pages']:
+            return
+        logger.info(f"session 策略 {stats['policy']}：{stats['pages']} 頁，平均延遲 {stats['mean']:.2f} 秒，"
+                    f"p50 {stats['p50']:.2f} 秒，p95 {stats['p95']:.2f} 秒")
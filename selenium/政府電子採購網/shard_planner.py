@@ -0,0 +1,152 @@
+import os
+import json
+import copy
+import logging
+import multiprocessing
+from datetime import datetime, timedelta
+from record_sink import create_sink
+from site_spec import SiteSpec
+from crawl_metrics import metrics
+from history_manager import CrawlHistory
+from tender_record import build_records
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = '%Y/%m/%d'
+
+def split_date_range(start_date, end_date, slice_days=7):
+    """將 yyyy/mm/dd 格式的日期區間切成每段 slice_days 天的 (起, 迄) 清單"""
+    start = datetime.strptime(start_date, DATE_FORMAT)
+    end = datetime.strptime(end_date, DATE_FORMAT)
+    slices = []
+    while start <= end:
+        slice_end = min(start + timedelta(days=slice_days - 1), end)
+        slices.append((start.strftime(DATE_FORMAT), slice_end.strftime(DATE_FORMAT)))
+        start = slice_end + timedelta(days=1)
+    return slices
+
+def plan_shards(config, slice_days=7):
+    """依日期切片與 target_orgs 產生分片清單，每個分片帶有自己的 query_params"""
+    query_params = config['query_params']
+    orgs = config.get('target_orgs') or [query_params.get('orgId', '')]
+    date_slices = split_date_range(query_params['tenderStartDate'], query_params['tenderEndDate'], slice_days)
+
+    shards = []
+    for org_id in orgs:
+        for start_date, end_date in date_slices:
+            params = dict(query_params, orgId=org_id, tenderStartDate=start_date, tenderEndDate=end_date)
+            shard_id = f"org{org_id}_{start_date.replace('/', '')}_{end_date.replace('/', '')}"
+            shards.append({'shard_id': shard_id, 'query_params': params})
+    return shards
+
+def history_path(config):
+    return os.path.join(config.get('data_folder', '.'), config.get('history_file', 'procurement_history.json'))
+
+def build_shard_config(config, shard):
+    """
+    複製主設定並套用分片參數；每個分片使用自己的資料夾保存日誌，
+    歷史索引與變動通知則留在主資料夾，由主行程合併後以整個查詢為單位處理
+    (shard_id 含日期區間，若依分片保存，日期區間移動後每個分片都會從空的索引開始)
+    """
+    shard_config = copy.deepcopy(config)
+    shard_config['query_params'] = shard['query_params']
+    shard_config['data_folder'] = os.path.join(config.get('data_folder', '.'), 'shards', shard['shard_id'])
+    shard_config['output_format'] = 'jsonl'  # 分片輸出以 JSON Lines 串流合併
+    # 增量模式下分片只讀取主資料夾的歷史索引，不寫入也不送出通知
+    shard_config['history_file'] = os.path.abspath(history_path(config))
+    shard_config['history_readonly'] = True
+    shard_config['notify_new_cases'] = False
+    shard_config.pop('shard_days', None)
+    shard_config.pop('metrics', None)  # 各分片的指標寫在自己的資料夾，主行程另外輸出彙整後的指標
+    if shard_config.get('page_cache', {}).get('enabled'):
+        # 所有分片共用同一個頁面快取
+        shard_config['page_cache']['folder'] = config['page_cache'].get('folder') \
+            or os.path.join(config.get('data_folder', '.'), 'page_cache')
+    return shard_config
+
+def _run_shard(shard_config):
+    """在子行程中執行單一分片，回傳 (輸出檔路徑, 本分片的指標摘要)"""
+    from main import run_crawl  # 延後載入以避免循環引用
+    try:
+        output_path = run_crawl(shard_config)
+    except Exception as e:
+        logger.error(f"分片 {shard_config['data_folder']} 執行失敗: {e}")
+        output_path = None
+    return output_path, metrics.summary()
+
+def merge_shard_outputs(paths, sink, on_record=None):
+    """
+    依序讀取各分片的 JSON Lines 輸出，以 tender_case_no 去除重複後寫入 sink
+    on_record: 每筆寫入的紀錄另外交給此函式 (例如收集列表欄位供歷史索引使用)
+    """
+    seen = set()
+    duplicates = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                case_no = record.get('tender_case_no')
+                if case_no and case_no in seen:
+                    duplicates += 1
+                    continue
+                seen.add(case_no)
+                sink.write(record)
+                if on_record:
+                    on_record(record)
+    logger.info(f"合併 {len(paths)} 個分片，共 {sink.count} 筆，去除重複 {duplicates} 筆")
+    return sink.count
+
+def update_merged_history(config, records, detail_fetched, complete, output_path):
+    """以合併後的案件比對並更新主資料夾的歷史索引，查詢鍵為主設定的網址而非各分片"""
+    from main import load_config_and_build_url, update_history
+    success, target_url = load_config_and_build_url(config)
+    if not success:
+        return
+    if config.get('record_type', 'dict') == 'typed':
+        records = build_records(records)
+    history = CrawlHistory(history_path(config))
+    history.load()
+    update_history(config, history, target_url, records, detail_fetched.__getitem__,
+                   complete=complete, output_path=output_path)
+
+def run_sharded_crawl(config):
+    """以多個行程平行爬取所有分片並合併結果，回傳合併後的輸出檔路徑"""
+    from main import export_metrics
+    metrics.reset()
+    shards = plan_shards(config, config.get('shard_days', 7))
+    processes = min(config.get('shard_processes') or os.cpu_count() or 1, len(shards))
+    logger.info(f"共規劃 {len(shards)} 個分片，使用 {processes} 個行程")
+
+    shard_configs = [build_shard_config(config, shard) for shard in shards]
+    context = multiprocessing.get_context('spawn')  # 每個行程各自啟動瀏覽器
+    with context.Pool(processes=processes) as pool:
+        results = pool.map(_run_shard, shard_configs, chunksize=1)
+    outputs = [output_path for output_path, _ in results]
+    for _, shard_summary in results:
+        metrics.merge(shard_summary)
+
+    failed = [shard['shard_id'] for shard, path in zip(shards, outputs) if not path]
+    if failed:
+        logger.error(f"{len(failed)} 個分片未完成: {', '.join(failed)}")
+
+    data_folder = config.get('data_folder', '.')
+    output_file = os.path.join(data_folder, f"procurement_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    # 只保留列表欄位與是否已取得詳情頁，供合併後統一比對歷史索引
+    track_history = config.get('incremental', False) or config.get('notify_new_cases', False)
+    records = []
+    detail_fetched = []
+
+    def collect(record):
+        records.append({key: value for key, value in record.items() if key != 'detail_data'})
+        detail_fetched.append(record.get('detail_data') is not None)
+
+    with create_sink(config.get('output_format', 'json'), output_file, config.get('record_type', 'dict'),
+                     columns=SiteSpec.from_config(config).record_columns()) as sink:
+        merge_shard_outputs([path for path in outputs if path], sink, collect if track_history else None)
+
+    if track_history:
+        # 有分片失敗或增量模式提前停止時，本次結果不完整，不判斷撤下
+        complete = not failed and not config.get('incremental', False)
+        update_merged_history(config, records, detail_fetched, complete, sink.path)
+    export_metrics(config, data_folder)
+    return sink.path
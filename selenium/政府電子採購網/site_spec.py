@@ -0,0 +1,225 @@
+import re
+import json
+import copy
+import logging
+from urllib.parse import urljoin
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# 政府電子採購網的擷取規則；其他網站可用相同結構的 JSON 檔，以設定檔的 site_spec 指定路徑
+# 欄位規則為 XPath 字串 (取第一個符合元素的可見文字)，
+# 或 {"xpath": ..., "attr": 屬性名稱, "url": 是否以頁面網址轉為絕對網址}
+DEFAULT_SITE_SPEC = {
+    'name': 'web.pcc.gov.tw',
+    'list': {
+        'marker': 'id="tpam"',
+        'container': '//table[@id="tpam"]',
+        'rows': '//table[@id="tpam"]/tbody/tr',
+        'fields': {
+            'tender_case_no': './td[3]',
+            'org_name': './td[2]',
+            'tender_name': './td[3]/a/span',
+            'tender_type': './td[5]',
+            'announce_date': './td[7]',
+            'tender_deadline': './td[8]',
+            'budget': './td[9]/span',
+            'detail_link': {'xpath': './td[3]/a', 'attr': 'href', 'url': True},
+        },
+        'total_count': '//body',
+        'timeout': 10,
+    },
+    'next_page': {
+        'xpath': '//span[@id="pagelinks"]/a[contains(text(), "下一頁")]',
+        'attr': 'href',
+    },
+    'detail': {
+        'marker': 'id="printRange"',
+        'tables': '//div[@id="printRange"]/table',
+        'caption': './caption',
+        'rows': './/tr',
+        'cells': './/td',
+        'timeout': 15,
+    },
+}
+
+# 模擬 Selenium WebElement.text 的可見文字規則
+_WHITESPACE_RE = re.compile(r'[ \t\r\f\v\u00a0]+')
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'head'}
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'caption', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table',
+    'tbody', 'tfoot', 'thead', 'tr', 'ul',
+}
+_CELL_TAGS = {'td', 'th'}
+
+def _is_hidden(element):
+    """判斷元素是否以 hidden 屬性或行內樣式隱藏"""
+    if element.get('hidden') is not None:
+        return True
+    style = (element.get('style') or '').replace(' ', '').lower()
+    return 'display:none' in style or 'visibility:hidden' in style
+
+def _collect_text(element, parts):
+    """遞迴收集元素文字，區塊元素前後插入換行"""
+    tag = element.tag if isinstance(element.tag, str) else None
+    if tag is None or tag.lower() in _SKIP_TAGS or _is_hidden(element):
+        return
+    tag = tag.lower()
+    if tag == 'br':
+        parts.append('\n')
+        return
+    if tag in _BLOCK_TAGS:
+        parts.append('\n')
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        _collect_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+    if tag in _BLOCK_TAGS:
+        parts.append('\n')
+    elif tag in _CELL_TAGS:
+        parts.append(' ')
+
+def element_text(element):
+    """取得 lxml 元素的可見文字，輸出格式與 Selenium 的 .text 一致"""
+    parts = []
+    _collect_text(element, parts)
+    lines = (_WHITESPACE_RE.sub(' ', line).strip() for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+def _compile(expression, where):
+    try:
+        return etree.XPath(expression, smart_strings=False)
+    except etree.XPathSyntaxError as e:
+        raise ValueError(f"站台規則 {where} 的 XPath 無效 ({expression}): {e}") from e
+
+class FieldRule:
+    """單一欄位的擷取規則，XPath 只在建立時編譯一次"""
+
+    __slots__ = ('name', 'xpath', 'attr', 'url', '_find')
+
+    def __init__(self, name, rule):
+        if isinstance(rule, str):
+            rule = {'xpath': rule}
+        self.name = name
+        self.xpath = rule['xpath']
+        self.attr = rule.get('attr')
+        self.url = rule.get('url', False)
+        self._find = _compile(self.xpath, name)
+
+    def extract(self, element, base_url=None):
+        """回傳第一個符合元素的文字或屬性值，找不到時回傳空字串"""
+        matches = self._find(element)
+        if not matches:
+            return ''
+        if not self.attr:
+            return element_text(matches[0])
+        value = matches[0].get(self.attr)
+        if not value:
+            return ''
+        return urljoin(base_url or '', value.strip()) if self.url else value
+
+class SiteSpec:
+    """
+    以宣告式規則描述一個網站的列表列、欄位、下一頁與詳情頁表格，並預先編譯為 etree.XPath
+    ProcurementCrawler 以同一組規則解析 lxml 樹，Selenium 引擎則使用規則中的 XPath 字串
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.name = spec.get('name', '')
+
+        list_spec = spec['list']
+        self.list_marker = list_spec.get('marker')
+        self.list_rows_xpath = list_spec['rows']
+        self.list_container_xpath = list_spec.get('container')
+        self.fields = [FieldRule(name, rule) for name, rule in list_spec['fields'].items()]
+        self._list_rows = _compile(self.list_rows_xpath, 'list.rows')
+        self._total_count = _compile(list_spec['total_count'], 'list.total_count') \
+            if list_spec.get('total_count') else None
+
+        self.next_page = FieldRule('next_page', spec['next_page']) if spec.get('next_page') else None
+
+        detail_spec = spec['detail']
+        self.detail_marker = detail_spec.get('marker')
+        self.detail_tables_xpath = detail_spec['tables']
+        self._detail_tables = _compile(self.detail_tables_xpath, 'detail.tables')
+        self._detail_caption = _compile(detail_spec.get('caption', './caption'), 'detail.caption')
+        self._detail_rows = _compile(detail_spec.get('rows', './/tr'), 'detail.rows')
+        self._detail_cells = _compile(detail_spec.get('cells', './/td'), 'detail.cells')
+
+        self.page_conditions = {
+            'list': {'target': self.list_rows_xpath, 'empty': self.list_container_xpath,
+                     'timeout': list_spec.get('timeout', 10)},
+            'detail': {'target': self.detail_tables_xpath, 'empty': None,
+                       'timeout': detail_spec.get('timeout', 15)},
+            'document': {'target': '//body', 'empty': None, 'timeout': 20},
+        }
+
+    @classmethod
+    def default(cls):
+        return cls(copy.deepcopy(DEFAULT_SITE_SPEC))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_config(cls, config):
+        """site_spec 可為 JSON 檔路徑或直接寫在設定檔中的規則，未設定時使用政府電子採購網的規則"""
+        site_spec = config.get('site_spec')
+        if not site_spec:
+            return cls.default()
+        spec = cls.load(site_spec) if isinstance(site_spec, str) else cls(site_spec)
+        logger.info(f"使用站台規則: {spec.name or site_spec}")
+        return spec
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.spec, f, ensure_ascii=False, indent=2)
+
+    def record_columns(self):
+        """輸出紀錄的欄位順序：列表欄位依規則順序，最後為詳情頁資料"""
+        return tuple(field.name for field in self.fields) + ('detail_data',)
+
+    def list_rows(self, tree):
+        return self._list_rows(tree)
+
+    def extract_row(self, row, base_url=None):
+        """依欄位規則擷取一列資料"""
+        return {field.name: field.extract(row, base_url) for field in self.fields}
+
+    def extract_next_page(self, tree, base_url=None):
+        """回傳下一頁的絕對網址，沒有下一頁時回傳 None"""
+        if not self.next_page:
+            return None
+        href = self.next_page.extract(tree)
+        return urljoin(base_url, href) if href else None
+
+    def total_count_text(self, tree):
+        """回傳含查詢結果總筆數的文字，沒有對應元素時回傳 None"""
+        matches = self._total_count(tree) if self._total_count is not None else []
+        return element_text(matches[0]) if matches else None
+
+    def extract_detail_tables(self, tree):
+        """將詳情頁表格轉為 {表格名稱: {欄位: 值}}，每列取前兩個儲存格作為欄位與值"""
+        all_data = {}
+        for i, table in enumerate(self._detail_tables(tree)):
+            captions = self._detail_caption(table)
+            table_name = element_text(captions[0]) if captions else f'unnamed_table_{i}'
+
+            table_data = {}
+            for row in self._detail_rows(table):
+                cols = self._detail_cells(row)
+                if len(cols) >= 2:
+                    label = element_text(cols[0])
+                    if label:
+                        table_data[label] = element_text(cols[1])
+
+            if table_data:
+                all_data[table_name] = table_data
+        return all_data
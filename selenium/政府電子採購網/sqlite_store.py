@@ -0,0 +1,351 @@
+import os
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime
+from tender_record import as_dict, parse_roc_date, parse_budget
+from record_sink import RecordSink
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenders (
+    tender_case_no TEXT PRIMARY KEY,
+    org_name TEXT,
+    tender_name TEXT,
+    tender_type TEXT,
+    announce_date TEXT,
+    tender_deadline TEXT,
+    budget NUMERIC,
+    detail_link TEXT,
+    detail_data TEXT,
+    first_seen TEXT,
+    last_seen TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tenders_org ON tenders (org_name, announce_date);
+CREATE INDEX IF NOT EXISTS idx_tenders_announce_date ON tenders (announce_date);
+CREATE INDEX IF NOT EXISTS idx_tenders_budget ON tenders (budget);
+
+CREATE TABLE IF NOT EXISTS detail_fields (
+    tender_case_no TEXT NOT NULL,
+    caption TEXT NOT NULL,
+    label TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (tender_case_no, caption, label)
+);
+CREATE INDEX IF NOT EXISTS idx_detail_fields_label ON detail_fields (caption, label, value);
+"""
+
+# FTS5 外部內容索引，以觸發器與 tenders 同步
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tenders_fts USING fts5(
+    tender_name, org_name, content='tenders', content_rowid='rowid', tokenize='{tokenizer}'
+);
+CREATE TRIGGER IF NOT EXISTS tenders_ai AFTER INSERT ON tenders BEGIN
+    INSERT INTO tenders_fts (rowid, tender_name, org_name) VALUES (new.rowid, new.tender_name, new.org_name);
+END;
+CREATE TRIGGER IF NOT EXISTS tenders_ad AFTER DELETE ON tenders BEGIN
+    INSERT INTO tenders_fts (tenders_fts, rowid, tender_name, org_name)
+    VALUES ('delete', old.rowid, old.tender_name, old.org_name);
+END;
+CREATE TRIGGER IF NOT EXISTS tenders_au AFTER UPDATE OF tender_name, org_name ON tenders BEGIN
+    INSERT INTO tenders_fts (tenders_fts, rowid, tender_name, org_name)
+    VALUES ('delete', old.rowid, old.tender_name, old.org_name);
+    INSERT INTO tenders_fts (rowid, tender_name, org_name) VALUES (new.rowid, new.tender_name, new.org_name);
+END;
+"""
+
+UPSERT_TENDER = """
+INSERT INTO tenders (tender_case_no, org_name, tender_name, tender_type, announce_date, tender_deadline,
+                     budget, detail_link, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (tender_case_no) DO UPDATE SET
+    org_name = excluded.org_name,
+    tender_name = excluded.tender_name,
+    tender_type = excluded.tender_type,
+    announce_date = excluded.announce_date,
+    tender_deadline = excluded.tender_deadline,
+    budget = excluded.budget,
+    detail_link = COALESCE(excluded.detail_link, tenders.detail_link),
+    last_seen = excluded.last_seen
+"""
+
+UPSERT_DETAIL_FIELD = """
+INSERT INTO detail_fields (tender_case_no, caption, label, value) VALUES (?, ?, ?, ?)
+ON CONFLICT (tender_case_no, caption, label) DO UPDATE SET value = excluded.value
+"""
+
+# trigram 分詞可用任意 3 個字以上的片段搜尋中文；較舊的 SQLite 沒有 trigram 時改用 unicode61
+TRIGRAM_MIN_LENGTH = 3
+
+def _iso_date(value):
+    parsed = parse_roc_date(value) if isinstance(value, str) else value
+    return parsed.isoformat() if parsed else None
+
+def _query_date(value):
+    """查詢條件的日期必須可以解析，否則比較 NULL 會靜默地查不到任何資料"""
+    iso_date = _iso_date(value)
+    if iso_date is None:
+        raise ValueError(f"無法解析的日期: {value}")
+    return iso_date
+
+def _date_argument(value):
+    try:
+        return _query_date(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+class TenderStore:
+    """
+    以 tender_case_no 為鍵保存列表資料與詳情頁的 SQLite 資料庫 (WAL 模式)
+    寫入先累積在同一個交易中，每 batch_size 筆或呼叫 flush() 時提交
+    """
+
+    def __init__(self, path, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = 0
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.tokenizer = self._create_fts()
+        self.conn.commit()
+
+    @classmethod
+    def from_config(cls, config):
+        """依設定建立資料庫，sqlite_store.enabled 不為 true 時回傳 None"""
+        store_config = config.get('sqlite_store', {})
+        if not store_config.get('enabled', False):
+            return None
+        path = store_config.get('path') or os.path.join(config.get('data_folder', '.'), 'procurement.sqlite')
+        return cls(path, batch_size=store_config.get('batch_size', 500))
+
+    def _create_fts(self):
+        existing = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'tenders_fts'").fetchone()
+        if existing:
+            return 'trigram' if 'trigram' in existing['sql'] else 'unicode61'
+        for tokenizer in ('trigram', 'unicode61'):
+            try:
+                self.conn.executescript(FTS_SCHEMA.format(tokenizer=tokenizer))
+                return tokenizer
+            except sqlite3.OperationalError as e:
+                logger.debug(f"FTS5 分詞器 {tokenizer} 無法使用: {e}")
+        raise RuntimeError("SQLite 未支援 FTS5")
+
+    def _maybe_commit(self, count):
+        self._pending += count
+        if self._pending >= self.batch_size:
+            self.conn.commit()
+            self._pending = 0
+
+    def upsert_items(self, items):
+        """寫入或更新一批列表資料；含 detail_data 者一併寫入詳情頁"""
+        now = datetime.now().isoformat(timespec='seconds')
+        rows = []
+        details = []
+        for item in items:
+            item = as_dict(item)
+            case_no = item.get('tender_case_no')
+            if not case_no:
+                continue
+            rows.append((case_no, item.get('org_name'), item.get('tender_name'), item.get('tender_type'),
+                         _iso_date(item.get('announce_date')), _iso_date(item.get('tender_deadline')),
+                         parse_budget(item.get('budget')), item.get('detail_link') or None, now, now))
+            if item.get('detail_data'):
+                details.append((case_no, item['detail_data']))
+
+        with self._lock:
+            self.conn.executemany(UPSERT_TENDER, rows)
+            for case_no, detail_data in details:
+                self._write_detail(case_no, detail_data)
+            self._maybe_commit(len(rows))
+        return len(rows)
+
+    def _write_detail(self, case_no, detail_data):
+        self.conn.execute("UPDATE tenders SET detail_data = ? WHERE tender_case_no = ?",
+                          (json.dumps(detail_data, ensure_ascii=False), case_no))
+        self.conn.execute("DELETE FROM detail_fields WHERE tender_case_no = ?", (case_no,))
+        self.conn.executemany(UPSERT_DETAIL_FIELD, [
+            (case_no, caption, label, value)
+            for caption, fields in detail_data.items()
+            for label, value in fields.items()
+        ])
+
+    def upsert_detail(self, case_no, detail_data):
+        """寫入一筆詳情頁，案件必須已由 upsert_items 寫入"""
+        if not case_no or not detail_data:
+            return
+        with self._lock:
+            self._write_detail(case_no, detail_data)
+            self._maybe_commit(1)
+
+    def flush(self):
+        with self._lock:
+            self.conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _to_dict(row, include_detail=False):
+        data = dict(row)
+        detail_data = data.pop('detail_data', None)
+        if include_detail:
+            data['detail_data'] = json.loads(detail_data) if detail_data else None
+        return data
+
+    def get(self, case_no):
+        row = self.conn.execute("SELECT * FROM tenders WHERE tender_case_no = ?", (case_no,)).fetchone()
+        return self._to_dict(row, include_detail=True) if row else None
+
+    def search(self, text, limit=50):
+        """
+        以標案名稱與機關名稱全文搜尋，依相關度排序
+        trigram 分詞無法比對少於 3 個字的查詢，此時改用 LIKE 掃描
+        """
+        columns = "t.tender_case_no, t.org_name, t.tender_name, t.tender_type, t.announce_date, t.budget"
+        if self.tokenizer == 'trigram' and len(text) < TRIGRAM_MIN_LENGTH:
+            pattern = f"%{text}%"
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM tenders t WHERE t.tender_name LIKE ? OR t.org_name LIKE ? "
+                f"ORDER BY t.announce_date DESC LIMIT ?", (pattern, pattern, limit))
+        else:
+            query = '"' + text.replace('"', '""') + '"'
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM tenders_fts JOIN tenders t ON t.rowid = tenders_fts.rowid "
+                f"WHERE tenders_fts MATCH ? ORDER BY rank LIMIT ?", (query, limit))
+        return [dict(row) for row in rows]
+
+    def query(self, org=None, date_from=None, date_to=None, min_budget=None, max_budget=None,
+              tender_type=None, limit=100):
+        """依機關、公告日期區間 (ISO 或民國日期)、預算範圍與招標方式查詢，依公告日新到舊排序"""
+        conditions, params = [], []
+        if org:
+            conditions.append("org_name = ?")
+            params.append(org)
+        if date_from:
+            conditions.append("announce_date >= ?")
+            params.append(_query_date(date_from))
+        if date_to:
+            conditions.append("announce_date <= ?")
+            params.append(_query_date(date_to))
+        if min_budget is not None:
+            conditions.append("budget >= ?")
+            params.append(min_budget)
+        if max_budget is not None:
+            conditions.append("budget <= ?")
+            params.append(max_budget)
+        if tender_type:
+            conditions.append("tender_type = ?")
+            params.append(tender_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self.conn.execute(
+            f"SELECT * FROM tenders {where} ORDER BY announce_date DESC LIMIT ?", params + [limit])
+        return [self._to_dict(row) for row in rows]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tenders").fetchone()[0]
+
+class SqliteSink(RecordSink):
+    """將壓實後的資料逐筆寫入 TenderStore，重複的 tender_case_no 以新資料更新"""
+
+    def __init__(self, path, batch_size=500):
+        super().__init__(path)
+        self.store = TenderStore(path, batch_size=batch_size)
+        self._batch = []
+
+    def write(self, record):
+        self._batch.append(record)
+        self.count += 1
+        if len(self._batch) >= self.store.batch_size:
+            self.store.upsert_items(self._batch)
+            self._batch = []
+
+    def close(self):
+        if self._batch:
+            self.store.upsert_items(self._batch)
+            self._batch = []
+        self.store.close()
+        super().close()
+
+def import_files(store, paths):
+    """匯入既有的 JSON 陣列或 JSON Lines 輸出檔"""
+    total = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            items = [json.loads(line) for line in f if line.strip()] if path.endswith('.jsonl') else json.load(f)
+        total += store.upsert_items(items)
+        logger.info(f"已匯入 {path} ({len(items)} 筆)")
+    store.flush()
+    return total
+
+def _print_rows(rows):
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='查詢政府電子採購網爬蟲的 SQLite 資料庫')
+    parser.add_argument('database', help='SQLite 資料庫路徑')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='匯入 JSON / JSON Lines 輸出檔')
+    import_parser.add_argument('files', nargs='+')
+
+    search_parser = subparsers.add_parser('search', help='以標案名稱或機關名稱全文搜尋')
+    search_parser.add_argument('text')
+    search_parser.add_argument('--limit', type=int, default=50)
+
+    get_parser = subparsers.add_parser('get', help='取得單一案件 (含詳情頁)')
+    get_parser.add_argument('case_no')
+
+    query_parser = subparsers.add_parser('query', help='依機關、日期與預算查詢')
+    query_parser.add_argument('--org')
+    query_parser.add_argument('--from', dest='date_from', type=_date_argument, help='ISO 或民國日期')
+    query_parser.add_argument('--to', dest='date_to', type=_date_argument, help='ISO 或民國日期')
+    query_parser.add_argument('--min-budget', type=float)
+    query_parser.add_argument('--max-budget', type=float)
+    query_parser.add_argument('--type', dest='tender_type')
+    query_parser.add_argument('--limit', type=int, default=100)
+
+    subparsers.add_parser('count', help='案件總數')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with TenderStore(args.database) as store:
+        if args.command == 'import':
+            print(f"已匯入 {import_files(store, args.files)} 筆")
+        elif args.command == 'search':
+            _print_rows(store.search(args.text, args.limit))
+        elif args.command == 'get':
+            row = store.get(args.case_no)
+            if row is None:
+                print(f"找不到案件 {args.case_no}")
+                return 1
+            print(json.dumps(row, ensure_ascii=False, indent=2))
+        elif args.command == 'query':
+            _print_rows(store.query(args.org, args.date_from, args.date_to, args.min_budget, args.max_budget,
+                                    args.tender_type, args.limit))
+        else:
+            print(store.count())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
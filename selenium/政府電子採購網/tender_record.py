@@ -0,0 +1,320 @@
+import re
+import json
+from datetime import date, datetime
+from functools import lru_cache
+
+# 民國紀年與西元紀年的差距
+ROC_YEAR_OFFSET = 1911
+
+# 114/03/18、114-03-18、114年3月18日，或西元 2025/03/18、2025-03-18
+_DATE_PATTERN = re.compile(r'(\d{2,4})\s*[/\-.年]\s*(\d{1,2})\s*[/\-.月]\s*(\d{1,2})')
+# 日期之後的時間，例如 114/03/20 10:00 或 114/03/20 10:00:30
+_TIME_PATTERN = re.compile(r'(\d{1,2}):(\d{2})(?::(\d{2}))?')
+_BUDGET_STRIP_PATTERN = re.compile(r'[,\s元]|NT\$|\$')
+
+# 以 pyarrow.compute 整欄轉換時使用的規則，與上面的逐筆規則相同
+_DATE_COLUMN_PATTERN = r'(?P<y>\d{2,4})\s*[/\-.年]\s*(?P<m>\d{1,2})\s*[/\-.月]\s*(?P<d>\d{1,2})'
+_DATETIME_COLUMN_PATTERN = _DATE_COLUMN_PATTERN + r'(?:[\s\S]*?(?P<H>\d{1,2}):(?P<M>\d{2})(?::(?P<S>\d{2}))?)?'
+_INTEGER_PATTERN = r'^[+-]?\d+$'
+_FLOAT_PATTERN = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+RECORD_TYPES = ('dict', 'typed')
+
+@lru_cache(maxsize=1)
+def _arrow_compute():
+    """回傳 (pyarrow, pyarrow.compute)，沒有安裝 pyarrow 時回傳 None，改用逐筆轉換"""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return None
+    return pa, pc
+
+@lru_cache(maxsize=8192)
+def parse_roc_date(text):
+    """將民國或西元日期字串轉為 date，無法解析時回傳 None；同一頁的日期大多重複，以快取避免重複解析"""
+    if not text:
+        return None
+    match = _DATE_PATTERN.search(text)
+    if not match:
+        return None
+    year, month, day = (int(part) for part in match.groups())
+    if year <= ROC_YEAR_OFFSET:
+        year += ROC_YEAR_OFFSET
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=8192)
+def parse_roc_datetime(text):
+    """將含時間的民國或西元日期字串 (例如開標時間 114/03/20 10:00) 轉為 datetime，沒有時間時為當天 0 時"""
+    value = parse_roc_date(text)
+    if value is None:
+        return None
+    match = _TIME_PATTERN.search(text, _DATE_PATTERN.search(text).end())
+    hour, minute, second = (int(part or 0) for part in match.groups()) if match else (0, 0, 0)
+    try:
+        return datetime(value.year, value.month, value.day, hour, minute, second)
+    except ValueError:
+        return None
+
+def has_time(text):
+    """日期字串中是否帶有時間"""
+    match = _DATE_PATTERN.search(text or '')
+    return bool(match and _TIME_PATTERN.search(text, match.end()))
+
+def format_roc_date(value):
+    """將 date 轉回網站使用的民國日期格式，例如 114/03/18"""
+    if value is None:
+        return ''
+    return f"{value.year - ROC_YEAR_OFFSET}/{value.month:02d}/{value.day:02d}"
+
+@lru_cache(maxsize=8192)
+def parse_budget(text):
+    """將 1,234,567 或 1,234,567元 轉為數值，未公開或無法解析時回傳 None"""
+    if text is None or text == '':
+        return None
+    if isinstance(text, (int, float)):
+        return text
+    cleaned = _BUDGET_STRIP_PATTERN.sub('', text)
+    try:
+        return int(cleaned)
+    except ValueError:
+        pass
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+def format_budget(value):
+    """將數值轉回網站使用的千分位格式"""
+    if value is None:
+        return ''
+    return f"{value:,}"
+
+def _to_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return parse_roc_date(value)
+
+def _parse_timestamp_column(texts, with_time=False):
+    """以 pyarrow.compute 整欄解析日期 (with_time 時包含其後的時間)，回傳 timestamp 陣列，無法解析者為 null"""
+    pa, pc = _arrow_compute()
+    parts = pc.extract_regex(texts, _DATETIME_COLUMN_PATTERN if with_time else _DATE_COLUMN_PATTERN)
+
+    def number(name, width):
+        # 沒有出現的選用群組 (例如秒) 為空字串，視為 0
+        part = pc.struct_field(parts, name)
+        value = pc.cast(pc.if_else(pc.equal(part, ''), '0', part), pa.int32())
+        return value, pc.utf8_lpad(pc.cast(value, pa.string()), width, '0')
+
+    year, _ = number('y', 4)
+    year = pc.if_else(pc.less_equal(year, ROC_YEAR_OFFSET), pc.add(year, ROC_YEAR_OFFSET), year)
+    month, month_text = number('m', 2)
+    text = pc.binary_join_element_wise(
+        pc.utf8_lpad(pc.cast(year, pa.string()), 4, '0'), month_text, number('d', 2)[1], '-')
+    time_format = '%Y-%m-%d'
+    if with_time:
+        clock = pc.binary_join_element_wise(number('H', 2)[1], number('M', 2)[1], number('S', 2)[1], ':')
+        text = pc.binary_join_element_wise(text, clock, ' ')
+        time_format += ' %H:%M:%S'
+    parsed = pc.strptime(text, format=time_format, unit='s', error_is_null=True)
+    # strptime 會把不存在的日期 (例如 2 月 30 日) 進位到下個月，月份不符者改為 null
+    valid = pc.equal(pc.month(parsed), month)
+    return pc.if_else(valid, parsed, pa.scalar(None, parsed.type))
+
+def parse_roc_dates(values):
+    """整欄轉換日期字串 (或 date)，回傳與 values 順序相同的 date 清單"""
+    arrow = _arrow_compute()
+    if arrow is None:
+        return [_to_date(value) for value in values]
+    pa, pc = arrow
+    texts = pa.array([value.isoformat() if isinstance(value, date) else value for value in values], pa.string())
+    return pc.cast(_parse_timestamp_column(texts), pa.date32()).to_pylist()
+
+def parse_roc_datetimes(values):
+    """整欄轉換含時間的日期字串，回傳與 values 順序相同的 datetime 清單，沒有時間時為當天 0 時"""
+    arrow = _arrow_compute()
+    if arrow is None or any(value is not None and not isinstance(value, str) for value in values):
+        return [parse_roc_datetime(value) if isinstance(value, str) else value for value in values]
+    pa, pc = arrow
+    return _parse_timestamp_column(pa.array(values, pa.string()), with_time=True).to_pylist()
+
+def parse_budgets(values):
+    """整欄轉換預算金額字串，回傳與 values 順序相同的數值清單 (整數金額為 int)"""
+    arrow = _arrow_compute()
+    if arrow is None or any(value is not None and not isinstance(value, str) for value in values):
+        return [parse_budget(value) for value in values]
+    pa, pc = arrow
+    cleaned = pc.replace_substring_regex(pa.array(values, pa.string()), _BUDGET_STRIP_PATTERN.pattern, '')
+    null = pa.scalar(None, pa.string())
+    integers = pc.cast(pc.if_else(pc.match_substring_regex(cleaned, _INTEGER_PATTERN), cleaned, null), pa.int64())
+    floats = pc.cast(pc.if_else(pc.match_substring_regex(cleaned, _FLOAT_PATTERN), cleaned, null), pa.float64())
+    return [integer if integer is not None else number
+            for integer, number in zip(integers.to_pylist(), floats.to_pylist())]
+
+def raw_texts(item):
+    """保留轉換欄位在網站上的原始字串，已轉換過的紀錄沿用其 raw_text"""
+    raw_text = item.get('raw_text')
+    if raw_text:
+        return raw_text
+    raw_text = {field: item.get(field) for field in TenderRecord.RAW_FIELDS
+                if isinstance(item.get(field), str)}
+    return raw_text or None
+
+class TenderRecord:
+    """
+    以 __slots__ 儲存的招標案件，預算為數值、公告日與截止投標日為 date
+    提供 get / [] 等與 dict 相同的存取方式，讓歷史索引、日誌與並行 worker 可以直接使用
+    raw_text 保存轉換前的原始字串 (例如「未公開」、含時間的截止投標)，指紋以原始字串計算
+    """
+
+    FIELDS = ('tender_case_no', 'org_name', 'tender_name', 'tender_type',
+              'announce_date', 'tender_deadline', 'budget', 'detail_link', 'detail_data')
+    DATE_FIELDS = ('announce_date', 'tender_deadline')
+    RAW_FIELDS = DATE_FIELDS + ('budget',)
+    __slots__ = FIELDS + ('raw_text',)
+
+    def __init__(self, tender_case_no='', org_name='', tender_name='', tender_type='',
+                 announce_date=None, tender_deadline=None, budget=None, detail_link='', detail_data=None,
+                 raw_text=None):
+        self.tender_case_no = tender_case_no
+        self.org_name = org_name
+        self.tender_name = tender_name
+        self.tender_type = tender_type
+        self.announce_date = announce_date
+        self.tender_deadline = tender_deadline
+        self.budget = budget
+        self.detail_link = detail_link
+        self.detail_data = detail_data
+        self.raw_text = raw_text
+
+    @classmethod
+    def from_dict(cls, item):
+        """由列表頁擷取的原始字串或 to_dict 的輸出建立紀錄"""
+        return cls(
+            tender_case_no=item.get('tender_case_no', ''),
+            org_name=item.get('org_name', ''),
+            tender_name=item.get('tender_name', ''),
+            tender_type=item.get('tender_type', ''),
+            announce_date=_to_date(item.get('announce_date')),
+            tender_deadline=_to_date(item.get('tender_deadline')),
+            budget=parse_budget(item.get('budget')),
+            detail_link=item.get('detail_link', ''),
+            detail_data=item.get('detail_data'),
+            raw_text=raw_texts(item),
+        )
+
+    def to_dict(self):
+        """轉為可序列化為 JSON 的 dict，日期以 ISO 格式表示，沒有詳情頁資料時不含 detail_data"""
+        data = {field: getattr(self, field) for field in self.FIELDS if field != 'detail_data'}
+        for field in self.DATE_FIELDS:
+            if data[field] is not None:
+                data[field] = data[field].isoformat()
+        if self.raw_text:
+            data['raw_text'] = self.raw_text
+        if self.detail_data is not None:
+            data['detail_data'] = self.detail_data
+        return data
+
+    def raw_value(self, field):
+        """回傳欄位在網站上的原始字串，用於計算與 dict 紀錄相同的案件指紋"""
+        if self.raw_text and field in self.raw_text:
+            return self.raw_text[field]
+        # 沒有原始字串的紀錄 (舊版日誌) 才依網站格式還原
+        value = getattr(self, field)
+        if field in self.DATE_FIELDS:
+            return format_roc_date(value)
+        if field == 'budget':
+            return format_budget(value)
+        return '' if value is None else str(value)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def keys(self):
+        return [field for field in self.FIELDS if getattr(self, field) is not None]
+
+    def __eq__(self, other):
+        if not isinstance(other, TenderRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+
+    def __repr__(self):
+        return (f"TenderRecord(tender_case_no={self.tender_case_no!r}, tender_name={self.tender_name!r}, "
+                f"announce_date={self.announce_date!r}, budget={self.budget!r})")
+
+def build_records(items):
+    """將一整頁的原始 dict 以整欄轉換 (pyarrow.compute) 的方式建立 TenderRecord 清單"""
+    if not items:
+        return []
+    announce_dates = parse_roc_dates([item.get('announce_date') for item in items])
+    deadlines = parse_roc_dates([item.get('tender_deadline') for item in items])
+    budgets = parse_budgets([item.get('budget') for item in items])
+    return [
+        TenderRecord(item.get('tender_case_no', ''), item.get('org_name', ''), item.get('tender_name', ''),
+                     item.get('tender_type', ''), announce_date, deadline, budget,
+                     item.get('detail_link', ''), item.get('detail_data'), raw_texts(item))
+        for item, announce_date, deadline, budget in zip(items, announce_dates, deadlines, budgets)
+    ]
+
+def as_dict(item):
+    """將 TenderRecord 或 dict 轉為可寫入 JSON 的 dict"""
+    return item.to_dict() if isinstance(item, TenderRecord) else item
+
+def records_to_columns(items):
+    """
+    將多筆資料 (dict 或 TenderRecord) 一次轉為欄位清單：日期為 date、預算為數值
+    detail_data 以 JSON 字串保存，方便寫入欄式格式
+    """
+    columns = {field: [] for field in TenderRecord.FIELDS}
+    for item in items:
+        for field in TenderRecord.FIELDS:
+            columns[field].append(item.get(field))
+    for field in TenderRecord.DATE_FIELDS:
+        columns[field] = parse_roc_dates(columns[field])
+    columns['budget'] = parse_budgets(columns['budget'])
+    columns['detail_data'] = [json.dumps(value, ensure_ascii=False) if value is not None else None
+                              for value in columns['detail_data']]
+    return columns
+
+def columns_to_arrow(columns):
+    """將 records_to_columns 的結果轉為具型別的 pyarrow Table (需要安裝 pyarrow)"""
+    import pyarrow as pa
+    # 預算固定為 float64，避免各批次依內容推斷出不同型別而無法合併為同一個 Parquet 結構
+    schema = pa.schema([
+        ('tender_case_no', pa.string()),
+        ('org_name', pa.string()),
+        ('tender_name', pa.string()),
+        ('tender_type', pa.string()),
+        ('announce_date', pa.date32()),
+        ('tender_deadline', pa.date32()),
+        ('budget', pa.float64()),
+        ('detail_link', pa.string()),
+        ('detail_data', pa.string()),
+    ])
+    return pa.Table.from_pydict({field: columns[field] for field in schema.names}, schema=schema)
+
+def load_columns(path):
+    """讀取 JSON 陣列或 JSON Lines 輸出檔並一次轉為具型別的欄位"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            items = [json.loads(line) for line in f if line.strip()]
+        else:
+            items = json.load(f)
+    return records_to_columns(items)
@@ -0,0 +1,46 @@
+from change_detector import ChangeDetector
+from history_manager import CrawlHistory
+
+TARGET_URL = 'https://web.pcc.gov.tw/prkms/tender/common/basic/readTenderBasic?pageSize=100&isLogIn=N'
+
+def item(case_no, budget='1,000元', deadline='114/03/20', name=None):
+    return {'tender_case_no': case_no, 'org_name': '國防部', 'tender_name': name or f'案{case_no}',
+            'tender_type': '公開招標', 'announce_date': '114/03/08', 'tender_deadline': deadline,
+            'budget': budget, 'detail_link': ''}
+
+def history_with(tmp_path, items):
+    history = CrawlHistory(str(tmp_path / 'history.json'))
+    ChangeDetector(history, TARGET_URL).detect(items)
+    for record in items:
+        history.update(record)
+    return history
+
+def test_detects_new_changed_unchanged_and_withdrawn(tmp_path):
+    history = history_with(tmp_path, [item('A001'), item('A002'), item('A003'), item('A004')])
+    current = [
+        item('A001'),                          # 未變動
+        item('A002', budget='2,000元'),        # 預算變動
+        item('A003', deadline='114/03/27'),    # 截止日變動
+        item('A005'),                          # 新案件
+    ]
+    change_set = ChangeDetector(history, TARGET_URL).detect(current)
+    assert [record['tender_case_no'] for record in change_set.new] == ['A005']
+    assert [(record['tender_case_no'], changes) for record, changes in change_set.changed] == [
+        ('A002', {'budget': ['1,000元', '2,000元']}),
+        ('A003', {'tender_deadline': ['114/03/20', '114/03/27']}),
+    ]
+    assert [entry['tender_case_no'] for entry in change_set.withdrawn] == ['A004']
+
+def test_unwatched_field_change_is_not_reported(tmp_path):
+    history = history_with(tmp_path, [item('A001')])
+    change_set = ChangeDetector(history, TARGET_URL).detect([item('A001', name='更正後名稱')])
+    assert not change_set
+    # 增量判斷仍以完整指紋比對，名稱變動需要重新爬取詳情頁
+    assert history.classify(item('A001', name='更正後名稱')) == CrawlHistory.CHANGED
+    assert history.classify(item('A001')) == CrawlHistory.UNCHANGED
+
+def test_incomplete_run_does_not_report_withdrawn(tmp_path):
+    history = history_with(tmp_path, [item('A001'), item('A002')])
+    change_set = ChangeDetector(history, TARGET_URL).detect([item('A001')], complete=False)
+    assert change_set.withdrawn == []
+    assert ChangeDetector(history, TARGET_URL).detect([item('A001')]).withdrawn[0]['tender_case_no'] == 'A002'
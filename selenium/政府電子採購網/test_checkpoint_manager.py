@@ -0,0 +1,45 @@
+import os
+from checkpoint_manager import CrawlCheckpoint, replay_journal
+
+TARGET_URL = 'https://web.pcc.gov.tw/prkms/tender/common/basic/readTenderBasic?pageSize=100'
+
+def item(i):
+    return {'case_number': f'A{i:03d}', 'detail_link': f'/detail?pk={i}'}
+
+def crawl_until_crash(folder):
+    checkpoint = CrawlCheckpoint(folder, TARGET_URL)
+    assert checkpoint.start() == (False, [])
+    checkpoint.record_page(1, [item(1), item(2), item(3)], '/page2')
+    checkpoint.record_detail(0, {'採購資料': {'標案案號': 'A001'}})
+    checkpoint.record_detail(1, {'採購資料': {'標案案號': 'A002'}})
+    checkpoint.close()
+    return checkpoint
+
+def test_resume_after_journal_cut_mid_line(tmp_path):
+    checkpoint = crawl_until_crash(str(tmp_path))
+    # 模擬寫入最後一筆詳情頁時當機：日誌停在該行中間
+    size = os.path.getsize(checkpoint.journal_path)
+    with open(checkpoint.journal_path, 'rb+') as f:
+        f.truncate(size - 10)
+
+    resumed = CrawlCheckpoint(str(tmp_path), TARGET_URL)
+    is_resumed, items = resumed.start()
+    assert is_resumed
+    assert [record['case_number'] for record in items] == ['A001', 'A002', 'A003']
+    assert resumed.is_detail_done(0) and not resumed.is_detail_done(1)
+    assert resumed.state['next_page_url'] == '/page2'
+
+    # 續寫的紀錄從新的一行開始，整份日誌仍可完整讀回
+    resumed.record_detail(1, {'採購資料': {'標案案號': 'A002'}})
+    resumed.record_detail(2, {'採購資料': {'標案案號': 'A003'}})
+    resumed.close()
+    _, completed = replay_journal(resumed.journal_path)
+    assert completed == {0, 1, 2}
+    assert resumed.state['last_detail_index'] == 2
+
+def test_different_target_starts_over(tmp_path):
+    crawl_until_crash(str(tmp_path))
+    checkpoint = CrawlCheckpoint(str(tmp_path), TARGET_URL + '&page=2')
+    assert checkpoint.start() == (False, [])
+    checkpoint.close()
+    assert os.path.getsize(checkpoint.journal_path) == 0
@@ -0,0 +1,26 @@
+from cookie_manager import CookieStore
+
+def cookie(name, value):
+    return {'name': name, 'value': value, 'domain': 'web.pcc.gov.tw', 'path': '/'}
+
+def values(store):
+    return sorted((item['name'], item['value']) for item in store.values())
+
+def test_save_keeps_newer_values_from_other_workers(tmp_path):
+    filename = str(tmp_path / 'cookies.pkl')
+    initial = CookieStore(filename)
+    initial.update([cookie('session', '1'), cookie('token', 'a')])
+    initial.save()
+
+    first, second = CookieStore(filename), CookieStore(filename)
+    first.load()
+    second.load()
+    first.update([cookie('session', '2'), cookie('token', 'a')])
+    first.save()
+    # 第二個 worker 的 session 仍是啟動時載入的舊值，不可覆蓋第一個 worker 保存的新值
+    second.update([cookie('session', '1'), cookie('token', 'b')])
+    second.save()
+
+    result = CookieStore(filename)
+    result.load()
+    assert values(result) == [('session', '2'), ('token', 'b')]
@@ -0,0 +1,37 @@
+import logging
+import pytest
+from datetime import date, datetime
+from detail_schema import DetailSchema, infer_type, learn_schema
+
+def test_opening_time_keeps_hour_and_minute():
+    schema = DetailSchema()
+    columns = schema.flatten([{'領投開標': {'開標時間': '114/03/21 10:00', '截止投標': '114/03/20 17:00'}}])
+    assert columns['opening_time'] == [datetime(2025, 3, 21, 10, 0)]
+    assert columns['bid_deadline'] == [datetime(2025, 3, 20, 17, 0)]
+
+def test_infer_datetime_only_when_every_value_has_time():
+    assert infer_type(['114/03/21 10:00', '114/03/22 09:30']) == 'datetime'
+    assert infer_type(['114/03/21 10:00', '114/03/22']) == 'date'
+
+def test_arrow_schema_uses_timestamp():
+    pa = pytest.importorskip('pyarrow')
+    assert DetailSchema().arrow_schema().field('opening_time').type == pa.timestamp('s')
+
+def test_flatten_converts_whole_columns():
+    details = [
+        {'採購資料': {'預算金額': '1,200,000元\n(含稅)', '預算金額是否公開': '是'}, '招標資料': {'公告日': '114/02/30'}},
+        {'採購資料': {'預算金額': '', '預算金額是否公開': '否'}, '招標資料': {'公告日': '114/03/08', '決標方式': ''}},
+        None,
+    ]
+    columns = DetailSchema().flatten(details)
+    assert columns['budget_amount'] == [1200000, None, None]
+    assert columns['budget_public'] == [True, False, None]
+    assert columns['announce_date'] == [None, date(2025, 3, 8), None]
+    assert columns['award_method'] == [None, None, None]
+
+def test_learn_schema_counts_only_undeclared_rare_fields(caplog):
+    details = [{'機關資料': {'機關名稱': '國防部'}, '其他': {'附加說明': '無'}}] + [{'其他': {'常見欄位': 'x'}}] * 9
+    with caplog.at_level(logging.INFO, logger='detail_schema'):
+        schema = learn_schema(details)
+    assert schema.names[-1] == '其他.常見欄位'
+    assert '另有 1 個少見欄位' in caplog.text
@@ -0,0 +1,66 @@
+import json
+import history_manager
+from history_manager import CrawlHistory
+
+def item(case_no, budget='1,000元', detail_link='https://web.pcc.gov.tw/tender/detail?pk=1'):
+    return {'tender_case_no': case_no, 'org_name': '國防部', 'tender_name': f'案{case_no}', 'tender_type': '公開招標',
+            'announce_date': '114/03/08', 'tender_deadline': '114/03/20', 'budget': budget,
+            'detail_link': detail_link}
+
+def journal_cases(history):
+    with open(history.journal_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line).get('case') for line in f]
+
+def test_save_appends_only_new_and_changed_cases(tmp_path):
+    history = CrawlHistory(str(tmp_path / 'history.json'))
+    history.load()
+    for case_no in ('A001', 'A002', 'A003'):
+        history.update(item(case_no), detail_fetched=True)
+    history.save()
+    assert journal_cases(history) == ['A001', 'A002', 'A003']
+
+    # 同一天再執行：只有預算變動的案件與新案件寫入日誌
+    reloaded = CrawlHistory(history.path)
+    reloaded.load()
+    reloaded.update(item('A001'), detail_fetched=True)
+    reloaded.update(item('A002', budget='2,000元'), detail_fetched=True)
+    reloaded.update(item('A004'), detail_fetched=False)
+    reloaded.save()
+    assert journal_cases(reloaded) == ['A001', 'A002', 'A003', 'A002', 'A004']
+
+    restored = CrawlHistory(history.path)
+    assert restored.load()
+    assert restored.classify(item('A001')) == CrawlHistory.UNCHANGED
+    assert restored.classify(item('A002', budget='2,000元')) == CrawlHistory.UNCHANGED
+    assert restored.classify(item('A004')) == CrawlHistory.CHANGED
+    assert restored.classify(item('A005')) == CrawlHistory.NEW
+
+def test_long_journal_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_manager, 'COMPACT_MIN_LINES', 3)
+    history = CrawlHistory(str(tmp_path / 'history.json'))
+    for case_no in ('A001', 'A002'):
+        history.update(item(case_no), detail_fetched=True)
+    history.save()
+    # 日誌行數超過案件數才重寫索引
+    history.update(item('A001', budget='2,000元'), detail_fetched=True)
+    history.update(item('A002', budget='2,000元'), detail_fetched=True)
+    history.save()
+    assert not (tmp_path / 'history.json.journal').exists()
+
+    restored = CrawlHistory(history.path)
+    restored.load()
+    assert sorted(restored.entries) == ['A001', 'A002']
+    assert restored.classify(item('A001', budget='2,000元')) == CrawlHistory.UNCHANGED
+
+def test_partial_journal_line_is_ignored(tmp_path):
+    history = CrawlHistory(str(tmp_path / 'history.json'))
+    history.update(item('A001'), detail_fetched=True)
+    history.save()
+    with open(history.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"case": "A002", "entr')
+
+    restored = CrawlHistory(history.path)
+    restored.load()
+    restored.update(item('A003'), detail_fetched=True)
+    restored.save()
+    assert journal_cases(restored) == ['A001', 'A003']
@@ -0,0 +1,66 @@
+import os
+import json
+from http_fetcher import HttpFetcher, is_challenge_page, is_login_url
+from main import load_config_and_build_url
+from procurement_crawler import ProcurementCrawler
+from site_spec import DEFAULT_SITE_SPEC
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_config.json')
+LIST_MARKER = DEFAULT_SITE_SPEC['list']['marker']
+LIST_PAGE = """<html><body>
+<table id="tpam"><tbody><tr><td>1</td><td>國防部</td><td>A001<br><a href="/tender/detail?pk=1"><span>辦公設備採購</span></a></td></tr></tbody></table>
+</body></html>"""
+
+def config_url():
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    success, target_url = load_config_and_build_url(config)
+    assert success
+    return target_url
+
+def test_list_page_at_config_url_is_not_challenge():
+    # 設定檔的列表網址含 isLogIn=N，查詢參數不可被當成登入頁
+    target_url = config_url()
+    assert 'isLogIn=N' in target_url
+    assert not is_login_url(target_url)
+    assert not is_challenge_page(LIST_PAGE, target_url, LIST_MARKER)
+
+def test_login_redirect_is_challenge():
+    login_url = 'https://web.pcc.gov.tw/prkms/login/common/Login?redirect=%2Fprkms'
+    assert is_login_url(login_url)
+    assert is_challenge_page('<html><form id="loginForm"></form></html>', login_url, LIST_MARKER)
+
+def test_missing_marker_is_challenge():
+    assert is_challenge_page('<html><div class="captcha"></div></html>', config_url(), LIST_MARKER)
+    assert is_challenge_page('', config_url(), LIST_MARKER)
+
+class RecordingRateController:
+    def __init__(self):
+        self.results = []
+
+    def wait(self):
+        pass
+
+    def record(self, latency=None, success=True):
+        self.results.append(success)
+
+class FakeResponse:
+    def __init__(self, status_code, text, url):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+        self.encoding = 'utf-8'
+
+def crawler_with_response(status_code, text):
+    rate_controller = RecordingRateController()
+    fetcher = HttpFetcher(rate_controller=rate_controller)
+    fetcher.session.get = lambda url, **kwargs: FakeResponse(status_code, text, url)
+    return ProcurementCrawler(None, fetcher=fetcher, rate_controller=rate_controller), rate_controller
+
+def test_each_http_request_is_recorded_once():
+    for status_code, text, expected in ((200, LIST_PAGE, [True]),
+                                        (500, '', [False]),
+                                        (200, '<html>captcha</html>', [False])):
+        crawler, rate_controller = crawler_with_response(status_code, text)
+        crawler.load_page(config_url())
+        assert rate_controller.results == expected
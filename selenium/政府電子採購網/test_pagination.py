@@ -0,0 +1,19 @@
+from pagination import find_page_param, build_page_urls
+
+LIST_URL = 'https://web.pcc.gov.tw/prkms/tender/common/basic/readTenderBasic?pageSize=100&orgId=2&isLogIn=N'
+
+def test_page_param_ignores_unchanged_params_equal_to_two():
+    # orgId=2 出現在頁碼參數之前，但兩頁的值相同，不是頁碼
+    next_url = LIST_URL + '&d-49738-p=2'
+    assert find_page_param(LIST_URL, next_url) == 'd-49738-p'
+    urls = build_page_urls(next_url, 'd-49738-p', 2, 3)
+    assert urls[1].endswith('orgId=2&isLogIn=N&d-49738-p=3')
+
+def test_page_param_changed_from_current_page():
+    current = LIST_URL + '&pageIndex=1'
+    assert find_page_param(current, LIST_URL + '&pageIndex=2') == 'pageIndex'
+
+def test_ambiguous_page_param_falls_back():
+    next_url = LIST_URL + '&pageIndex=2&tab=2'
+    assert find_page_param(LIST_URL, next_url) is None
+    assert find_page_param(LIST_URL, LIST_URL) is None
@@ -0,0 +1,64 @@
+import pytest
+from rate_controller import RateController
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def controller(clock=None, **kwargs):
+    clock = clock or FakeClock()
+    options = dict(min_delay=1.0, max_delay=8.0, initial_delay=3.0, decrease_step=0.5,
+                   backoff_factor=2.0, slow_threshold=5.0, jitter=0)
+    options.update(kwargs)
+    return RateController(clock=clock, sleep=clock.sleep, **options)
+
+def test_success_decreases_additively_down_to_min():
+    rate = controller()
+    assert [rate.record(latency=0.2) for _ in range(5)] == [2.5, 2.0, 1.5, 1.0, 1.0]
+
+def test_failure_increases_multiplicatively_up_to_max():
+    rate = controller()
+    assert [rate.record(success=False) for _ in range(3)] == [6.0, 8.0, 8.0]
+
+def test_slow_response_backs_off_by_half_the_factor():
+    rate = controller()
+    assert rate.record(latency=6.0) == pytest.approx(4.5)
+    assert rate.record(latency=5.0) == pytest.approx(4.0)
+
+def test_initial_delay_is_clamped():
+    assert controller(initial_delay=0.1).delay == 1.0
+    assert controller(initial_delay=60).delay == 8.0
+
+def test_wait_reserves_consecutive_slots():
+    clock = FakeClock()
+    rate = controller(clock)
+    assert rate.wait() == 0
+    assert rate.wait() == 3.0
+    rate.record(success=False)
+    # 新的間隔從下一個時段之後才生效
+    assert rate.wait() == 3.0
+    assert rate.wait() == 6.0
+    assert clock.sleeps == [3.0, 3.0, 6.0]
+
+def test_wait_does_not_sleep_after_idle_period():
+    clock = FakeClock()
+    rate = controller(clock)
+    rate.wait()
+    clock.now += 10
+    assert rate.wait() == 0
+    assert clock.sleeps == []
+
+def test_jitter_stays_within_spread():
+    clock = FakeClock()
+    rate = controller(clock, jitter=0.2)
+    rate.wait()
+    for _ in range(50):
+        assert 2.4 <= rate.wait() <= 3.6
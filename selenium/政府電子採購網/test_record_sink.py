@@ -0,0 +1,30 @@
+import copy
+import logging
+import pytest
+from record_sink import create_sink
+from site_spec import SiteSpec, DEFAULT_SITE_SPEC
+
+def custom_spec():
+    spec = copy.deepcopy(DEFAULT_SITE_SPEC)
+    spec['list']['fields']['award_status'] = './td[6]'
+    return SiteSpec(spec)
+
+def test_parquet_keeps_site_spec_fields(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    columns = custom_spec().record_columns()
+    assert columns[-2:] == ('award_status', 'detail_data')
+    with create_sink('parquet', str(tmp_path / 'out'), columns=columns) as sink:
+        sink.write({'tender_case_no': 'A001', 'award_status': '已決標', 'detail_data': {'採購資料': {}}})
+    table = pq.read_table(sink.path)
+    assert table.column_names == list(columns)
+    assert table.column('award_status').to_pylist() == ['已決標']
+
+def test_parquet_warns_about_fields_outside_schema(tmp_path, caplog):
+    pytest.importorskip('pyarrow')
+    with caplog.at_level(logging.WARNING, logger='record_sink'):
+        with create_sink('parquet', str(tmp_path / 'out')) as sink:
+            sink.write({'tender_case_no': 'A001', 'award_status': '已決標'})
+        with create_sink('parquet', str(tmp_path / 'typed'), 'typed', columns=custom_spec().record_columns()):
+            pass
+    assert sum('award_status' in message for message in caplog.messages) == 2
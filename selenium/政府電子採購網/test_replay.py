@@ -0,0 +1,39 @@
+import os
+import json
+from main import load_config_and_build_url, run_replay
+from page_cache import PageCache
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_config.json')
+DETAIL_URL = 'https://web.pcc.gov.tw/prkms/tender/common/basic/detail?pk={}'
+
+def list_page(count):
+    rows = ''.join(
+        f'<tr><td>{i}</td><td>國防部</td><td>A{i:03d}<br><a href="{DETAIL_URL.format(i)}"><span>案{i}</span></a></td>'
+        f'<td></td><td>公開招標</td><td></td><td>114/03/0{i}</td><td>114/03/2{i}</td><td><span>1,000元</span></td></tr>'
+        for i in range(1, count + 1))
+    return f'<html><body><p>共 {count} 筆</p><table id="tpam"><tbody>{rows}</tbody></table></body></html>'
+
+def detail_page(i):
+    return (f'<html><body><div id="printRange"><table><caption>採購資料</caption>'
+            f'<tr><td>標案案號</td><td>A{i:03d}</td></tr></table></div></body></html>')
+
+def test_replay_from_cache_of_config_url(tmp_path):
+    # 以 _config.json 的列表網址 (含 isLogIn=N) 建立快取，重播不可把快取頁面當成登入頁
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config.update(data_folder=str(tmp_path), page_cache={'enabled': True, 'folder': str(tmp_path / 'cache')},
+                  sqlite_store={'enabled': False})
+    success, target_url = load_config_and_build_url(config)
+    assert success
+
+    page_cache = PageCache.from_config(config)
+    page_cache.put(target_url, list_page(3), target_url)
+    for i in range(1, 4):
+        page_cache.put(DETAIL_URL.format(i), detail_page(i), DETAIL_URL.format(i))
+
+    output_path = run_replay(config)
+    assert output_path
+    with open(output_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert len(data) == 3
+    assert data[0]['detail_data'] == {'採購資料': {'標案案號': 'A001'}}
@@ -0,0 +1,116 @@
+from retry_scheduler import CircuitBreaker, DeadLetterFile, RetryQueue, backoff_delay
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def test_backoff_grows_exponentially_and_caps():
+    assert [backoff_delay(attempt, 5.0, 30.0, jitter=0) for attempt in range(1, 6)] == [5.0, 10.0, 20.0, 30.0, 30.0]
+    for _ in range(200):
+        assert 5.0 <= backoff_delay(2, 5.0, 300.0, jitter=0.5) <= 15.0
+
+def test_failed_task_is_deferred_until_backoff_elapses():
+    clock = FakeClock()
+    queue = RetryQueue(max_attempts=3, base_delay=5.0, jitter=0, clock=clock, sleep=clock.sleep)
+    queue.put('A')
+    queue.put('B')
+    task = queue.get()
+    assert task == ('A', 1)
+    queue.done(task, False, 'timeout')
+    # 重試尚未到期，先處理新項目
+    assert queue.get() == ('B', 1)
+    clock.now = 5.0
+    assert queue.get() == ('A', 2)
+
+def test_exhausted_task_is_reported_once():
+    clock = FakeClock()
+    exhausted = []
+    queue = RetryQueue(max_attempts=2, base_delay=1.0, jitter=0, clock=clock, sleep=clock.sleep,
+                       on_exhausted=lambda key, attempts, error: exhausted.append((key, attempts, error)))
+    queue.put('A')
+    queue.done(queue.get(), False, 'timeout')
+    clock.now = 1.0
+    queue.done(queue.get(), False, 'timeout')
+    assert exhausted == [('A', 2, 'timeout')]
+    assert queue.exhausted == 1
+    assert queue.get() is None
+
+def test_breaker_opens_at_failure_ratio_and_waits_for_cooldown():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=4, failure_ratio=0.5, min_calls=4, cooldown=60.0, clock=clock)
+    for success in (True, True, False):
+        breaker.record(success)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() == 60.0
+    clock.now = 45.0
+    assert breaker.allow() == 15.0
+
+def test_half_open_admits_one_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=2, failure_ratio=0.5, min_calls=2, cooldown=10.0, clock=clock)
+    breaker.record(False)
+    breaker.record(False)
+    clock.now = 10.0
+    assert breaker.allow() == 0.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() > 0
+    # 試探失敗重新斷路並重新計算冷卻
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() == 10.0
+    clock.now = 20.0
+    assert breaker.allow() == 0.0
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() == 0.0
+
+def test_released_probe_can_be_taken_again():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=1, failure_ratio=1.0, min_calls=1, cooldown=1.0, clock=clock)
+    breaker.record(False)
+    clock.now = 1.0
+    assert breaker.allow() == 0.0
+    breaker.release_probe()
+    assert breaker.allow() == 0.0
+
+def test_queue_sleeps_through_open_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=1, failure_ratio=1.0, min_calls=1, cooldown=12.0, clock=clock)
+    queue = RetryQueue(base_delay=1.0, jitter=0, breaker=breaker, clock=clock, sleep=clock.sleep)
+    queue.put('A')
+    queue.put('B')
+    queue.done(queue.get(), False, 'timeout')
+    assert breaker.state == CircuitBreaker.OPEN
+    # 冷卻期間每次最多睡 5 秒，冷卻結束後放行一個試探請求
+    assert queue.get() == ('A', 2)
+    assert clock.sleeps == [5.0, 5.0, 2.0]
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+def test_dead_letters_are_written_and_replayed(tmp_path):
+    dead_letters = DeadLetterFile(str(tmp_path / 'retry' / 'dead_letters.jsonl'))
+    dead_letters.append({'detail_link': '/detail?pk=1', 'detail_data': {'x': 1}}, 4, 'timeout', 'https://example')
+    dead_letters.append({'detail_link': '/detail?pk=2'}, 4, 'timeout')
+    dead_letters.append({'detail_link': '/detail?pk=1'}, 4, 'timeout')
+
+    entries = dead_letters.drain()
+    assert [entry['record']['detail_link'] for entry in entries] == ['/detail?pk=1', '/detail?pk=2']
+    assert 'detail_data' not in entries[0]['record']
+    assert entries[0]['attempts'] == 4 and entries[0]['target_url'] == 'https://example'
+
+    # 中斷的重新執行可由 .replaying 檔取回；完成後只剩重新執行時再次失敗的項目
+    assert len(dead_letters.drain()) == 2
+    dead_letters.append({'detail_link': '/detail?pk=2'}, 4, 'timeout')
+    dead_letters.finish_drain()
+    assert [entry['record']['detail_link'] for entry in dead_letters.drain()] == ['/detail?pk=2']
+    dead_letters.finish_drain()
+    assert dead_letters.drain() == []
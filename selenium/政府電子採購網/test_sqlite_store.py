@@ -0,0 +1,22 @@
+import pytest
+from sqlite_store import TenderStore
+
+ITEM = {'tender_case_no': 'A001', 'org_name': '國防部', 'tender_name': '辦公設備採購', 'tender_type': '公開招標',
+        'announce_date': '114/03/08', 'tender_deadline': '114/03/20', 'budget': '1,000元',
+        'detail_link': 'https://web.pcc.gov.tw/tender/detail?pk=1'}
+
+def test_upsert_without_link_keeps_stored_detail_link(tmp_path):
+    with TenderStore(str(tmp_path / 'store.sqlite')) as store:
+        store.upsert_items([ITEM])
+        # 重播或離線資料沒有詳情連結時，不可清掉先前保存的連結
+        store.upsert_items([dict(ITEM, detail_link=None)])
+        store.upsert_items([dict(ITEM, detail_link='')])
+        assert store.get('A001')['detail_link'] == ITEM['detail_link']
+
+def test_query_dates(tmp_path):
+    with TenderStore(str(tmp_path / 'store.sqlite')) as store:
+        store.upsert_items([ITEM])
+        assert len(store.query(date_from='114/03/01', date_to='2025-03-31')) == 1
+        assert store.query(date_from='2025-03-09') == []
+        with pytest.raises(ValueError):
+            store.query(date_from='114/3/x')
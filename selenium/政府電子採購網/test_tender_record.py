@@ -0,0 +1,38 @@
+import pytest
+from datetime import date
+from history_manager import record_fingerprint
+from record_sink import ParquetSink
+from tender_record import build_records, parse_roc_dates, parse_budgets, parse_roc_date, parse_budget
+
+ITEMS = [
+    {'tender_case_no': 'A001', 'org_name': '國防部', 'tender_name': '辦公設備採購', 'tender_type': '公開招標',
+     'announce_date': '114/3/8', 'tender_deadline': '114/03/20 17:00', 'budget': '未公開', 'detail_link': 'x'},
+    {'tender_case_no': 'A002', 'org_name': '國防部', 'tender_name': '網站建置案', 'tender_type': '公開招標',
+     'announce_date': '114/03/08', 'tender_deadline': '114/3/2', 'budget': '1,234,567元', 'detail_link': 'y'},
+]
+
+def test_column_parsers_match_scalar_parsers():
+    dates = ['114/3/8', '114年3月8日', '2025-02-30', '114/13/1', '', None, date(2025, 3, 18)]
+    assert parse_roc_dates(dates)[:6] == [parse_roc_date(value) if value else None for value in dates[:6]]
+    assert parse_roc_dates(dates)[-1] == date(2025, 3, 18)
+    budgets = ['1,234,567元', '未公開', 'NT$3,000', '12.5', '', None]
+    assert parse_budgets(budgets) == [parse_budget(value) for value in budgets]
+
+def test_typed_records_fingerprint_like_raw_dicts():
+    records = build_records(ITEMS)
+    assert records[0].budget is None and records[1].budget == 1234567
+    for item, record in zip(ITEMS, records):
+        assert record_fingerprint(record) == record_fingerprint(item)
+    # 經過日誌 (to_dict) 還原後仍保有原始字串
+    restored = build_records([record.to_dict() for record in records])
+    assert [record_fingerprint(record) for record in restored] == [record_fingerprint(item) for item in ITEMS]
+
+def test_parquet_budget_type_is_stable_across_batches(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    path = str(tmp_path / 'out.parquet')
+    sink = ParquetSink(path, batch_size=1, typed=True)
+    sink.write(build_records([dict(ITEMS[1], budget='1,000')])[0])
+    sink.write(build_records([dict(ITEMS[1], budget='12.5')])[0])
+    sink.close()
+    assert pq.read_table(path).column('budget').to_pylist() == [1000.0, 12.5]